@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from ..config import Settings
+from ..models.session import Session
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+
+# Lower value = served first
+PRIORITY_ACTIVE = 0
+PRIORITY_NEW = 1
+
+
+class AdmissionRejected(Exception):
+    """The request was shed (queue full, queue wait expired or client rate-limited)."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def session_priority(session: Session) -> int:
+    """Sessions already mid-plan are prioritised over brand-new ones."""
+    return PRIORITY_ACTIVE if len(session.messages) > 1 or session.stage_data else PRIORITY_NEW
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take one token. Returns 0 on success, otherwise seconds until a token is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Gate in front of upstream Claude calls.
+
+    - A global limit on in-flight upstream calls.
+    - Calls over the limit wait in a bounded priority queue (active sessions first,
+      FIFO within a priority) for at most `queue_timeout` seconds.
+    - When the queue is full, new calls are shed immediately with AdmissionRejected,
+      which the API maps to 429 + Retry-After.
+    - Per-client token buckets rate-limit turns before any work is done.
+
+    In-flight count, queue depth, wait time and shed counts are published as metrics.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+        shed_retry_after: float = 2.0,
+        rate_per_minute: float = 0.0,
+        burst: int = 10,
+        max_tracked_clients: int = 10_000,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.shed_retry_after = shed_retry_after
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = burst
+        self.max_tracked_clients = max_tracked_clients
+        self.metrics = metrics or default_metrics
+
+        self._in_flight = 0
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        return cls(
+            max_in_flight=settings.admission_max_in_flight,
+            max_queue=settings.admission_max_queue,
+            queue_timeout=settings.admission_queue_timeout_seconds,
+            shed_retry_after=settings.admission_shed_retry_after_seconds,
+            rate_per_minute=settings.rate_limit_per_client_per_minute,
+            burst=settings.rate_limit_burst,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def check_rate(self, client_id: str) -> None:
+        if self.rate_per_second <= 0:
+            return
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = TokenBucket(self.rate_per_second, self.burst)
+            while len(self._buckets) > self.max_tracked_clients:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client_id)
+
+        wait = bucket.try_acquire()
+        if wait > 0:
+            self.metrics.incr("admission.rate_limited")
+            raise AdmissionRejected("Rate limit exceeded", retry_after=math.ceil(wait))
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NEW):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_NEW) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self._publish()
+            self.metrics.observe("admission.wait_ms", 0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.metrics.incr("admission.shed")
+            raise AdmissionRejected("Upstream queue is full", retry_after=self.shed_retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        self._publish()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up — pass it on
+                self.release()
+            self._remove_waiter(entry)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.metrics.incr("admission.timeouts")
+            raise AdmissionRejected("Timed out waiting for upstream capacity", retry_after=self.shed_retry_after)
+        finally:
+            self.metrics.observe("admission.wait_ms", (time.monotonic() - started) * 1000)
+
+    def release(self) -> None:
+        # Hand the slot directly to the highest-priority live waiter, if any
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._publish()
+                return
+        self._in_flight -= 1
+        self._publish()
+
+    def _remove_waiter(self, entry: list) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+        self._publish()
+
+    def _publish(self) -> None:
+        self.metrics.set_gauge("admission.in_flight", self._in_flight)
+        self.metrics.set_gauge("admission.queue_depth", len(self._waiters))
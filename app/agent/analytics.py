@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..models.session import Session, PlanningStage, STAGE_ORDER
+from ..utils.files import write_text_atomic
+
+logger = logging.getLogger(__name__)
+
+# Stages a session works through; COMPLETE is the funnel's end, not a step
+FUNNEL_STAGES = [s for s in STAGE_ORDER if s != PlanningStage.COMPLETE]
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate in O(1) memory (Jain & Chlamtac's P² algorithm):
+    five markers track the min, max, target quantile and two midpoints, and are
+    nudged toward their ideal positions with a parabolic fit as samples arrive.
+    """
+
+    def __init__(self, q: float = 0.5):
+        self.q = q
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        h = self.heights
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= x < h[i + 1])
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or (
+                d <= -1 and self.positions[i - 1] - self.positions[i] < -1
+            ):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not h[i - 1] < candidate < h[i + 1]:
+                    candidate = self._linear(i, step)
+                h[i] = candidate
+                self.positions[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+
+    def value(self) -> Optional[float]:
+        if not self.count:
+            return None
+        if self.count <= 5:
+            # Exact quantile of the few samples seen so far
+            return self.heights[min(len(self.heights) - 1, int(self.q * len(self.heights)))]
+        return self.heights[2]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "q": self.q, "count": self.count, "heights": list(self.heights),
+            "positions": list(self.positions), "desired": list(self.desired),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "P2Quantile":
+        sketch = cls(data["q"])
+        sketch.count = data["count"]
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+
+class PlanningAnalytics:
+    """
+    Live funnel and usage stats, updated by PlanningStateMachine as events happen:
+    session start, each turn, contradictions, stage advances and completion.
+
+    Counters and P² sketches are O(1) to update and `summary()` is O(stages), so a
+    dashboard refresh never scans sessions. State persists as JSON through
+    `save()` / `load()` so it survives restarts.
+    """
+
+    def __init__(self):
+        self.sessions_started = 0
+        self.completions = 0
+        self.reached: Dict[str, int] = {s.value: 0 for s in FUNNEL_STAGES}
+        self.advanced: Dict[str, int] = {s.value: 0 for s in FUNNEL_STAGES}
+        self.turns: Dict[str, int] = {s.value: 0 for s in FUNNEL_STAGES}
+        self.contradictions: Dict[str, int] = {s.value: 0 for s in FUNNEL_STAGES}
+        self.turns_to_advance: Dict[str, P2Quantile] = {s.value: P2Quantile(0.5) for s in FUNNEL_STAGES}
+        self.tokens_per_plan = P2Quantile(0.5)
+        self.tokens_per_plan_p90 = P2Quantile(0.9)
+
+    # ── Events ───────────────────────────────────────────────────
+    def session_started(self) -> None:
+        self.sessions_started += 1
+        self.reached[FUNNEL_STAGES[0].value] += 1
+
+    def session_seeded(self, session: Session) -> None:
+        """
+        A session created from a template or clone. It starts at its first stage without
+        data, so every stage before that one was pre-filled and counts as reached and
+        advanced (with no turns-to-advance sample). Pre-filled stages after it are counted
+        by `stage_advanced` when an advance skips them.
+        """
+        self.session_started()
+        idx = STAGE_ORDER.index(session.current_stage)
+        for stage in FUNNEL_STAGES[:idx]:
+            self.advanced[stage.value] += 1
+        for stage in FUNNEL_STAGES[1:idx + 1]:
+            self.reached[stage.value] += 1
+        if session.is_complete:
+            self.completed(session)
+
+    def turn(self, stage: PlanningStage) -> None:
+        if stage.value in self.turns:
+            self.turns[stage.value] += 1
+
+    def contradiction(self, stage: PlanningStage) -> None:
+        if stage.value in self.contradictions:
+            self.contradictions[stage.value] += 1
+
+    def stage_advanced(self, session: Session, from_stage: PlanningStage) -> None:
+        self.advanced[from_stage.value] += 1
+        user_turns = sum(1 for m in session.messages if m.role == "user" and m.stage == from_stage)
+        self.turns_to_advance[from_stage.value].add(user_turns)
+        # Pre-filled stages the advance skipped over were passed through, not worked on
+        for stage in STAGE_ORDER[STAGE_ORDER.index(from_stage) + 1:STAGE_ORDER.index(session.current_stage)]:
+            self.reached[stage.value] += 1
+            self.advanced[stage.value] += 1
+        if session.current_stage.value in self.reached:
+            self.reached[session.current_stage.value] += 1
+
+    def completed(self, session: Session) -> None:
+        self.completions += 1
+        if session.tokens_used:
+            self.tokens_per_plan.add(session.tokens_used)
+            self.tokens_per_plan_p90.add(session.tokens_used)
+
+    # ── Reads ────────────────────────────────────────────────────
+    def summary(self) -> Dict[str, Any]:
+        stages = []
+        for stage in FUNNEL_STAGES:
+            key = stage.value
+            reached, advanced, turns = self.reached[key], self.advanced[key], self.turns[key]
+            stages.append({
+                "stage": key,
+                "reached": reached,
+                "advanced": advanced,
+                "in_progress_or_dropped": reached - advanced,
+                "conversion_rate": round(advanced / reached, 4) if reached else None,
+                "turns": turns,
+                "median_turns_to_advance": self.turns_to_advance[key].value(),
+                "contradictions": self.contradictions[key],
+                "contradiction_rate": round(self.contradictions[key] / turns, 4) if turns else None,
+            })
+        return {
+            "sessions_started": self.sessions_started,
+            "completions": self.completions,
+            "completion_rate": (
+                round(self.completions / self.sessions_started, 4) if self.sessions_started else None
+            ),
+            "stages": stages,
+            "tokens_per_completed_plan": {
+                "median": self.tokens_per_plan.value(),
+                "p90": self.tokens_per_plan_p90.value(),
+            },
+        }
+
+    # ── Persistence ──────────────────────────────────────────────
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sessions_started": self.sessions_started,
+            "completions": self.completions,
+            "reached": dict(self.reached),
+            "advanced": dict(self.advanced),
+            "turns": dict(self.turns),
+            "contradictions": dict(self.contradictions),
+            "turns_to_advance": {k: v.to_dict() for k, v in self.turns_to_advance.items()},
+            "tokens_per_plan": self.tokens_per_plan.to_dict(),
+            "tokens_per_plan_p90": self.tokens_per_plan_p90.to_dict(),
+        }
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        self.sessions_started = data["sessions_started"]
+        self.completions = data["completions"]
+        for name in ("reached", "advanced", "turns", "contradictions"):
+            getattr(self, name).update(data[name])
+        self.turns_to_advance.update(
+            {k: P2Quantile.from_dict(v) for k, v in data["turns_to_advance"].items()}
+        )
+        self.tokens_per_plan = P2Quantile.from_dict(data["tokens_per_plan"])
+        self.tokens_per_plan_p90 = P2Quantile.from_dict(data["tokens_per_plan_p90"])
+
+    async def save(self, path: str) -> None:
+        # Copy state on the loop, write it off the loop
+        await asyncio.to_thread(self._write, path, self.to_dict())
+
+    @staticmethod
+    def _write(path: str, data: Dict[str, Any]) -> None:
+        write_text_atomic(path, json.dumps(data))
+
+    def load(self, path: str) -> bool:
+        try:
+            self.restore(json.loads(Path(path).read_text()))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Ignoring unreadable analytics state {path}: {exc}")
+            return False
+        return True
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from ..config import Settings
+from ..models.session import Session
+from ..storage.archive import TranscriptArchive
+from ..storage.base import SessionStore
+from ..storage.codec import SessionCodec, SessionView
+from ..utils.markdown_renderer import MarkdownRenderer
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+from .plan_compiler import PlanCompiler
+
+logger = logging.getLogger(__name__)
+
+
+class SessionArchiver:
+    """
+    Moves completed sessions out of the hot store.
+
+    A completed session untouched for `archive_after` is compacted to its header,
+    stage_data and the compiled plan (cached on the session so the plan endpoint
+    doesn't recompile); its messages are written to the TranscriptArchive.
+    `rehydrate` restores the transcript when a turn arrives for an archived session.
+    Each pass ends by reclaiming archive day files no session refers to any more.
+
+    `lock` is the per-session turn lock, so archival never races a turn in progress.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        archive: TranscriptArchive,
+        archive_after: timedelta = timedelta(hours=24),
+        codec: Optional[SessionCodec] = None,
+        lock: Optional[Callable[[str], asyncio.Lock]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.store = store
+        self.archive = archive
+        self.archive_after = archive_after
+        self.codec = codec or SessionCodec()
+        self.lock = lock
+        self.metrics = metrics or default_metrics
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        store: SessionStore,
+        lock: Optional[Callable[[str], asyncio.Lock]] = None,
+    ) -> "SessionArchiver":
+        return cls(
+            store=store,
+            archive=TranscriptArchive(settings.archive_dir),
+            archive_after=timedelta(hours=settings.archive_after_hours),
+            codec=SessionCodec(compression=settings.session_compression),
+            lock=lock,
+        )
+
+    def _is_candidate(self, view: SessionView, cutoff: datetime) -> bool:
+        header = view.header
+        return (
+            header["is_complete"]
+            and not header.get("transcript_ref")
+            and view.message_count > 0
+            and header["updated_at"] < cutoff
+        )
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Archive every eligible session; returns how many were archived."""
+        cutoff = (now or datetime.utcnow()) - self.archive_after
+        # Headers are read lazily — message blocks of hot sessions are never decoded
+        candidates, referenced = [], set()
+        for view in await self.store.views():
+            ref = view.header.get("transcript_ref")
+            if ref:
+                referenced.add(TranscriptArchive.file_of(ref))
+            elif self._is_candidate(view, cutoff):
+                candidates.append(view.session_id)
+        archived = 0
+        for session_id in candidates:
+            try:
+                ref = await self._archive_one(session_id, cutoff)
+            except Exception as exc:
+                self.metrics.incr("archive.failures")
+                logger.warning(f"Failed to archive session {session_id}: {exc}")
+                continue
+            if ref:
+                archived += 1
+                referenced.add(TranscriptArchive.file_of(ref))
+        if archived:
+            logger.info(f"Archived {archived} completed session(s)")
+        # Refs only go away between the scan and here (rehydrate, delete), so nothing
+        # in a file left out of `referenced` can still be needed
+        freed = await asyncio.to_thread(self.archive.reclaim, referenced)
+        if freed:
+            self.metrics.incr("archive.bytes_reclaimed", freed)
+            logger.info(f"Reclaimed {freed} byte(s) of archived transcripts")
+        return archived
+
+    async def _archive_one(self, session_id: str, cutoff: datetime) -> Optional[str]:
+        """The new transcript reference, or None if the session no longer qualifies."""
+        async with AsyncExitStack() as stack:
+            if self.lock is not None:
+                await stack.enter_async_context(self.lock(session_id))
+            session = await self.store.get(session_id)
+            # Re-check under the lock: a turn may have landed since the scan
+            if not session or not session.is_complete or session.is_archived or session.updated_at >= cutoff:
+                return None
+            await self.archive_session(session)
+            await self.store.save(session)
+            return session.transcript_ref
+
+    async def archive_session(self, session: Session) -> None:
+        """Compact `session` in place; the caller saves it."""
+        plan = PlanCompiler().compile(session)
+        payload = self.codec.encode(session)
+        ref = await asyncio.to_thread(self.archive.append, session.session_id, payload)
+
+        session.compiled_plan = plan.model_dump(mode="json")
+        session.compiled_plan_markdown = MarkdownRenderer().render(plan)
+        session.transcript_ref = ref
+        session.messages = []
+        self.metrics.incr("archive.sessions_archived")
+        self.metrics.incr("archive.bytes_written", len(payload))
+
+    def transcript(self, session_id: str, transcript_ref: str) -> SessionView:
+        """Lazy view of an archived transcript; pages decode only the blocks they need."""
+        archived_id, payload = self.archive.read(transcript_ref)
+        if archived_id != session_id:
+            raise ValueError(f"Archive reference for {session_id} points at {archived_id}")
+        return SessionView(payload)
+
+    def rehydrate(self, session: Session) -> Session:
+        """Restore an archived session's transcript in place so it can take new turns."""
+        if not session.is_archived:
+            return session
+        session.messages = self.transcript(session.session_id, session.transcript_ref).messages()
+        session.transcript_ref = None
+        session.compiled_plan = None
+        session.compiled_plan_markdown = None
+        self.metrics.incr("archive.rehydrations")
+        return session
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import weakref
+from typing import Awaitable, Callable, Dict
+
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundExtractionRunner:
+    """
+    Runs deferred extraction jobs off the request path.
+
+    - At most `max_concurrency` jobs run at once; the rest wait on a semaphore.
+    - At most one job per session is tracked; `wait()` lets the next turn block until
+      the previous turn's extraction has been applied, so stage changes apply in order.
+    - `lock()` hands out a per-session lock that serialises concurrent turns.
+    """
+
+    def __init__(self, max_concurrency: int = 8):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running = 0
+        # Locks disappear once no turn holds or waits on them
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    def is_pending(self, session_id: str) -> bool:
+        return session_id in self._tasks
+
+    async def wait(self, session_id: str) -> None:
+        task = self._tasks.get(session_id)
+        if task is not None:
+            # Failures are logged by the job itself; the next turn proceeds regardless
+            await asyncio.gather(asyncio.shield(task), return_exceptions=True)
+
+    def schedule(self, session_id: str, job: Callable[[], Awaitable[None]]) -> None:
+        previous = self._tasks.get(session_id)
+
+        async def _run() -> None:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            async with self._semaphore:
+                self._running += 1
+                metrics.set_gauge("extraction.background.running", self._running)
+                try:
+                    await job()
+                except Exception as exc:
+                    metrics.incr("extraction.background.failures")
+                    logger.warning(f"Background extraction failed for session {session_id}: {exc}")
+                finally:
+                    self._running -= 1
+                    metrics.set_gauge("extraction.background.running", self._running)
+
+        task = asyncio.ensure_future(_run())
+        self._tasks[session_id] = task
+        metrics.set_gauge("extraction.background.pending", len(self._tasks))
+
+        def _done(t: asyncio.Task) -> None:
+            if self._tasks.get(session_id) is t:
+                del self._tasks[session_id]
+            metrics.set_gauge("extraction.background.pending", len(self._tasks))
+
+        task.add_done_callback(_done)
+
+    async def drain(self) -> None:
+        """Wait for every scheduled job — called on shutdown so no extraction is lost."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
@@ -1,8 +1,8 @@
 import logging
 from dataclasses import dataclass
-from typing import Optional, Any
+from typing import Optional, Any, Union
 
-from ..models.session import PlanningStage
+from ..models.session import PlanningStage, StageDataSet
 from ..models.stage_data import ConstraintsData, TasksData
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,7 @@ class ContradictionDetector:
         self,
         stage: PlanningStage,
         new_data: Any,
-        existing_stage_data: dict,
+        existing_stage_data: Union[StageDataSet, dict],
     ) -> Optional[Contradiction]:
         if stage == PlanningStage.TASKS_AND_SUBTASKS:
             return self._check_tasks_vs_constraints(new_data, existing_stage_data)
@@ -34,22 +34,23 @@ class ContradictionDetector:
     def _check_tasks_vs_constraints(
         self,
         tasks_data: TasksData,
-        existing_stage_data: dict,
+        existing_stage_data: Union[StageDataSet, dict],
     ) -> Optional[Contradiction]:
         """
         Rule 1: Unique task owner count must not exceed stated team size.
         Rule 2: Sequential task duration sum should not dramatically exceed the deadline.
         """
-        raw = existing_stage_data.get(PlanningStage.STRATEGIC_CONSTRAINTS.value)
-        if not raw:
-            return None
-
         try:
-            constraints = ConstraintsData(**raw)
+            # A session's StageDataSet is passed through as-is; raw dicts are validated
+            stage_data = StageDataSet.coerce(existing_stage_data)
         except Exception as exc:
             logger.warning(f"Could not parse constraints for contradiction check: {exc}")
             return None
 
+        constraints: Optional[ConstraintsData] = stage_data.strategic_constraints
+        if constraints is None:
+            return None
+
         # Rule 1: Owner count vs team size
         if constraints.team_size is not None:
             skip_labels = {"tbd", "unassigned", "n/a", "various", ""}
@@ -0,0 +1,232 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..models.session import PlanningStage
+from ..models.stage_data import ConstraintsData
+
+
+@dataclass
+class LocalExtraction:
+    """Result of a rule-based extraction: the data, per-field and overall confidence."""
+    data: BaseModel
+    confidence: float
+    field_confidence: Dict[str, float] = field(default_factory=dict)
+    # Fields the text mentions but rules can't settle (negated or conflicting);
+    # any of these means the model has to extract the stage
+    unresolved: List[str] = field(default_factory=list)
+
+
+class LocalExtractor:
+    """
+    Deterministic, zero-cost extractor run before the LLM extraction call.
+    Subclasses parse the stage's user text and score each field in [0, 1].
+    """
+
+    stage: PlanningStage
+
+    def extract(self, text: str) -> Optional[LocalExtraction]:
+        raise NotImplementedError
+
+
+# ─────────────────────────────────────────────────────────────────
+# STAGE 2 — deadline, budget, team size, methodology
+# ─────────────────────────────────────────────────────────────────
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|"
+    "november|december|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+_WORD_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15,
+    "twenty": 20,
+}
+_NUMBER = r"(\d{1,3}|" + "|".join(_WORD_NUMBERS) + r")"
+
+_DATE_FORMS = [
+    r"Q[1-4]\s*\d{4}",
+    r"H[12]\s*\d{4}",
+    r"\d{4}-\d{2}-\d{2}",
+    r"(?:" + _MONTHS + r")\.?\s+(?:\d{1,2}(?:st|nd|rd|th)?,?\s+)?\d{4}",
+    r"(?:" + _MONTHS + r")\.?\s+\d{1,2}(?:st|nd|rd|th)?",
+]
+_DATE_PREFIX = r"(?:end of |mid[- ]|early |late )?"
+# A bare year is only trusted after a cue word ("by 2027")
+_DATE = _DATE_PREFIX + r"(?:" + "|".join(_DATE_FORMS + [r"\d{4}"]) + r")"
+_DATE_STRICT = _DATE_PREFIX + r"(?:" + "|".join(_DATE_FORMS) + r")"
+
+# (pattern, confidence) — only a date after a cue word is taken as the deadline
+_DEADLINE_PATTERNS: List[Tuple[re.Pattern, float]] = [
+    (re.compile(r"\b(?:deadline|due|launch|ship|go[- ]live|deliver(?:ed)?|done|complete(?:d)?)\b"
+                r"[^.\n]{0,30}?\b(?:by|before|on|is|in|for)\s+(" + _DATE + r")", re.I), 0.95),
+    (re.compile(r"\b(?:by|before|no later than)\s+(" + _DATE + r")", re.I), 0.85),
+]
+# Any other date ("we kicked off on March 5") may or may not be the deadline
+_ANY_DATE = re.compile(r"\b(" + _DATE_STRICT + r")\b", re.I)
+
+_TEAM_PATTERNS: List[Tuple[re.Pattern, float]] = [
+    (re.compile(r"\bteam (?:size )?(?:of|is|=|:)\s*" + _NUMBER + r"\b", re.I), 0.95),
+    (re.compile(r"\b" + _NUMBER + r"[- ](?:person|people|member|man)\s+team\b", re.I), 0.95),
+    (re.compile(r"\b" + _NUMBER + r"\s+(?:people|engineers|developers|devs|team members|"
+                r"members|FTEs?|staff|designers)\b", re.I), 0.85),
+]
+
+_AMOUNT = r"(?:[$€£]\s?\d[\d,]*(?:\.\d+)?\s?(?:k|m|mm|bn|million|thousand|billion)?" \
+          r"|\d[\d,]*(?:\.\d+)?\s?(?:k|m|million|thousand|billion)?\s?(?:USD|EUR|GBP|dollars|euros|pounds))"
+_BUDGET_PATTERNS: List[Tuple[re.Pattern, float]] = [
+    (re.compile(r"\bbudget[^.\n]{0,20}?(" + _AMOUNT + r")", re.I), 0.95),
+    (re.compile(r"(" + _AMOUNT + r")(?![\w])", re.I), 0.8),
+]
+
+_METHODOLOGIES = {
+    "scrum": "Scrum",
+    "kanban": "Kanban",
+    "waterfall": "Waterfall",
+    "prince2": "PRINCE2",
+    "hybrid": "Hybrid",
+    "agile": "Agile",
+}
+_METHODOLOGY_PATTERN = re.compile(
+    r"\b(" + "|".join(_METHODOLOGIES) + r")\b", re.I
+)
+
+
+# A negation shortly before a mention in the same clause: "we can't use Scrum"
+_NEGATION = re.compile(
+    r"\b(?:not|no|never|cannot|can't|won't|don't|doesn't|isn't|aren't|without|instead of|"
+    r"rather than|avoid(?:ing)?|moving away from|drop(?:ping)?)\b[^.;:!?\n]{0,25}$",
+    re.I,
+)
+
+
+def _negated(text: str, start: int) -> bool:
+    return bool(_NEGATION.search(text[max(0, start - 40):start]))
+
+
+# A past-tense verb before a cued date in the same clause: "the old project shipped by 2019"
+_PAST = re.compile(
+    r"\b(?:shipped|launched|delivered|finished|completed|released|ended|went live|was|were|had)\b"
+    r"[^.;:!?\n]{0,30}$",
+    re.I,
+)
+
+
+def _last_match(
+    patterns: List[Tuple[re.Pattern, float]], text: str, negatable: bool = False,
+) -> Tuple[Optional[str], float, bool]:
+    """
+    First pattern (in priority order) that matches wins; the latest mention in the
+    text is used. Returns (value, confidence, unresolved): conflicting mentions, or
+    a negated one when `negatable`, leave the field unresolved.
+    """
+    for pattern, confidence in patterns:
+        matches = list(pattern.finditer(text))
+        if matches:
+            found = [m.group(1).strip() for m in matches]
+            unresolved = len({f.lower() for f in found}) > 1 or (
+                negatable and any(_negated(text, m.start()) for m in matches)
+            )
+            return found[-1], confidence, unresolved
+    return None, 0.0, False
+
+
+def _deadline(text: str) -> Tuple[Optional[str], float, bool]:
+    """
+    Like `_last_match` over the cue patterns. A cued date in a past-tense clause, or
+    a date with no cue at all, leaves the deadline unresolved: it may be a kickoff
+    or an earlier project's date rather than this one's deadline.
+    """
+    deadline, confidence, unresolved = _last_match(_DEADLINE_PATTERNS, text)
+    cued = [m for pattern, _ in _DEADLINE_PATTERNS for m in pattern.finditer(text)]
+    if any(_PAST.search(text[max(0, m.start() - 50):m.start(1)]) for m in cued):
+        unresolved = True
+    spans = [m.span(1) for m in cued]
+    if any(not any(s <= m.start() and m.end() <= e for s, e in spans) for m in _ANY_DATE.finditer(text)):
+        unresolved = True
+    return deadline, confidence, unresolved
+
+
+def _team_size(text: str) -> Tuple[Optional[int], float, bool]:
+    """
+    Like `_last_match`, but any two different head counts anywhere in the text
+    ("3 people and 2 designers") leave the team size unresolved.
+    """
+    mentions = [(m, conf) for pattern, conf in _TEAM_PATTERNS for m in pattern.finditer(text)]
+    counts = {_parse_int(m.group(1)) for m, _ in mentions}
+    if not mentions or None in counts:
+        return None, 0.0, False
+    unresolved = len(counts) > 1 or any(_negated(text, m.start()) for m, _ in mentions)
+    size = counts.pop() if not unresolved else None
+    if size is not None and not 0 < size < 1000:
+        return None, 0.0, False
+    # Patterns are in priority order; the strongest one that matched sets the confidence
+    return size, max(conf for _, conf in mentions), unresolved
+
+
+def _parse_int(token: str) -> Optional[int]:
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    return _WORD_NUMBERS.get(token)
+
+
+class ConstraintsExtractor(LocalExtractor):
+    stage = PlanningStage.STRATEGIC_CONSTRAINTS
+
+    def extract(self, text: str) -> Optional[LocalExtraction]:
+        if not text.strip():
+            return None
+
+        # Negated or conflicting mentions are reported as unresolved rather than guessed
+        unresolved = []
+        deadline, deadline_conf, conflict = _deadline(text)
+        if conflict:
+            unresolved.append("deadline")
+            deadline, deadline_conf = None, 0.0
+        budget, budget_conf, conflict = _last_match(_BUDGET_PATTERNS, text)
+        if conflict:
+            unresolved.append("budget")
+            budget, budget_conf = None, 0.0
+        team_size, team_conf, conflict = _team_size(text)
+        if conflict:
+            unresolved.append("team_size")
+
+        mentions = list(_METHODOLOGY_PATTERN.finditer(text))
+        methodology, method_conf = None, 0.0
+        if mentions:
+            # "Agile" is often used loosely alongside a concrete framework — prefer the specific one
+            methods = [m.group(1).lower() for m in mentions]
+            specific = [m for m in methods if m != "agile"]
+            if len(set(specific)) > 1 or any(_negated(text, m.start()) for m in mentions):
+                unresolved.append("methodology")
+            else:
+                methodology = _METHODOLOGIES[specific[-1] if specific else methods[-1]]
+                method_conf = 0.9
+
+        field_confidence = {
+            "deadline": deadline_conf,
+            "budget": budget_conf,
+            "team_size": team_conf,
+            "methodology": method_conf,
+        }
+        if not any(field_confidence.values()) and not unresolved:
+            return None
+
+        data = ConstraintsData(
+            deadline=deadline,
+            budget=budget,
+            team_size=team_size,
+            methodology=methodology,
+        )
+        # Overall confidence rewards coverage: every field missing counts as zero
+        confidence = sum(field_confidence.values()) / len(field_confidence)
+        return LocalExtraction(
+            data=data, confidence=confidence, field_confidence=field_confidence, unresolved=unresolved,
+        )
+
+
+LOCAL_EXTRACTORS: Dict[PlanningStage, LocalExtractor] = {
+    PlanningStage.STRATEGIC_CONSTRAINTS: ConstraintsExtractor(),
+}
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+from ..config import Settings
+from ..models.session import PlanningStage
+
+
+class CallType(str, Enum):
+    REPLY = "reply"
+    EXTRACTION = "extraction"
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    model: str
+    max_tokens: int
+
+
+class ModelRouter:
+    """
+    Chooses model and max_tokens per (call type, stage).
+
+    Lookup order: an exact (call_type, stage) route, then a call-type-wide route,
+    then the default. `fallback()` returns the large-model route to retry with when
+    a cheaper model's extraction fails validation.
+    """
+
+    def __init__(
+        self,
+        default: ModelRoute,
+        routes: Optional[Dict[Tuple[CallType, Optional[PlanningStage]], ModelRoute]] = None,
+        fallback: Optional[ModelRoute] = None,
+    ):
+        self.default = default
+        self.routes = routes or {}
+        self._fallback = fallback or default
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ModelRouter":
+        large_extraction = ModelRoute(settings.claude_model, settings.claude_extraction_max_tokens)
+        routes: Dict[Tuple[CallType, Optional[PlanningStage]], ModelRoute] = {
+            (CallType.EXTRACTION, None): large_extraction,
+        }
+        for stage in settings.claude_fast_extraction_stages:
+            routes[(CallType.EXTRACTION, PlanningStage(stage))] = ModelRoute(
+                settings.claude_fast_model, settings.claude_extraction_max_tokens
+            )
+
+        # Explicit overrides: {"extraction:tasks_and_subtasks": {"model": ..., "max_tokens": ...}}
+        for key, spec in settings.claude_model_routes.items():
+            call_type, _, stage = key.partition(":")
+            base = routes.get((CallType(call_type), None), None) or ModelRoute(
+                settings.claude_model, settings.claude_max_tokens
+            )
+            routes[(CallType(call_type), PlanningStage(stage) if stage else None)] = ModelRoute(
+                model=spec.get("model", base.model),
+                max_tokens=int(spec.get("max_tokens", base.max_tokens)),
+            )
+
+        return cls(
+            default=ModelRoute(settings.claude_model, settings.claude_max_tokens),
+            routes=routes,
+            fallback=large_extraction,
+        )
+
+    def route(self, call_type: CallType, stage: PlanningStage) -> ModelRoute:
+        return (
+            self.routes.get((call_type, stage))
+            or self.routes.get((call_type, None))
+            or self.default
+        )
+
+    def fallback(self, call_type: CallType, stage: PlanningStage) -> Optional[ModelRoute]:
+        """Large-model route to retry with, or None if the primary route already is it."""
+        primary = self.route(call_type, stage)
+        if primary.model == self._fallback.model:
+            return None
+        return self._fallback
@@ -19,11 +19,12 @@ class PlanCompiler:
     def compile(self, session: Session) -> ProjectPlan:
         sd = session.stage_data
 
-        outcome = OutcomeData(**sd[PlanningStage.DEFINE_OUTCOME.value])
-        constraints = ConstraintsData(**sd[PlanningStage.STRATEGIC_CONSTRAINTS.value])
-        phases_data = PhasesData(**sd[PlanningStage.PHASES_AND_MILESTONES.value])
-        tasks_data = TasksData(**sd[PlanningStage.TASKS_AND_SUBTASKS.value])
-        risk_data = RiskGovernanceData(**sd[PlanningStage.RISK_AND_GOVERNANCE.value])
+        # Stage data is validated at commit/load time; indexing raises KeyError if missing
+        outcome: OutcomeData = sd[PlanningStage.DEFINE_OUTCOME]
+        constraints: ConstraintsData = sd[PlanningStage.STRATEGIC_CONSTRAINTS]
+        phases_data: PhasesData = sd[PlanningStage.PHASES_AND_MILESTONES]
+        tasks_data: TasksData = sd[PlanningStage.TASKS_AND_SUBTASKS]
+        risk_data: RiskGovernanceData = sd[PlanningStage.RISK_AND_GOVERNANCE]
 
         plan = ProjectPlan(
             project_name=outcome.project_name,
@@ -0,0 +1,192 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional, Union
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from ..models.session import PlanningStage, ProjectType, Session, StageDataSet, STAGE_DATA_MODELS
+from ..models.stage_data import (
+    OutcomeData, ConstraintsData, PhasesData, TasksData, RiskGovernanceData,
+)
+from ..storage.base import SessionStore
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+from .contradiction_detector import Contradiction, ContradictionDetector
+
+
+class TooManyPlans(Exception):
+    """A JSON array carried more than `max_plans` plans; none of them were imported."""
+
+    def __init__(self, max_plans: int):
+        super().__init__(f"At most {max_plans} plans can be imported per request")
+        self.max_plans = max_plans
+
+
+class ImportedPlan(BaseModel):
+    """A finished plan: every stage's data, keyed the way sessions store it."""
+    # Echoed back with the result so callers can match it to their own records
+    reference: Optional[str] = None
+    define_outcome: OutcomeData
+    strategic_constraints: ConstraintsData
+    phases_and_milestones: PhasesData
+    tasks_and_subtasks: TasksData
+    risk_and_governance: RiskGovernanceData
+
+    @field_validator("define_outcome")
+    @classmethod
+    def _known_project_type(cls, outcome: OutcomeData) -> OutcomeData:
+        ProjectType(outcome.project_type)  # ValueError → validation error
+        return outcome
+
+
+@dataclass
+class ImportResult:
+    index: int
+    session_id: Optional[str] = None
+    reference: Optional[str] = None
+    contradictions: List[Contradiction] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class PlanImporter:
+    """
+    Turns finished plans into completed sessions without a conversation.
+
+    Each plan is validated straight into the stage models, checked by the
+    ContradictionDetector stage by stage as extraction would (a contradiction is
+    reported with the result; nothing is asked, so it doesn't block the import) and
+    saved as a complete session whose plan is served by the plan endpoint.
+
+    `import_ndjson` reads one plan per line from a stream of byte chunks and yields
+    each result as soon as the plan is saved: memory holds one chunk and one line at
+    a time, and a line over `max_line_bytes` is skipped as it arrives. The loop is
+    yielded after every plan so a large batch doesn't stall other requests.
+
+    One request imports at most `max_plans` plans: a JSON array over the limit is
+    refused whole with TooManyPlans. An NDJSON stream can't be refused once plans
+    are saved, so the first line past the limit gets an error result and the rest of
+    the stream is left unread; the results already yielded stay valid.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        max_line_bytes: int = 1 << 20,
+        max_plans: int = 1000,
+        detector: Optional[ContradictionDetector] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.store = store
+        self.max_line_bytes = max_line_bytes
+        self.max_plans = max_plans
+        self.detector = detector or ContradictionDetector()
+        self.metrics = metrics or default_metrics
+
+    @classmethod
+    def from_settings(cls, settings, store: SessionStore) -> "PlanImporter":
+        return cls(
+            store,
+            max_line_bytes=settings.plan_import_max_line_bytes,
+            max_plans=settings.plan_import_max_plans,
+        )
+
+    async def import_plan(self, index: int, raw: Union[bytes, Any]) -> ImportResult:
+        """Import one plan given as JSON bytes or an already-parsed object."""
+        try:
+            if isinstance(raw, (bytes, bytearray)):
+                plan = ImportedPlan.model_validate_json(raw)
+            else:
+                plan = ImportedPlan.model_validate(raw)
+        except ValidationError as exc:
+            self.metrics.incr("plans.import_failed")
+            return ImportResult(index=index, error=_describe(exc))
+
+        stage_data = StageDataSet()
+        contradictions = []
+        for stage in STAGE_DATA_MODELS:
+            data = getattr(plan, stage.value)
+            contradiction = self.detector.check(stage, data, stage_data)
+            if contradiction:
+                contradictions.append(contradiction)
+            stage_data.commit(stage, data)
+
+        session = Session(
+            project_type=ProjectType(plan.define_outcome.project_type),
+            current_stage=PlanningStage.COMPLETE,
+            stage_data=stage_data,
+            is_complete=True,
+        )
+        await self.store.save(session)
+        self.metrics.incr("plans.imported")
+        return ImportResult(
+            index=index,
+            session_id=session.session_id,
+            reference=plan.reference,
+            contradictions=contradictions,
+        )
+
+    async def import_many(self, items: List[Any]) -> AsyncIterator[ImportResult]:
+        if len(items) > self.max_plans:
+            raise TooManyPlans(self.max_plans)
+        for index, item in enumerate(items):
+            yield await self.import_plan(index, item)
+            await asyncio.sleep(0)
+
+    async def import_ndjson(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[ImportResult]:
+        index = 0
+        async for line in self._lines(chunks):
+            if index == self.max_plans:
+                yield ImportResult(
+                    index=index,
+                    error=f"Stopped at the limit of {self.max_plans} plans; this line and the rest were not imported",
+                )
+                return
+            if line is None:
+                self.metrics.incr("plans.import_failed")
+                result = ImportResult(index=index, error=f"Line exceeds {self.max_line_bytes} bytes")
+            else:
+                result = await self.import_plan(index, line)
+            index += 1
+            yield result
+            await asyncio.sleep(0)
+
+    async def _lines(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[Optional[bytes]]:
+        """Non-blank lines of the stream; None stands in for a line over the limit."""
+        buffer = bytearray()
+        oversized = False
+        async for chunk in chunks:
+            start = 0
+            while True:
+                end = chunk.find(b"\n", start)
+                if end == -1:
+                    if not oversized:
+                        buffer += chunk[start:]
+                        if len(buffer) > self.max_line_bytes:
+                            # Drop the rest of this line as it arrives instead of buffering it
+                            oversized = True
+                            buffer.clear()
+                    break
+                if oversized:
+                    oversized = False
+                    yield None
+                else:
+                    buffer += chunk[start:end]
+                    if len(buffer) > self.max_line_bytes:
+                        yield None
+                    elif buffer.strip():
+                        yield bytes(buffer)
+                    buffer.clear()
+                start = end + 1
+        if oversized or len(buffer) > self.max_line_bytes:
+            yield None
+        elif buffer.strip():
+            yield bytes(buffer)
+
+
+def _describe(exc: ValidationError, limit: int = 5) -> str:
+    errors = exc.errors()
+    parts = [
+        f"{'.'.join(str(p) for p in e['loc']) or '(plan)'}: {e['msg']}" for e in errors[:limit]
+    ]
+    if len(errors) > limit:
+        parts.append(f"and {len(errors) - limit} more")
+    return "; ".join(parts)
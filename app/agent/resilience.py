@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from ..config import Settings
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 529}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(exc: BaseException) -> bool:
+    # Imported here so importing the app doesn't pull in the SDK (see utils.startup)
+    from anthropic import APIConnectionError, APIStatusError
+
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES or exc.status_code >= 500
+    return isinstance(exc, (APIConnectionError, asyncio.TimeoutError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    # Longest upstream retry-after worth waiting for; beyond it the call gives up
+    retry_budget: float = 30.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Full-jitter exponential backoff; an upstream retry-after is a floor, never cut
+        to `max_delay`. None when the retry-after exceeds `retry_budget`: don't retry.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            if retry_after > self.retry_budget:
+                return None
+            return max(retry_after, backoff)
+        return backoff
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    → calls pass; `failure_threshold` retryable failures in a row open it
+    open      → calls fail fast with CircuitOpenError until `reset_timeout` elapses
+    half_open → a single probe call is let through; success closes, failure re-opens
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(retry_after=remaining)
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(retry_after=self.reset_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def abandon(self) -> None:
+        """Release a half-open probe whose call was cancelled before completing."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit breaker opened after {self._failures} failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Wraps every upstream Claude call with:
+    - a per-attempt timeout and an overall deadline
+    - jittered exponential retry on 429/529/5xx/connection errors, honouring retry-after
+    - optional hedging: once an attempt outlives the observed latency percentile for its
+      call type, a duplicate request is raced against it and the first result wins
+    - a shared circuit breaker that fails fast while upstream is degraded
+
+    Latencies, retries, hedges and breaker state are recorded in the metrics registry.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        attempt_timeout: float = 60.0,
+        deadline: float = 120.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.metrics = metrics or default_metrics
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ResilientCaller":
+        return cls(
+            retry=RetryPolicy(
+                max_attempts=settings.claude_retry_max_attempts,
+                base_delay=settings.claude_retry_base_delay_seconds,
+                max_delay=settings.claude_retry_max_delay_seconds,
+                retry_budget=settings.claude_retry_budget_seconds,
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                reset_timeout=settings.circuit_breaker_reset_seconds,
+            ),
+            attempt_timeout=settings.claude_call_timeout_seconds,
+            deadline=settings.claude_call_deadline_seconds,
+            hedge_percentile=settings.claude_hedge_percentile,
+            hedge_min_samples=settings.claude_hedge_min_samples,
+        )
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        call_type: str,
+        hedge: bool = False,
+    ) -> T:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self._check_breaker(call_type)
+            try:
+                if hedge:
+                    result = await self._hedged_attempt(fn, call_type)
+                else:
+                    result = await self._attempt(fn, call_type)
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except Exception as exc:
+                if not is_retryable(exc):
+                    # Upstream answered (e.g. a 400) — it is healthy, the request isn't
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                self._publish_breaker_state()
+                self.metrics.incr(f"claude.{call_type}.failures")
+
+                attempt += 1
+                delay = self.retry.delay(attempt - 1, retry_after_seconds(exc))
+                elapsed = time.monotonic() - started
+                if delay is None or attempt >= self.retry.max_attempts or elapsed + delay > self.deadline:
+                    raise
+                logger.info(
+                    f"Retrying {call_type} call in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.retry.max_attempts}): {exc}"
+                )
+                self.metrics.incr(f"claude.{call_type}.retries")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            self._publish_breaker_state()
+            return result
+
+    def _check_breaker(self, call_type: str) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.metrics.incr(f"claude.{call_type}.circuit_rejections")
+            raise
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]], call_type: str) -> T:
+        started = time.monotonic()
+        result = await asyncio.wait_for(fn(), timeout=self.attempt_timeout)
+        self.metrics.observe(
+            f"claude.{call_type}.latency_ms", (time.monotonic() - started) * 1000
+        )
+        return result
+
+    async def _hedged_attempt(self, fn: Callable[[], Awaitable[T]], call_type: str) -> T:
+        hedge_after = self._hedge_delay(call_type)
+        primary = asyncio.ensure_future(self._attempt(fn, call_type))
+        if hedge_after is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self.metrics.incr(f"claude.{call_type}.hedges")
+        secondary = asyncio.ensure_future(self._attempt(fn, call_type))
+        pending = {primary, secondary}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.metrics.incr(f"claude.{call_type}.hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self, call_type: str) -> Optional[float]:
+        hist = self.metrics.histogram(f"claude.{call_type}.latency_ms")
+        if hist is None or hist.count < self.hedge_min_samples:
+            return None
+        p = hist.percentile(self.hedge_percentile)
+        return p / 1000 if p is not None else None
+
+    def _publish_breaker_state(self) -> None:
+        value = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+        self.metrics.set_gauge("claude.circuit_state", value[self.breaker.state])
@@ -1,39 +1,175 @@
 import json
 import logging
-from typing import Optional, TypeVar, Type
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, TypeVar, Type
 from pydantic import BaseModel, ValidationError
-from anthropic import AsyncAnthropic
 
 from ..models.session import Session, PlanningStage
 from ..models.stage_data import (
     OutcomeData, ConstraintsData, PhasesData, TasksData, RiskGovernanceData,
 )
 from .prompts import STAGE_SYSTEM_PROMPTS, STAGE_EXTRACTION_PROMPTS
+from .resilience import ResilientCaller
+from .admission import AdmissionController, session_priority
+from .model_routing import CallType, ModelRoute, ModelRouter
+from .local_extractors import LOCAL_EXTRACTORS
+from .token_budget import TokenBudget, PreparedRequest, estimate_tokens
+from ..utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=BaseModel)
 
 
+EXTRACTION_SYSTEM_PROMPT = (
+    "You are a data extraction assistant. Extract structured data from "
+    "the conversation and return ONLY a valid JSON object matching the "
+    "provided schema. Do not include any explanation or markdown fencing. "
+    "If a required string field has no value in the conversation, use "
+    "the string 'MISSING'. For optional fields, use null."
+)
+
+
+@lru_cache(maxsize=None)
+def extraction_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema for a stage's extraction tool, built once per model (see warm_up)."""
+    return model.model_json_schema()
+
+
+class ExtractionInvalid(Exception):
+    """The model returned tool input that doesn't validate against the stage schema."""
+
+
+class StreamInterrupted(Exception):
+    """A streamed reply failed after text was already delivered, so it isn't retried."""
+
+
 class BaseStageHandler:
     stage: PlanningStage
     extraction_model: Type[T]
 
-    def __init__(self, claude_client: AsyncAnthropic, model: str, max_tokens: int):
+    def __init__(
+        self,
+        claude_client: "AsyncAnthropic",
+        model: str,
+        max_tokens: int,
+        caller: Optional[ResilientCaller] = None,
+        hedge_extraction: bool = False,
+        router: Optional[ModelRouter] = None,
+        local_min_confidence: Optional[float] = None,
+        budget: Optional[TokenBudget] = None,
+        admission: Optional[AdmissionController] = None,
+    ):
         self.claude = claude_client
         self.model = model
         self.max_tokens = max_tokens
+        self.caller = caller
+        self.hedge_extraction = hedge_extraction
+        self.router = router
+        self.local_min_confidence = local_min_confidence
+        self.budget = budget
+        self.admission = admission
+
+    def _route(self, call_type: CallType) -> ModelRoute:
+        if self.router is not None:
+            return self.router.route(call_type, self.stage)
+        if call_type == CallType.EXTRACTION:
+            return ModelRoute(self.model, 2048)
+        return ModelRoute(self.model, self.max_tokens)
+
+    def _prepare(
+        self,
+        session: Session,
+        system: str,
+        max_tokens: int,
+        extra_messages: Optional[list] = None,
+        extra_tokens: int = 0,
+    ) -> PreparedRequest:
+        """Size the request (and compact history if needed) when a TokenBudget is configured."""
+        if self.budget is None:
+            return PreparedRequest(
+                messages=session.get_claude_messages() + (extra_messages or []),
+                max_tokens=max_tokens,
+            )
+        return self.budget.prepare(
+            session, system, max_tokens,
+            extra_messages=extra_messages, extra_tokens=extra_tokens,
+        )
+
+    def _record_usage(self, session: Session, prepared: PreparedRequest, response) -> None:
+        if self.budget is not None:
+            self.budget.record_usage(session, prepared, response)
+
+    async def _create_message(
+        self, session: Session, call_type: str, hedge: bool = False, **kwargs
+    ):
+        """
+        Send one messages.create call, through admission control and the resilience
+        layer when configured. The admission slot is held across retries so backoff
+        under upstream pressure doesn't let more calls through.
+        """
+        return await self._call(session, call_type, lambda: self.claude.messages.create(**kwargs), hedge)
+
+    async def _stream_message(
+        self, session: Session, on_text: Callable[[str], Awaitable[None]], **kwargs
+    ):
+        """
+        Like `_create_message`, but streams text deltas to `on_text` as they arrive.
+        Failures before the first delta are retried as usual; once text has been
+        delivered a retry would duplicate it, so the error surfaces as StreamInterrupted.
+        """
+        delivered = False
 
-    async def generate_reply(self, session: Session) -> str:
+        async def attempt():
+            nonlocal delivered
+            async with self.claude.messages.stream(**kwargs) as stream:
+                try:
+                    async for text in stream.text_stream:
+                        delivered = True
+                        await on_text(text)
+                except Exception as exc:
+                    if delivered:
+                        raise StreamInterrupted(str(exc)) from exc
+                    raise
+                return await stream.get_final_message()
+
+        return await self._call(session, CallType.REPLY.value, attempt)
+
+    async def _call(self, session: Session, call_type: str, fn, hedge: bool = False):
+        if self.admission is None:
+            return await self._send(call_type, hedge, fn)
+        async with self.admission.slot(session_priority(session)):
+            return await self._send(call_type, hedge, fn)
+
+    async def _send(self, call_type: str, hedge: bool, fn):
+        if self.caller is None:
+            return await fn()
+        return await self.caller.call(fn, call_type=call_type, hedge=hedge)
+
+    async def generate_reply(
+        self, session: Session, on_text: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
         """
         Call 1: Natural conversational reply.
         Uses the full message history and the stage-specific system prompt.
+        With `on_text`, the reply is streamed and each text delta is passed to it.
         """
-        response = await self.claude.messages.create(
-            model=self.model,
-            max_tokens=self.max_tokens,
-            system=STAGE_SYSTEM_PROMPTS[self.stage],
-            messages=session.get_claude_messages(),
+        route = self._route(CallType.REPLY)
+        system = STAGE_SYSTEM_PROMPTS[self.stage]
+        prepared = self._prepare(session, system, route.max_tokens)
+        request = dict(
+            model=route.model,
+            max_tokens=prepared.max_tokens,
+            system=system,
+            messages=prepared.messages,
         )
+        if on_text is not None:
+            response = await self._stream_message(session, on_text, **request)
+        else:
+            response = await self._create_message(session, CallType.REPLY.value, **request)
+        self._record_usage(session, prepared, response)
         return response.content[0].text
 
     async def attempt_extraction(self, session: Session) -> Optional[T]:
@@ -41,55 +177,104 @@ class BaseStageHandler:
         Call 2: Structured JSON extraction via tool use.
         Separate call so it doesn't interfere with the conversational reply.
         Returns None if required fields are missing (stage not yet complete).
+        If a routed cheaper model returns output that fails schema validation,
+        the extraction is retried once on the large fallback model.
+        A confident rule-based local extraction skips the model call entirely.
         """
-        schema = self.extraction_model.model_json_schema()
-
-        extraction_messages = session.get_claude_messages() + [
-            {
-                "role": "user",
-                "content": STAGE_EXTRACTION_PROMPTS[self.stage],
-            }
-        ]
+        local = self._attempt_local_extraction(session)
+        if local is not None:
+            return local
 
         try:
-            response = await self.claude.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                system=(
-                    "You are a data extraction assistant. Extract structured data from "
-                    "the conversation and return ONLY a valid JSON object matching the "
-                    "provided schema. Do not include any explanation or markdown fencing. "
-                    "If a required string field has no value in the conversation, use "
-                    "the string 'MISSING'. For optional fields, use null."
-                ),
-                messages=extraction_messages,
-                tools=[
-                    {
-                        "name": "extract_stage_data",
-                        "description": "Extract structured planning data from the conversation",
-                        "input_schema": schema,
-                    }
-                ],
-                tool_choice={"type": "auto"},
-            )
+            try:
+                data = await self._extract(self._route(CallType.EXTRACTION), session)
+            except ExtractionInvalid as exc:
+                fallback = self.router.fallback(CallType.EXTRACTION, self.stage) if self.router else None
+                if fallback is None:
+                    raise
+                logger.info(
+                    f"Extraction for stage {self.stage} failed validation; "
+                    f"falling back to {fallback.model}: {exc}"
+                )
+                metrics.incr("claude.extraction.fallbacks")
+                data = await self._extract(fallback, session)
 
-            # Find the tool use block
-            tool_use_block = next(
-                (b for b in response.content if b.type == "tool_use"), None
-            )
-            if tool_use_block is None:
-                logger.debug("No tool use block returned during extraction")
-                return None
-
-            data = self.extraction_model.model_validate(tool_use_block.input)
-            if self._has_required_fields(data):
+            if data is not None and self._has_required_fields(data):
                 return data
             return None
 
-        except (ValidationError, Exception) as exc:
+        except Exception as exc:
             logger.warning(f"Extraction failed for stage {self.stage}: {exc}")
             return None
 
+    def _attempt_local_extraction(self, session: Session) -> Optional[T]:
+        extractor = LOCAL_EXTRACTORS.get(self.stage)
+        if extractor is None or self.local_min_confidence is None:
+            return None
+
+        result = extractor.extract(session.stage_user_text(self.stage))
+        if (
+            result is not None
+            and not result.unresolved
+            and result.confidence >= self.local_min_confidence
+            and self._has_required_fields(result.data)
+        ):
+            logger.info(
+                f"Local extraction satisfied stage {self.stage} "
+                f"(confidence {result.confidence:.2f}); skipping model call"
+            )
+            metrics.incr("extraction.local_hits")
+            return result.data
+
+        metrics.incr("extraction.local_misses")
+        return None
+
+    async def _extract(self, route: ModelRoute, session: Session) -> Optional[T]:
+        schema = extraction_schema(self.extraction_model)
+        prepared = self._prepare(
+            session,
+            EXTRACTION_SYSTEM_PROMPT,
+            route.max_tokens,
+            extra_messages=[
+                {
+                    "role": "user",
+                    "content": STAGE_EXTRACTION_PROMPTS[self.stage],
+                }
+            ],
+            extra_tokens=estimate_tokens(json.dumps(schema)),
+        )
+        response = await self._create_message(
+            session,
+            CallType.EXTRACTION.value,
+            hedge=self.hedge_extraction,
+            model=route.model,
+            max_tokens=prepared.max_tokens,
+            system=EXTRACTION_SYSTEM_PROMPT,
+            messages=prepared.messages,
+            tools=[
+                {
+                    "name": "extract_stage_data",
+                    "description": "Extract structured planning data from the conversation",
+                    "input_schema": schema,
+                }
+            ],
+            tool_choice={"type": "auto"},
+        )
+        self._record_usage(session, prepared, response)
+
+        # Find the tool use block
+        tool_use_block = next(
+            (b for b in response.content if b.type == "tool_use"), None
+        )
+        if tool_use_block is None:
+            logger.debug("No tool use block returned during extraction")
+            return None
+
+        try:
+            return self.extraction_model.model_validate(tool_use_block.input)
+        except ValidationError as exc:
+            raise ExtractionInvalid(str(exc)) from exc
+
     def _has_required_fields(self, data: T) -> bool:
         raise NotImplementedError
 
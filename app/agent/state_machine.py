@@ -1,11 +1,18 @@
 import logging
-from typing import Tuple
-from anthropic import AsyncAnthropic
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from ..models.session import Session, PlanningStage, ConversationMessage, STAGE_ORDER
 from .stage_handlers import STAGE_HANDLER_CLASSES
 from .contradiction_detector import ContradictionDetector
 from .prompts import get_stage_transition_message
+from .resilience import ResilientCaller
+from .model_routing import ModelRouter
+from .token_budget import TokenBudget
+from .admission import AdmissionController
+from .analytics import PlanningAnalytics
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
 
 logger = logging.getLogger(__name__)
 
@@ -24,71 +31,198 @@ class PlanningStateMachine:
        b. No contradiction → store stage data, advance stage
     6. Append assistant reply to session history
     7. Return (reply_text, updated_session)
+
+    In deferred mode steps 4–5 run after the reply is returned (see
+    BackgroundExtractionRunner) and their outcome reaches the user on the next turn.
     """
 
-    def __init__(self, claude_client: AsyncAnthropic, model: str, max_tokens: int):
+    def __init__(
+        self,
+        claude_client: "AsyncAnthropic",
+        model: str,
+        max_tokens: int,
+        caller: Optional[ResilientCaller] = None,
+        hedge_extraction: bool = False,
+        router: Optional[ModelRouter] = None,
+        local_min_confidence: Optional[float] = None,
+        budget: Optional[TokenBudget] = None,
+        admission: Optional[AdmissionController] = None,
+        analytics: Optional[PlanningAnalytics] = None,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
         self.claude = claude_client
         self.model = model
         self.max_tokens = max_tokens
+        self.caller = caller
+        self.hedge_extraction = hedge_extraction
+        self.router = router
+        self.local_min_confidence = local_min_confidence
+        self.budget = budget
+        self.admission = admission
+        self.analytics = analytics
+        # Receives {"type": "contradiction" | "stage_changed", ...} as they happen
+        self.on_event = on_event
         self.contradiction_detector = ContradictionDetector()
 
     async def process_message(
-        self, session: Session, user_message: str
+        self,
+        session: Session,
+        user_message: str,
+        defer_extraction: bool = False,
+        on_reply_text: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Tuple[str, Session]:
-        if session.current_stage == PlanningStage.COMPLETE:
+        """
+        Run one turn. With `defer_extraction`, steps 4–5 are skipped and the caller is
+        expected to run `run_deferred_extraction` in the background; its outcome is
+        surfaced on the next turn through `session.pending_notice`.
+        With `on_reply_text`, the step 3 reply is streamed to it as it is generated.
+        """
+        stage = session.current_stage
+        if stage == PlanningStage.COMPLETE:
             reply = (
                 "Your project plan is already complete! "
                 "Use `GET /api/v1/session/{session_id}/plan` to retrieve it."
             )
-            session.messages.append(ConversationMessage(role="user", content=user_message))
-            session.messages.append(ConversationMessage(role="assistant", content=reply))
+            session.messages.append(ConversationMessage(role="user", content=user_message, stage=stage))
+            session.messages.append(ConversationMessage(role="assistant", content=reply, stage=stage))
             return reply, session
 
+        if self.analytics is not None:
+            if not session.messages:
+                self.analytics.session_started()
+            self.analytics.turn(stage)
+
         # Step 1: Record user message
-        session.messages.append(ConversationMessage(role="user", content=user_message))
+        session.messages.append(ConversationMessage(role="user", content=user_message, stage=stage))
 
         # Step 2: Get handler for current stage
-        handler_class = STAGE_HANDLER_CLASSES[session.current_stage]
-        handler = handler_class(self.claude, self.model, self.max_tokens)
+        handler = self._handler_for(stage)
 
         # Step 3: Generate conversational reply
-        reply = await handler.generate_reply(session)
+        reply = await handler.generate_reply(session, on_text=on_reply_text)
+
+        if defer_extraction:
+            session.messages.append(ConversationMessage(role="assistant", content=reply, stage=stage))
+            return self._with_pending_notice(session, reply), session
 
         # Step 4: Attempt structured extraction
         extraction_result = await handler.attempt_extraction(session)
 
+        # Step 5: Contradiction check, commit and advance
         if extraction_result is not None:
-            # Step 5a: Contradiction check
-            contradiction = self.contradiction_detector.check(
-                stage=session.current_stage,
-                new_data=extraction_result,
-                existing_stage_data=session.stage_data,
-            )
-
+            contradiction, transition = self._apply_extraction(session, extraction_result)
             if contradiction:
-                logger.info(
-                    f"Contradiction detected at stage {session.current_stage}: "
-                    f"{contradiction.description}"
-                )
-                reply = (
-                    f"I noticed a potential conflict: {contradiction.description}\n\n"
-                    f"{contradiction.clarification_question}"
-                )
-            else:
-                # Step 5b: Commit data and advance stage
-                session.stage_data[session.current_stage.value] = (
-                    extraction_result.model_dump(mode="json")
-                )
-                session.advance_stage()
-
-                if session.current_stage == PlanningStage.COMPLETE:
-                    session.is_complete = True
-                    transition = get_stage_transition_message(PlanningStage.COMPLETE)
-                else:
-                    transition = get_stage_transition_message(session.current_stage)
-
+                reply = contradiction
+            elif transition:
                 reply = reply + "\n\n---\n" + transition
 
-        # Step 6: Record assistant reply
-        session.messages.append(ConversationMessage(role="assistant", content=reply))
-        return reply, session
+        # Step 6: Record assistant reply (tagged with the stage it was produced in)
+        session.messages.append(ConversationMessage(role="assistant", content=reply, stage=stage))
+        return self._with_pending_notice(session, reply), session
+
+    @staticmethod
+    def _with_pending_notice(session: Session, reply: str) -> str:
+        """
+        Prefix the reply with a notice parked for this turn — a deferred extraction's
+        outcome, or a clarification left by seeding from a template — and clear it.
+        The notice is already in the transcript, so only the returned reply carries it.
+        """
+        notice = session.pending_notice
+        session.pending_notice = None
+        return notice + "\n\n---\n" + reply if notice else reply
+
+    async def run_deferred_extraction(self, session: Session) -> Optional[str]:
+        """
+        Steps 4–5 for a turn processed with `defer_extraction`. The notice (clarification
+        or stage transition) is appended to the turn's assistant message so the transcript
+        matches the synchronous flow, and parked in `session.pending_notice` for delivery.
+        """
+        stage = session.current_stage
+        if stage == PlanningStage.COMPLETE:
+            return None
+
+        extraction_result = await self._handler_for(stage).attempt_extraction(session)
+        if extraction_result is None:
+            return None
+
+        contradiction, transition = self._apply_extraction(session, extraction_result)
+        notice = contradiction or transition
+        if notice:
+            last = session.messages[-1] if session.messages else None
+            if last is not None and last.role == "assistant":
+                last.content = last.content + "\n\n---\n" + notice
+                if self.budget is not None:
+                    self.budget.refresh(session, len(session.messages) - 1)
+            session.pending_notice = (
+                session.pending_notice + "\n\n" + notice if session.pending_notice else notice
+            )
+        return notice
+
+    def _handler_for(self, stage: PlanningStage):
+        handler_class = STAGE_HANDLER_CLASSES[stage]
+        return handler_class(
+            self.claude,
+            self.model,
+            self.max_tokens,
+            caller=self.caller,
+            hedge_extraction=self.hedge_extraction,
+            router=self.router,
+            local_min_confidence=self.local_min_confidence,
+            budget=self.budget,
+            admission=self.admission,
+        )
+
+    def _apply_extraction(
+        self, session: Session, extraction_result
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns (clarification, transition): a contradiction blocks the advance and
+        yields a clarification; otherwise the data is committed and the stage advances.
+        """
+        contradiction = self.contradiction_detector.check(
+            stage=session.current_stage,
+            new_data=extraction_result,
+            existing_stage_data=session.stage_data,
+        )
+
+        if contradiction:
+            logger.info(
+                f"Contradiction detected at stage {session.current_stage}: "
+                f"{contradiction.description}"
+            )
+            if self.analytics is not None:
+                self.analytics.contradiction(session.current_stage)
+            self._emit({
+                "type": "contradiction",
+                "stage": session.current_stage.value,
+                "description": contradiction.description,
+                "clarification_question": contradiction.clarification_question,
+            })
+            return (
+                f"I noticed a potential conflict: {contradiction.description}\n\n"
+                f"{contradiction.clarification_question}"
+            ), None
+
+        from_stage = session.current_stage
+        session.stage_data.commit(from_stage, extraction_result)
+        session.advance_stage()
+        if self.analytics is not None:
+            self.analytics.stage_advanced(session, from_stage)
+
+        if session.current_stage == PlanningStage.COMPLETE:
+            session.is_complete = True
+            if self.analytics is not None:
+                self.analytics.completed(session)
+        transition = get_stage_transition_message(session.current_stage)
+        self._emit({
+            "type": "stage_changed",
+            "from_stage": from_stage.value,
+            "to_stage": session.current_stage.value,
+            "is_complete": session.is_complete,
+            "message": transition,
+        })
+        return None, transition
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event is not None:
+            self.on_event(event)
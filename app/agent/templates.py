@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ..models.session import (
+    ConversationMessage, PlanningStage, ProjectType, Session, StageDataSet, STAGE_ORDER,
+)
+from ..utils.files import write_text_atomic
+from .contradiction_detector import Contradiction, ContradictionDetector
+
+logger = logging.getLogger(__name__)
+
+# What a clone carries over unless told otherwise: the stages that repeat across
+# projects of one kind, not the outcome, phases or tasks of the finished one
+DEFAULT_CLONE_STAGES = [PlanningStage.STRATEGIC_CONSTRAINTS, PlanningStage.RISK_AND_GOVERNANCE]
+
+
+class SessionTemplate(BaseModel):
+    """Committed stage data saved for reuse, from a finished session or supplied directly."""
+    template_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    description: Optional[str] = None
+    project_type: Optional[ProjectType] = None
+    stage_data: StageDataSet = Field(default_factory=StageDataSet)
+    source_session_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    @property
+    def stages(self) -> List[PlanningStage]:
+        return [PlanningStage(key) for key in self.stage_data.keys()]
+
+    @classmethod
+    def build(
+        cls,
+        name: str,
+        stage_data: StageDataSet,
+        stages: Optional[Iterable[PlanningStage]] = None,
+        **fields,
+    ) -> "SessionTemplate":
+        """A template holding `stages` (default: every committed one) of `stage_data`."""
+        return cls(name=name, stage_data=_select(stage_data, stages), **fields)
+
+    @classmethod
+    def from_session(
+        cls,
+        session: Session,
+        name: str,
+        stages: Optional[Iterable[PlanningStage]] = None,
+        description: Optional[str] = None,
+    ) -> "SessionTemplate":
+        return cls.build(
+            name,
+            session.stage_data,
+            stages,
+            description=description,
+            project_type=session.project_type,
+            source_session_id=session.session_id,
+        )
+
+
+def _select(stage_data: StageDataSet, stages: Optional[Iterable[PlanningStage]]) -> StageDataSet:
+    """A deep copy of `stages` of `stage_data`; ValueError if one of them has no data."""
+    wanted = list(stages) if stages is not None else [PlanningStage(k) for k in stage_data.keys()]
+    if not wanted:
+        raise ValueError("No stages selected")
+    missing = [s.value for s in wanted if s not in stage_data]
+    if missing:
+        raise ValueError(f"No stage data for: {', '.join(missing)}")
+    selected = StageDataSet()
+    for stage in wanted:
+        selected.commit(stage, stage_data[stage].model_copy(deep=True))
+    return selected
+
+
+@dataclass
+class SeedResult:
+    session: Session
+    prefilled: List[PlanningStage] = field(default_factory=list)
+    # Set when a chosen stage conflicts with the stages before it; prefill stops there
+    contradiction: Optional[Contradiction] = None
+
+
+def seed_session(
+    stage_data: StageDataSet,
+    stages: Optional[Iterable[PlanningStage]] = None,
+    project_type: Optional[ProjectType] = None,
+    source: str = "a saved template",
+    detector: Optional[ContradictionDetector] = None,
+) -> SeedResult:
+    """
+    Build a new session with `stages` of `stage_data` already committed.
+
+    Stages are applied in planning order and each goes through the contradiction
+    check against the data committed before it, as an extraction would; the first
+    conflict stops the prefill and its clarification is left in `pending_notice` for
+    the first turn. Each pre-filled stage gets one compact user/assistant exchange
+    tagged with that stage, so the transcript alternates roles and the token budget
+    compacts it like any confirmed stage. The session starts at the first stage
+    without data (later stages already filled are skipped by `advance_stage`), or
+    is complete if every stage was filled.
+    """
+    selected = _select(stage_data, stages)
+    detector = detector or ContradictionDetector()
+    session = Session(project_type=project_type)
+    result = SeedResult(session=session)
+
+    for key, data in selected.items():
+        stage = PlanningStage(key)
+        contradiction = detector.check(stage, data, session.stage_data)
+        if contradiction:
+            logger.info(f"Template prefill stopped at {stage.value}: {contradiction.description}")
+            result.contradiction = contradiction
+            notice = (
+                f"I noticed a potential conflict in the {_label(stage)} from {source}: "
+                f"{contradiction.description}\n\n{contradiction.clarification_question}"
+            )
+            session.pending_notice = notice
+            session.messages.extend(_exchange(
+                stage,
+                f"Reuse the {_label(stage)} from {source}.",
+                notice,
+            ))
+            break
+        session.stage_data.commit(stage, data)
+        session.messages.extend(_exchange(
+            stage,
+            f"Reuse the {_label(stage)} from {source}: {data.model_dump_json(exclude_defaults=True)}",
+            f"Understood — {_label(stage)} confirmed.",
+        ))
+        result.prefilled.append(stage)
+
+    session.current_stage = next(
+        (s for s in STAGE_ORDER if s != PlanningStage.COMPLETE and s not in session.stage_data),
+        PlanningStage.COMPLETE,
+    )
+    session.is_complete = session.current_stage == PlanningStage.COMPLETE
+    return result
+
+
+def _label(stage: PlanningStage) -> str:
+    return stage.value.replace("_", " ")
+
+
+def _exchange(stage: PlanningStage, user: str, assistant: str) -> List[ConversationMessage]:
+    return [
+        ConversationMessage(role="user", content=user, stage=stage),
+        ConversationMessage(role="assistant", content=assistant, stage=stage),
+    ]
+
+
+class TemplateRegistry:
+    """
+    Saved session templates, held in memory and written to one JSON file on every
+    change (templates are few and rarely edited). `load()` runs at startup.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._templates: Dict[str, SessionTemplate] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "TemplateRegistry":
+        return cls(settings.templates_path)
+
+    def get(self, template_id: str) -> Optional[SessionTemplate]:
+        return self._templates.get(template_id)
+
+    def list(self) -> List[SessionTemplate]:
+        return sorted(self._templates.values(), key=lambda t: (t.created_at, t.template_id))
+
+    async def add(self, template: SessionTemplate) -> None:
+        self._templates[template.template_id] = template
+        await self.save()
+
+    async def delete(self, template_id: str) -> bool:
+        if self._templates.pop(template_id, None) is None:
+            return False
+        await self.save()
+        return True
+
+    async def save(self) -> None:
+        if not self.path:
+            return
+        # Serialise on the loop, write off it
+        data = [t.model_dump(mode="json") for t in self.list()]
+        await asyncio.to_thread(self._write, self.path, data)
+
+    @staticmethod
+    def _write(path: str, data: List[dict]) -> None:
+        write_text_atomic(path, json.dumps(data))
+
+    def load(self) -> bool:
+        if not self.path:
+            return False
+        try:
+            templates = [SessionTemplate.model_validate(t) for t in json.loads(Path(self.path).read_text())]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable templates file {self.path}: {exc}")
+            return False
+        self._templates = {t.template_id: t for t in templates}
+        return True
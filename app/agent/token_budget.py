@@ -0,0 +1,211 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ..config import Settings
+from ..models.session import Session, ConversationMessage, PlanningStage, STAGE_ORDER
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+
+logger = logging.getLogger(__name__)
+
+# Fixed per-message framing cost (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class ContextOverflowError(Exception):
+    """Raised pre-flight when a request cannot fit the context window even after compaction."""
+
+    def __init__(self, estimated_tokens: int, context_window: int):
+        super().__init__(
+            f"Estimated {estimated_tokens} input tokens exceeds the "
+            f"{context_window}-token context window"
+        )
+        self.estimated_tokens = estimated_tokens
+        self.context_window = context_window
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local estimate: ~4 characters per token for English prose, with a floor of
+    ~1.3 tokens per word so short-word and punctuation-heavy text isn't undercounted.
+    """
+    if not text:
+        return 0
+    by_chars = len(text) / 4
+    by_words = len(text.split()) * 1.3
+    return math.ceil(max(by_chars, by_words))
+
+
+def message_tokens(message: ConversationMessage) -> int:
+    """Token estimate for one message, memoised on the message itself."""
+    if message.token_count is None:
+        message.token_count = estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+    return message.token_count
+
+
+def _stage_key(stage: Optional[PlanningStage]) -> str:
+    return stage.value if stage is not None else ""
+
+
+@dataclass
+class PreparedRequest:
+    messages: List[dict]
+    max_tokens: int
+    estimated_input_tokens: Optional[int] = None
+    compacted: bool = False
+
+
+class TokenBudget:
+    """
+    Pre-flight sizing for Claude requests.
+
+    Session history is counted incrementally: per-message estimates are memoised on
+    ConversationMessage and running totals (overall and per stage) live on the Session,
+    so each turn only counts messages appended since the last call.
+
+    Before a call, the estimate decides whether to compact the history (replace
+    committed stages' messages with a summary of their stage_data), how large
+    max_tokens can be, and whether the request cannot fit at all.
+    """
+
+    def __init__(
+        self,
+        context_window: int = 200_000,
+        compaction_threshold: float = 0.8,
+        min_output_tokens: int = 512,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.context_window = context_window
+        self.compaction_threshold = compaction_threshold
+        self.min_output_tokens = min_output_tokens
+        self.metrics = metrics or default_metrics
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "TokenBudget":
+        return cls(
+            context_window=settings.claude_context_window,
+            compaction_threshold=settings.context_compaction_threshold,
+            min_output_tokens=settings.claude_min_output_tokens,
+        )
+
+    def count(self, session: Session) -> int:
+        """Bring the session's running totals up to date; O(messages since last count)."""
+        for message in session.messages[session.token_count_cursor:]:
+            tokens = message_tokens(message)
+            session.history_tokens += tokens
+            key = _stage_key(message.stage)
+            session.stage_tokens[key] = session.stage_tokens.get(key, 0) + tokens
+        session.token_count_cursor = len(session.messages)
+        return session.history_tokens
+
+    def refresh(self, session: Session, index: int) -> None:
+        """Re-count the message at `index` after its content was edited."""
+        message = session.messages[index]
+        if message.token_count is None:
+            return
+        counted = index < session.token_count_cursor
+        old = message.token_count
+        message.token_count = None
+        if counted:
+            delta = message_tokens(message) - old
+            session.history_tokens += delta
+            key = _stage_key(message.stage)
+            session.stage_tokens[key] = session.stage_tokens.get(key, 0) + delta
+
+    def prepare(
+        self,
+        session: Session,
+        system: str,
+        max_tokens: int,
+        extra_messages: Optional[List[dict]] = None,
+        extra_tokens: int = 0,
+    ) -> PreparedRequest:
+        extra_messages = extra_messages or []
+        fixed = (
+            estimate_tokens(system)
+            + extra_tokens
+            + sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in extra_messages)
+        )
+        estimate = fixed + self.count(session)
+        messages: Optional[List[dict]] = None
+        compacted = False
+
+        if estimate + max_tokens > self.context_window * self.compaction_threshold:
+            compact = self._compact(session)
+            if compact is not None:
+                messages, history_estimate = compact
+                logger.info(
+                    f"Compacted session {session.session_id} history from "
+                    f"{session.history_tokens} to ~{history_estimate} tokens"
+                )
+                self.metrics.incr("tokens.compactions")
+                estimate = fixed + history_estimate
+                compacted = True
+
+        if estimate + self.min_output_tokens > self.context_window:
+            self.metrics.incr("tokens.overflow_rejections")
+            raise ContextOverflowError(estimate, self.context_window)
+
+        if messages is None:
+            messages = session.get_claude_messages()
+        return PreparedRequest(
+            messages=messages + extra_messages,
+            max_tokens=max(self.min_output_tokens, min(max_tokens, self.context_window - estimate)),
+            estimated_input_tokens=estimate,
+            compacted=compacted,
+        )
+
+    def record_usage(self, session: Session, prepared: PreparedRequest, response) -> None:
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        actual_input = getattr(usage, "input_tokens", None) or 0
+        actual_output = getattr(usage, "output_tokens", None) or 0
+        session.tokens_used += actual_input + actual_output
+        self.metrics.observe("tokens.actual_input", actual_input)
+        self.metrics.observe("tokens.actual_output", actual_output)
+        if prepared.estimated_input_tokens is not None and actual_input:
+            self.metrics.observe("tokens.estimated_input", prepared.estimated_input_tokens)
+            error_pct = (prepared.estimated_input_tokens - actual_input) / actual_input * 100
+            self.metrics.observe("tokens.estimate_error_pct", error_pct)
+            logger.debug(
+                f"Token estimate {prepared.estimated_input_tokens} vs actual {actual_input} "
+                f"({error_pct:+.1f}%)"
+            )
+
+    def _compact(self, session: Session):
+        """
+        Replace messages of already-committed stages with a summary of their stage_data.
+        Returns (messages, estimated history tokens) or None if nothing can be compacted.
+        """
+        current = session.current_stage
+        committed = [
+            stage for stage in STAGE_ORDER
+            if stage != current and stage.value in session.stage_data
+        ]
+        if not committed:
+            return None
+        if session.stage_tokens.get("", 0):
+            # Untagged legacy history: we can't tell which messages belong to which stage
+            return None
+
+        summary_lines = ["Summary of the planning stages already confirmed in this conversation:"]
+        for stage in committed:
+            summary_lines.append(
+                f"- {stage.value}: {session.stage_data[stage].model_dump_json(exclude_defaults=True)}"
+            )
+        summary = "\n".join(summary_lines)
+        ack = "Understood. I'll build on these confirmed details."
+
+        current_messages = [m for m in session.messages if m.stage == current]
+        messages = [
+            {"role": "user", "content": summary},
+            {"role": "assistant", "content": ack},
+        ] + [{"role": m.role, "content": m.content} for m in current_messages]
+
+        history_estimate = (
+            estimate_tokens(summary) + estimate_tokens(ack) + 2 * MESSAGE_OVERHEAD_TOKENS
+            + session.stage_tokens.get(current.value, 0)
+        )
+        return messages, history_estimate
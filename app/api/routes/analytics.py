@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+
+from ...agent.analytics import PlanningAnalytics
+from ...dependencies import get_analytics
+
+router = APIRouter()
+
+
+@router.get("/analytics")
+async def get_analytics_summary(analytics: PlanningAnalytics = Depends(get_analytics)):
+    return analytics.summary()
@@ -1,15 +1,37 @@
+import asyncio
+import ipaddress
 import logging
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException
-from anthropic import APIStatusError, APIConnectionError
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from starlette.requests import HTTPConnection
 
 from ...models.api_schemas import ChatRequest, ChatResponse
 
 logger = logging.getLogger(__name__)
 from ...models.session import Session, STAGE_ORDER
 from ...agent.state_machine import PlanningStateMachine
+from ...agent.stage_handlers import StreamInterrupted
+from ...agent.resilience import ResilientCaller, CircuitOpenError
+from ...agent.model_routing import ModelRouter
+from ...agent.background import BackgroundExtractionRunner
+from ...agent.token_budget import ContextOverflowError, TokenBudget
+from ...agent.admission import AdmissionController, AdmissionRejected
+from ...agent.archival import SessionArchiver
+from ...agent.analytics import PlanningAnalytics
 from ...storage.base import SessionStore
-from ...dependencies import get_claude_client, get_session_store
+from ...storage.write_behind import StoreBusyError
+from ...utils.idempotency import TurnDeduplicator, IdempotencyKeyConflict
+from ...utils.loop_monitor import tag_session
+from ...utils.responses import ModelResponse
+from ...dependencies import (
+    get_admission_controller, get_analytics, get_claude_client, get_claude_caller, get_extraction_runner,
+    get_model_router, get_session_archiver, get_session_store, get_token_budget,
+    get_turn_deduplicator,
+)
 from ...config import get_settings
 
 router = APIRouter()
@@ -33,54 +55,454 @@ def _progress(stage_value: str) -> int:
     return int((idx / (len(stages) - 1)) * 100)
 
 
+@dataclass
+class TurnServices:
+    """Per-request bundle of the shared services a chat turn depends on."""
+    store: SessionStore
+    claude: object
+    caller: ResilientCaller
+    model_router: ModelRouter
+    extractions: BackgroundExtractionRunner
+    admission: AdmissionController
+    budget: TokenBudget
+    archiver: Optional[SessionArchiver] = None
+    analytics: Optional[PlanningAnalytics] = None
+
+    def build_state_machine(
+        self, on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> PlanningStateMachine:
+        settings = get_settings()
+        return PlanningStateMachine(
+            claude_client=self.claude,
+            model=settings.claude_model,
+            max_tokens=settings.claude_max_tokens,
+            caller=self.caller,
+            hedge_extraction=settings.claude_hedge_extraction,
+            router=self.model_router,
+            local_min_confidence=(
+                settings.local_extraction_min_confidence
+                if settings.local_extraction_enabled else None
+            ),
+            budget=self.budget,
+            admission=self.admission,
+            analytics=self.analytics,
+            on_event=on_event,
+        )
+
+
+def get_turn_services(
+    store: SessionStore = Depends(get_session_store),
+    claude=Depends(get_claude_client),
+    caller: ResilientCaller = Depends(get_claude_caller),
+    model_router: ModelRouter = Depends(get_model_router),
+    extractions: BackgroundExtractionRunner = Depends(get_extraction_runner),
+    admission: AdmissionController = Depends(get_admission_controller),
+    budget: TokenBudget = Depends(get_token_budget),
+    archiver: SessionArchiver = Depends(get_session_archiver),
+    analytics: PlanningAnalytics = Depends(get_analytics),
+) -> TurnServices:
+    return TurnServices(
+        store, claude, caller, model_router, extractions, admission, budget, archiver, analytics,
+    )
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies: Tuple[str, ...]) -> Tuple[Union[ipaddress.IPv4Network, ipaddress.IPv6Network], ...]:
+    return tuple(ipaddress.ip_network(p, strict=False) for p in proxies)
+
+
+def _is_trusted(host: str, networks) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_id(connection: HTTPConnection) -> str:
+    """
+    Rate-limit key: the peer address. Only when the peer is one of `trusted_proxies`
+    is X-Forwarded-For used, and then its right-most hop that isn't a trusted proxy —
+    anything left of that was written by the client and could be anything.
+    """
+    peer = connection.client.host if connection.client else "unknown"
+    networks = _networks(tuple(get_settings().trusted_proxies))
+    if not networks or not _is_trusted(peer, networks):
+        return peer
+    hops = [
+        hop.strip()
+        for header in connection.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, networks):
+            return hop
+    return hops[0] if hops else peer
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
-    store: SessionStore = Depends(get_session_store),
-    claude=Depends(get_claude_client),
+    http_request: Request,
+    services: TurnServices = Depends(get_turn_services),
+    deduplicator: TurnDeduplicator = Depends(get_turn_deduplicator),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    settings = get_settings()
+    client = client_id(http_request)
+    key = idempotency_key or request.client_message_id
+    if not key:
+        return ModelResponse(await _run_turn(request, services, client))
 
+    try:
+        response = await deduplicator.run(
+            # Per client: first turns share no session id, and keys are client-chosen
+            scope=f"{client}:{request.session_id or ''}",
+            key=key,
+            message=request.message,
+            fn=lambda: _run_turn(request, services, client),
+        )
+    except IdempotencyKeyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return ModelResponse(response)
+
+
+async def _run_turn(request: ChatRequest, services: TurnServices, client: str) -> ChatResponse:
+    try:
+        services.admission.check_rate(client)
+    except AdmissionRejected as exc:
+        raise _too_many_requests(exc)
+
+    store, extractions = services.store, services.extractions
     if request.session_id:
-        session = await store.get(request.session_id)
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-    else:
-        session = Session()
+        # Turns on one session are serialised, and each waits for the previous
+        # turn's background extraction so stage changes apply in order.
+        async with extractions.lock(request.session_id):
+            await extractions.wait(request.session_id)
+            session = await store.get(request.session_id)
+            if not session:
+                raise HTTPException(status_code=404, detail="Session not found")
+            if session.is_archived and services.archiver is not None:
+                services.archiver.rehydrate(session)
+            return await _process_turn(session, request, services)
+
+    session = Session()
+    try:
         await store.save(session)
+    except StoreBusyError as exc:
+        raise _turn_error(session, exc)
+    async with extractions.lock(session.session_id):
+        return await _process_turn(session, request, services)
 
-    state_machine = PlanningStateMachine(
-        claude_client=claude,
-        model=settings.claude_model,
-        max_tokens=settings.claude_max_tokens,
+
+def _too_many_requests(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"{exc}. Please retry shortly.",
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
     )
+
+
+async def _process_turn(
+    session: Session,
+    request: ChatRequest,
+    services: TurnServices,
+) -> ChatResponse:
+    settings = get_settings()
+    store, extractions = services.store, services.extractions
+    tag_session(session.session_id)
+
+    state_machine = services.build_state_machine()
+    defer = settings.background_extraction and not session.is_complete
     try:
         reply, updated_session = await state_machine.process_message(
             session=session,
             user_message=request.message,
+            defer_extraction=defer,
         )
-    except APIStatusError as exc:
+        await store.save(updated_session)
+    except Exception as exc:
+        error = _turn_error(session, exc)
+        if error is None:
+            raise
+        raise error
+
+    if defer:
+        async def _extract_in_background() -> None:
+            await state_machine.run_deferred_extraction(updated_session)
+            await store.save(updated_session)
+
+        extractions.schedule(updated_session.session_id, _extract_in_background)
+
+    return _chat_response(updated_session, reply, extraction_pending=defer)
+
+
+def _chat_response(session: Session, reply: str, extraction_pending: bool = False) -> ChatResponse:
+    # Every field comes from an already-validated Session, so skip validation
+    return ChatResponse.model_construct(
+        session_id=session.session_id,
+        reply=reply,
+        current_stage=session.current_stage,
+        stage_label=STAGE_LABELS.get(session.current_stage.value, ""),
+        is_complete=session.is_complete,
+        progress_percent=_progress(session.current_stage.value),
+        extraction_pending=extraction_pending,
+    )
+
+
+def _turn_error(session: Session, exc: Exception) -> Optional[HTTPException]:
+    """Map a failed turn to the HTTP error the client sees; None for unexpected errors."""
+    if isinstance(exc, AdmissionRejected):
+        logger.warning(f"Shed turn for session {session.session_id}: {exc}")
+        return _too_many_requests(exc)
+    if isinstance(exc, ContextOverflowError):
+        logger.warning(f"Rejected turn for session {session.session_id}: {exc}")
+        return HTTPException(
+            status_code=413,
+            detail="This conversation is too long to continue. Please start a new session.",
+        )
+    if isinstance(exc, CircuitOpenError):
+        logger.warning(f"Rejected turn while upstream circuit is open: {exc}")
+        return HTTPException(
+            status_code=503,
+            detail="The AI service is temporarily degraded. Please retry shortly.",
+            headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        )
+    if isinstance(exc, StoreBusyError):
+        logger.warning(f"Rejected turn for session {session.session_id}: {exc}")
+        return HTTPException(
+            status_code=503,
+            detail="The service is busy saving sessions. Please retry shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+    # The SDK is loaded lazily (see utils.startup); by now a client exists anyway
+    from anthropic import APIStatusError, APIConnectionError
+
+    if isinstance(exc, APIStatusError):
         logger.error(f"Anthropic API error: {exc.status_code} {exc.message}")
         if exc.status_code == 400 and "credit" in str(exc.message).lower():
-            raise HTTPException(
+            return HTTPException(
                 status_code=503,
                 detail=(
                     "The AI service is unavailable: insufficient API credits. "
                     "Please add credits at console.anthropic.com."
                 ),
             )
-        raise HTTPException(status_code=502, detail=f"AI service error: {exc.message}")
-    except APIConnectionError as exc:
+        return HTTPException(status_code=502, detail=f"AI service error: {exc.message}")
+    if isinstance(exc, APIConnectionError):
         logger.error(f"Anthropic connection error: {exc}")
-        raise HTTPException(status_code=503, detail="Could not reach the AI service. Please retry.")
+        return HTTPException(status_code=503, detail="Could not reach the AI service. Please retry.")
+    if isinstance(exc, StreamInterrupted):
+        logger.error(f"Reply stream interrupted for session {session.session_id}: {exc}")
+        return HTTPException(status_code=502, detail="The AI reply was interrupted. Please retry.")
+    return None
 
-    await store.save(updated_session)
 
-    return ChatResponse(
-        session_id=updated_session.session_id,
-        reply=reply,
-        current_stage=updated_session.current_stage,
-        stage_label=STAGE_LABELS.get(updated_session.current_stage.value, ""),
-        is_complete=updated_session.is_complete,
-        progress_percent=_progress(updated_session.current_stage.value),
-    )
+# ─────────────────────────────────────────────────────────────────
+# WebSocket transport
+#
+# client → {"type": "message", "message": "..."} | {"type": "ping"} | {"type": "pong"}
+# server → {"type": "session", ...}        on connect
+#          {"type": "reply_delta", "text"} while the reply streams
+#          {"type": "contradiction", ...} / {"type": "stage_changed", ...}
+#          {"type": "reply", ...ChatResponse} when the turn is done
+#          {"type": "error", "status", "detail"} / {"type": "ping"} / {"type": "pong"}
+# ─────────────────────────────────────────────────────────────────
+class SlowConsumer(Exception):
+    """The client stopped draining its outbound queue."""
+
+
+class _Outbox:
+    """
+    Bounded outbound queue drained by one sender task. A full queue blocks the
+    producer (and with it the upstream reply stream) for up to `timeout` seconds,
+    after which the client is treated as stuck and the connection is closed.
+    """
+
+    def __init__(self, websocket: WebSocket, max_size: int, timeout: float):
+        self.websocket = websocket
+        self.timeout = timeout
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_size)
+
+    async def put(self, event: Dict[str, Any]) -> None:
+        try:
+            await asyncio.wait_for(self._queue.put(event), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise SlowConsumer(f"Outbound queue full for {self.timeout}s")
+
+    async def run(self) -> None:
+        while True:
+            event = await self._queue.get()
+            await asyncio.wait_for(self.websocket.send_json(event), timeout=self.timeout)
+            self._queue.task_done()
+
+    async def flush(self) -> None:
+        await asyncio.wait_for(self._queue.join(), timeout=self.timeout)
+
+
+def _session_event(session: Session) -> Dict[str, Any]:
+    return {
+        "type": "session",
+        "session_id": session.session_id,
+        "current_stage": session.current_stage.value,
+        "stage_label": STAGE_LABELS.get(session.current_stage.value, ""),
+        "is_complete": session.is_complete,
+        "progress_percent": _progress(session.current_stage.value),
+    }
+
+
+def _error_event(error: HTTPException) -> Dict[str, Any]:
+    event = {"type": "error", "status": error.status_code, "detail": error.detail}
+    if error.headers and "Retry-After" in error.headers:
+        event["retry_after"] = int(error.headers["Retry-After"])
+    return event
+
+
+@router.websocket("/ws/chat")
+async def chat_ws(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    services: TurnServices = Depends(get_turn_services),
+):
+    """
+    Chat over one long-lived connection bound to a session. The Session stays live
+    in memory between turns (reloaded only if another writer saved it meanwhile),
+    the reply streams as it is generated, and stage changes and contradictions are
+    pushed as events. Extraction always runs inline here: its outcome is pushed
+    as soon as it is known rather than deferred to the next turn.
+    """
+    settings = get_settings()
+    await websocket.accept()
+    outbox = _Outbox(websocket, settings.ws_send_queue_size, settings.ws_send_timeout_seconds)
+    sender = asyncio.create_task(outbox.run())
+    try:
+        if session_id:
+            session = await services.store.get(session_id)
+            if session is None:
+                await outbox.put(_error_event(HTTPException(status_code=404, detail="Session not found")))
+                await outbox.flush()
+                await websocket.close(code=4404)
+                return
+        else:
+            session = Session()
+            try:
+                await services.store.save(session)
+            except StoreBusyError as exc:
+                await outbox.put(_error_event(_turn_error(session, exc)))
+                await outbox.flush()
+                await websocket.close(code=1013)  # try again later
+                return
+        await outbox.put(_session_event(session))
+        await _serve_ws(websocket, session, services, outbox, client_id(websocket))
+    except WebSocketDisconnect:
+        pass
+    except SlowConsumer as exc:
+        logger.warning(f"Closing WebSocket for slow client: {exc}")
+        await websocket.close(code=1008)
+    finally:
+        sender.cancel()
+
+
+async def _serve_ws(
+    websocket: WebSocket,
+    session: Session,
+    services: TurnServices,
+    outbox: _Outbox,
+    client: str,
+) -> None:
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    tag_session(session.session_id)
+    revision = await services.store.revision(session.session_id)
+    last_seen = loop.time()
+
+    while True:
+        try:
+            frame = await asyncio.wait_for(websocket.receive_json(), timeout=settings.ws_heartbeat_seconds)
+        except asyncio.TimeoutError:
+            if loop.time() - last_seen > settings.ws_idle_timeout_seconds:
+                await outbox.flush()
+                await websocket.close(code=1000, reason="Idle timeout")
+                return
+            await outbox.put({"type": "ping"})
+            continue
+        except ValueError:
+            await outbox.put(_error_event(HTTPException(status_code=400, detail="Frames must be JSON")))
+            continue
+        last_seen = loop.time()
+
+        kind = frame.get("type") if isinstance(frame, dict) else None
+        if kind == "pong":
+            continue
+        if kind == "ping":
+            await outbox.put({"type": "pong"})
+            continue
+        message = frame.get("message") if kind == "message" else None
+        if not isinstance(message, str) or not message.strip():
+            await outbox.put(_error_event(HTTPException(
+                status_code=400, detail='Expected {"type": "message", "message": "..."}',
+            )))
+            continue
+
+        try:
+            services.admission.check_rate(client)
+        except AdmissionRejected as exc:
+            await outbox.put(_error_event(_too_many_requests(exc)))
+            continue
+
+        session, revision = await _ws_turn(session, revision, message, services, outbox)
+        if session is None:
+            await outbox.flush()
+            await websocket.close(code=4404)
+            return
+
+
+async def _ws_turn(
+    session: Session,
+    revision: Optional[int],
+    message: str,
+    services: TurnServices,
+    outbox: _Outbox,
+):
+    """Run one turn on the live session; returns (session, revision), session None if deleted."""
+    store, extractions = services.store, services.extractions
+    async with extractions.lock(session.session_id):
+        await extractions.wait(session.session_id)
+        current = await store.revision(session.session_id)
+        if current is None or current != revision:
+            # Saved by someone else (an HTTP turn, archival) since our last turn
+            session = await store.get(session.session_id)
+            if session is None:
+                await outbox.put(_error_event(HTTPException(status_code=404, detail="Session not found")))
+                return None, None
+        if session.is_archived and services.archiver is not None:
+            services.archiver.rehydrate(session)
+
+        events = []
+        state_machine = services.build_state_machine(on_event=events.append)
+
+        async def on_text(text: str) -> None:
+            await outbox.put({"type": "reply_delta", "text": text})
+
+        try:
+            reply, session = await state_machine.process_message(
+                session=session, user_message=message, on_reply_text=on_text,
+            )
+        except Exception as exc:
+            error = _turn_error(session, exc)
+            if error is None:
+                raise
+            await outbox.put(_error_event(error))
+            # The failed turn may have partly mutated the live copy; drop it
+            return await store.get(session.session_id), None
+
+        for event in events:
+            await outbox.put(event)
+        await outbox.put({"type": "reply", **_chat_response(session, reply).model_dump(mode="json")})
+        # The reply is already on its way; persisting doesn't hold it up
+        try:
+            await store.save(session)
+        except StoreBusyError as exc:
+            await outbox.put(_error_event(_turn_error(session, exc)))
+            return await store.get(session.session_id), None
+        return session, await store.revision(session.session_id)
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ...agent.stage_handlers import extraction_schema
+from ...storage.base import SessionStore
+from ...storage.sharding import ShardedSessionStore
+from ...storage.write_behind import WriteBehindSessionStore
+from ...utils.idempotency import TurnDeduplicator
+from ...utils.loop_monitor import LoopMonitor
+from ...utils.memory import TracemallocTracker, rss_bytes
+from ...utils.static_assets import get_static_assets
+from ...dependencies import (
+    get_loop_monitor, get_session_store, get_tracemalloc_tracker, get_turn_deduplicator,
+    require_debug_token,
+)
+
+
+router = APIRouter(dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/memory")
+async def memory_report(
+    top: int = Query(10, ge=1, le=100),
+    store: SessionStore = Depends(get_session_store),
+    deduplicator: TurnDeduplicator = Depends(get_turn_deduplicator),
+    tracker: TracemallocTracker = Depends(get_tracemalloc_tracker),
+):
+    """Approximate memory held by the session store and in-process caches."""
+    caches = {
+        "turn_deduplicator": deduplicator.memory_usage(),
+        "extraction_schemas": {"entries": extraction_schema.cache_info().currsize},
+    }
+    if get_static_assets.cache_info().currsize:
+        assets = get_static_assets()
+        caches["static_assets"] = {
+            "entries": len(assets.assets) + 1,
+            "bytes": sum(
+                len(body) for asset in [assets.shell, *assets.assets.values()] for body in asset.variants.values()
+            ),
+        }
+    return {
+        "rss_bytes": rss_bytes(),
+        "session_store": await store.memory_usage(top=top),
+        "caches": caches,
+        "tracemalloc": {"tracing": tracker.tracing, "snapshots": tracker.snapshot_ids()},
+    }
+
+
+# ── tracemalloc ──────────────────────────────────────────────────
+@router.post("/memory/snapshots")
+async def take_snapshot(
+    frames: int = Query(1, ge=1, le=50),
+    tracker: TracemallocTracker = Depends(get_tracemalloc_tracker),
+):
+    """Start tracing if needed and record a snapshot; diff two of them to see growth."""
+    return tracker.take(frames)
+
+
+@router.get("/memory/snapshots/{base}/diff/{current}")
+async def diff_snapshots(
+    base: int,
+    current: int,
+    top: int = Query(20, ge=1, le=200),
+    tracker: TracemallocTracker = Depends(get_tracemalloc_tracker),
+):
+    try:
+        return {"base": base, "current": current, "top": tracker.diff(base, current, top)}
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+
+
+@router.delete("/memory/snapshots", status_code=204)
+async def stop_tracing(tracker: TracemallocTracker = Depends(get_tracemalloc_tracker)):
+    """Drop the snapshots and stop tracing, removing its per-allocation overhead."""
+    tracker.stop()
+
+
+@router.get("/loop")
+async def loop_report(monitor: LoopMonitor = Depends(get_loop_monitor)):
+    """Event-loop lag percentiles and the most recent blocked-loop stack samples."""
+    return monitor.report()
+
+
+@router.get("/shards")
+async def shard_report(store: SessionStore = Depends(get_session_store)):
+    """Per-shard health, call latency and size when the session store is sharded."""
+    backend = store.backend if isinstance(store, WriteBehindSessionStore) else store
+    if not isinstance(backend, ShardedSessionStore):
+        raise HTTPException(status_code=404, detail="Session store is not sharded")
+    return backend.shard_stats()
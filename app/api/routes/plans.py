@@ -1,20 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import logging
+import math
+from typing import Any, Tuple
 
-from ...models.api_schemas import PlanResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from ...models.api_schemas import ContradictionItem, PlanImportResponse, PlanImportResult, PlanResponse
+from ...models.plan import ProjectPlan
+from ...models.session import Session
 from ...agent.plan_compiler import PlanCompiler
+from ...agent.admission import AdmissionController, AdmissionRejected
+from ...agent.plan_import import ImportResult, PlanImporter, TooManyPlans
 from ...utils.markdown_renderer import MarkdownRenderer
+from ...utils.responses import ModelResponse
+from ...utils.single_flight import SingleFlight
 from ...storage.base import SessionStore
-from ...dependencies import get_session_store
+from ...dependencies import get_admission_controller, get_plan_importer, get_session_store, get_plan_flight
+from ...config import get_settings
+from .chat import client_id
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def _compile_and_render(session: Session) -> Tuple[ProjectPlan, str]:
+    plan = PlanCompiler().compile(session)
+    return plan, MarkdownRenderer().render(plan)
+
+
+def _task_count(session: Session) -> int:
+    tasks = session.stage_data.tasks_and_subtasks
+    return len(tasks.tasks) if tasks else 0
+
 
 @router.get("/session/{session_id}/plan", response_model=PlanResponse)
 async def get_plan(
     session_id: str,
     store: SessionStore = Depends(get_session_store),
+    flight: SingleFlight = Depends(get_plan_flight),
 ):
-    session = await store.get(session_id)
+    # Concurrent requests for the same session share one fetch…
+    session = await flight.do(("session", session_id), lambda: store.get(session_id))
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     if not session.is_complete:
@@ -27,14 +57,115 @@ async def get_plan(
             ),
         )
 
-    compiler = PlanCompiler()
-    plan = compiler.compile(session)
+    if session.compiled_plan is not None:
+        # Archived sessions carry the plan compiled at archival time
+        return ModelResponse(PlanResponse.model_construct(
+            session_id=session_id,
+            plan_json=session.compiled_plan,
+            plan_markdown=session.compiled_plan_markdown or "",
+        ))
+
+    # …and one compile + render per session version. stage_data only changes on a
+    # stage advance, which bumps updated_at, so that identifies the plan's content.
+    async def build() -> Tuple[ProjectPlan, str]:
+        if _task_count(session) >= get_settings().plan_offload_min_tasks:
+            # Large plans are CPU-heavy; keep the event loop free for other requests
+            return await asyncio.to_thread(_compile_and_render, session)
+        return _compile_and_render(session)
 
-    renderer = MarkdownRenderer()
-    markdown = renderer.render(plan)
+    version = session.updated_at.isoformat()
+    plan, markdown = await flight.do(("plan", session_id, version), build)
 
-    return PlanResponse(
+    # The compiled ProjectPlan goes straight into the response and is serialized
+    # once; dumping it to a dict first would have it walked twice more
+    return ModelResponse(PlanResponse.model_construct(
         session_id=session_id,
-        plan_json=plan.model_dump(),
+        plan_json=plan,
         plan_markdown=markdown,
+    ))
+
+
+@router.post("/plans/import", response_model=PlanImportResponse)
+async def import_plans(
+    request: Request,
+    importer: PlanImporter = Depends(get_plan_importer),
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """
+    Import finished plans as completed sessions, without a conversation. Send one plan
+    or an array of plans as `application/json`, or any number as NDJSON
+    (`application/x-ndjson`, one plan per line), which is parsed as it streams in.
+    A plan has one key per stage (`define_outcome` … `risk_and_governance`) plus an
+    optional `reference`. Each result has the new session's id (its plan is at
+    `/session/{session_id}/plan`) and any contradictions found, or the error.
+    Imports are rate-limited per client (separately from chat turns) and capped at
+    `plan_import_max_plans` plans per request: a JSON array over the cap is refused
+    with 413, an NDJSON stream is imported up to the cap and its last result is an
+    error saying where it stopped.
+    """
+    try:
+        admission.check_rate(f"plans-import:{client_id(request)}")
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{exc}. Please retry shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        results = importer.import_ndjson(request.stream())
+    elif content_type == "application/json":
+        payload = await _read_json(request, get_settings().plan_import_max_json_bytes)
+        results = importer.import_many(payload if isinstance(payload, list) else [payload])
+    else:
+        raise HTTPException(
+            status_code=415, detail="Send application/json or application/x-ndjson",
+        )
+
+    items, imported = [], 0
+    try:
+        async for result in results:
+            imported += result.error is None
+            items.append(_result_item(result))
+    except TooManyPlans as exc:
+        # Raised before the first plan, so nothing was saved
+        raise HTTPException(status_code=413, detail=str(exc))
+    logger.info(f"Imported {imported} of {len(items)} plan(s)")
+    return ModelResponse(PlanImportResponse.model_construct(
+        imported=imported,
+        failed=len(items) - imported,
+        results=items,
+    ))
+
+
+def _result_item(result: ImportResult) -> PlanImportResult:
+    return PlanImportResult.model_construct(
+        index=result.index,
+        reference=result.reference,
+        session_id=result.session_id,
+        contradictions=[
+            ContradictionItem.model_construct(
+                description=c.description, clarification_question=c.clarification_question,
+            )
+            for c in result.contradictions
+        ],
+        error=result.error,
     )
+
+
+async def _read_json(request: Request, limit: int) -> Any:
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"JSON body exceeds {limit} bytes; send large batches as NDJSON",
+            )
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(payload, (dict, list)):
+        raise HTTPException(status_code=422, detail="Expected a plan object or an array of plans")
+    return payload
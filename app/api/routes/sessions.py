@@ -1,27 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
 
-from ...models.api_schemas import SessionSummary
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ...models.api_schemas import (
+    MessageItem, MessageListResponse, SessionListItem, SessionListResponse, SessionSummary,
+)
+from ...models.session import PlanningStage
 from ...storage.base import SessionStore
-from ...dependencies import get_session_store
+from ...storage.index import SessionQuery
+from ...storage.projections import MessagePage
+from ...agent.archival import SessionArchiver
+from ...agent.background import BackgroundExtractionRunner
+from ...dependencies import (
+    get_extraction_runner, get_session_archiver, get_session_store, require_debug_token,
+)
+from ...utils.responses import ModelResponse
 
 router = APIRouter()
 
 
+# Lists every session id, and an id is all it takes to read a session: operators only
+@router.get("/sessions", response_model=SessionListResponse, dependencies=[Depends(require_debug_token)])
+async def list_sessions(
+    stage: Optional[PlanningStage] = None,
+    is_complete: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    project_name: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    store: SessionStore = Depends(get_session_store),
+):
+    query = SessionQuery(
+        current_stage=stage,
+        is_complete=is_complete,
+        created_after=_naive_utc(created_after),
+        created_before=_naive_utc(created_before),
+        updated_after=_naive_utc(updated_after),
+        updated_before=_naive_utc(updated_before),
+        project_name=project_name,
+    )
+    try:
+        page = await store.list_sessions(query, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Built from the store's own records: serialize directly, without re-validating
+    return ModelResponse(SessionListResponse.model_construct(
+        sessions=[
+            SessionListItem.model_construct(
+                session_id=r.session_id,
+                current_stage=r.current_stage,
+                is_complete=r.is_complete,
+                created_at=r.created_at.isoformat(),
+                updated_at=r.updated_at.isoformat(),
+                project_name=r.project_name,
+            )
+            for r in page.sessions
+        ],
+        total=page.total,
+        next_cursor=page.next_cursor,
+    ))
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Session timestamps are naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 @router.get("/session/{session_id}", response_model=SessionSummary)
 async def get_session(
     session_id: str,
     store: SessionStore = Depends(get_session_store),
+    extractions: BackgroundExtractionRunner = Depends(get_extraction_runner),
 ):
-    session = await store.get(session_id)
-    if not session:
+    # Header only: the transcript is never decoded for a summary
+    header = await store.get_header(session_id)
+    if not header:
         raise HTTPException(status_code=404, detail="Session not found")
-    return SessionSummary(
-        session_id=session.session_id,
-        current_stage=session.current_stage,
-        is_complete=session.is_complete,
-        created_at=session.created_at.isoformat(),
-        updated_at=session.updated_at.isoformat(),
-    )
+    return ModelResponse(SessionSummary.model_construct(
+        session_id=header.session_id,
+        current_stage=header.current_stage,
+        is_complete=header.is_complete,
+        created_at=header.created_at.isoformat(),
+        updated_at=header.updated_at.isoformat(),
+        extraction_pending=extractions.is_pending(session_id),
+        pending_notice=header.pending_notice,
+    ))
+
+
+@router.get("/session/{session_id}/messages", response_model=MessageListResponse)
+async def list_messages(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    store: SessionStore = Depends(get_session_store),
+    archiver: SessionArchiver = Depends(get_session_archiver),
+):
+    try:
+        header = await store.get_header(session_id)
+        if not header:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if header.transcript_ref:
+            # Archived: page straight out of the on-disk archive without rehydrating
+            view = await asyncio.to_thread(archiver.transcript, session_id, header.transcript_ref)
+            page = MessagePage.from_view(view, cursor, limit)
+        else:
+            page = await store.get_messages(session_id, cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return ModelResponse(MessageListResponse.model_construct(
+        session_id=session_id,
+        messages=[
+            MessageItem.model_construct(
+                role=m.role,
+                content=m.content,
+                timestamp=m.timestamp.isoformat(),
+                stage=m.stage,
+            )
+            for m in page.messages
+        ],
+        total=page.total,
+        next_cursor=page.next_cursor,
+    ))
 
 
 @router.delete("/session/{session_id}", status_code=204)
@@ -29,7 +137,6 @@ async def delete_session(
     session_id: str,
     store: SessionStore = Depends(get_session_store),
 ):
-    session = await store.get(session_id)
-    if not session:
+    if not await store.exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     await store.delete(session_id)
@@ -0,0 +1,143 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ...models.api_schemas import (
+    CloneSessionRequest, SeededSessionResponse, SessionFromTemplateRequest, TemplateCreateRequest,
+    TemplateDetail, TemplateListResponse, TemplateSummary,
+)
+from ...agent.analytics import PlanningAnalytics
+from ...agent.templates import (
+    DEFAULT_CLONE_STAGES, SeedResult, SessionTemplate, TemplateRegistry, seed_session,
+)
+from ...storage.base import SessionStore
+from ...dependencies import get_analytics, get_session_store, get_template_registry
+from ...utils.responses import ModelResponse
+
+router = APIRouter()
+
+
+@router.post("/templates", response_model=TemplateDetail, status_code=201)
+async def create_template(
+    request: TemplateCreateRequest,
+    store: SessionStore = Depends(get_session_store),
+    registry: TemplateRegistry = Depends(get_template_registry),
+):
+    if (request.session_id is None) == (request.stage_data is None):
+        raise HTTPException(status_code=422, detail="Provide exactly one of session_id or stage_data")
+    try:
+        if request.session_id is not None:
+            session = await store.get(request.session_id)
+            if not session:
+                raise HTTPException(status_code=404, detail="Session not found")
+            template = SessionTemplate.from_session(
+                session, request.name, stages=request.stages, description=request.description,
+            )
+        else:
+            template = SessionTemplate.build(
+                request.name,
+                request.stage_data,
+                request.stages,
+                description=request.description,
+                project_type=request.project_type,
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    await registry.add(template)
+    return ModelResponse(_detail(template), status_code=201)
+
+
+@router.get("/templates", response_model=TemplateListResponse)
+async def list_templates(registry: TemplateRegistry = Depends(get_template_registry)):
+    return ModelResponse(TemplateListResponse.model_construct(
+        templates=[TemplateSummary.model_construct(**_summary_fields(t)) for t in registry.list()],
+    ))
+
+
+@router.get("/templates/{template_id}", response_model=TemplateDetail)
+async def get_template(template_id: str, registry: TemplateRegistry = Depends(get_template_registry)):
+    template = registry.get(template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return ModelResponse(_detail(template))
+
+
+@router.delete("/templates/{template_id}", status_code=204)
+async def delete_template(template_id: str, registry: TemplateRegistry = Depends(get_template_registry)):
+    if not await registry.delete(template_id):
+        raise HTTPException(status_code=404, detail="Template not found")
+
+
+@router.post("/sessions/from-template", response_model=SeededSessionResponse, status_code=201)
+async def create_session_from_template(
+    request: SessionFromTemplateRequest,
+    store: SessionStore = Depends(get_session_store),
+    registry: TemplateRegistry = Depends(get_template_registry),
+    analytics: PlanningAnalytics = Depends(get_analytics),
+):
+    template = registry.get(request.template_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    try:
+        result = seed_session(
+            template.stage_data,
+            stages=request.stages,
+            project_type=template.project_type,
+            source=f"template '{template.name}'",
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return await _save_seeded(result, store, analytics)
+
+
+@router.post("/session/{session_id}/clone", response_model=SeededSessionResponse, status_code=201)
+async def clone_session(
+    session_id: str,
+    request: Optional[CloneSessionRequest] = None,
+    store: SessionStore = Depends(get_session_store),
+    analytics: PlanningAnalytics = Depends(get_analytics),
+):
+    source = await store.get(session_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not source.is_complete:
+        raise HTTPException(status_code=422, detail="Only completed sessions can be cloned")
+    try:
+        result = seed_session(
+            source.stage_data,
+            stages=request.stages if request and request.stages is not None else DEFAULT_CLONE_STAGES,
+            project_type=source.project_type,
+            source="the earlier plan",
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return await _save_seeded(result, store, analytics)
+
+
+def _summary_fields(template: SessionTemplate) -> dict:
+    return {
+        "template_id": template.template_id,
+        "name": template.name,
+        "description": template.description,
+        "project_type": template.project_type,
+        "stages": template.stages,
+        "created_at": template.created_at.isoformat(),
+    }
+
+
+def _detail(template: SessionTemplate) -> TemplateDetail:
+    return TemplateDetail.model_construct(**_summary_fields(template), stage_data=template.stage_data)
+
+
+async def _save_seeded(result: SeedResult, store: SessionStore, analytics: PlanningAnalytics) -> ModelResponse:
+    session = result.session
+    await store.save(session)
+    # Seeded history means the first turn won't count the start
+    analytics.session_seeded(session)
+    return ModelResponse(SeededSessionResponse.model_construct(
+        session_id=session.session_id,
+        current_stage=session.current_stage,
+        is_complete=session.is_complete,
+        prefilled_stages=result.prefilled,
+        pending_notice=session.pending_notice,
+    ), status_code=201)
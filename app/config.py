@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Literal
+from typing import Dict, List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,10 +16,120 @@ class Settings(BaseSettings):
     anthropic_api_key: str
 
     session_store: Literal["memory"] = "memory"
+    # >1 splits sessions across that many memory stores on a consistent hash ring
+    session_shards: int = 1
+    session_shard_vnodes: int = 64
+    # Acknowledge saves from memory and flush them to the backing store in batches
+    session_write_behind: bool = False
+    write_behind_flush_interval_seconds: float = 0.5
+    write_behind_batch_size: int = 100
+    write_behind_max_pending: int = 1000
+    # How long a save waits for a full backlog to drain before the turn gets a 503
+    write_behind_backpressure_timeout_seconds: float = 5.0
+    # Compression for finished stages' messages in the session codec
+    session_compression: Literal["none", "zlib", "zstd"] = "zlib"
+
+    # Response compression (brotli needs the optional brotli/brotlicffi package)
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Background warm-up after startup: SDK import, schemas, upstream connection
+    warmup_enabled: bool = True
+    warmup_connect: bool = True
 
     claude_model: str = "claude-opus-4-6"
     claude_max_tokens: int = 2048
 
+    # Per-call routing: extraction is structured output and can use a smaller model
+    claude_fast_model: str = "claude-haiku-4-5"
+    claude_extraction_max_tokens: int = 2048
+    claude_fast_extraction_stages: List[str] = ["define_outcome", "strategic_constraints"]
+    # Overrides keyed "<call_type>[:<stage>]", e.g. {"extraction:tasks_and_subtasks": {"max_tokens": 4096}}
+    claude_model_routes: Dict[str, dict] = {}
+
+    # Local token accounting and history compaction
+    claude_context_window: int = 200_000
+    context_compaction_threshold: float = 0.8
+    claude_min_output_tokens: int = 512
+
+    # Rule-based extraction that skips the model call when confident enough
+    local_extraction_enabled: bool = True
+    local_extraction_min_confidence: float = 0.75
+
+    # Return the reply before extraction; the stage change lands on the next turn
+    background_extraction: bool = False
+    background_extraction_concurrency: int = 8
+
+    # Resilience around upstream Claude calls
+    claude_retry_max_attempts: int = 3
+    claude_retry_base_delay_seconds: float = 0.5
+    claude_retry_max_delay_seconds: float = 8.0
+    # An upstream Retry-After longer than this fails the call instead of waiting
+    claude_retry_budget_seconds: float = 30.0
+    claude_call_timeout_seconds: float = 60.0
+    claude_call_deadline_seconds: float = 120.0
+    claude_hedge_extraction: bool = False
+    claude_hedge_percentile: float = 95.0
+    claude_hedge_min_samples: int = 20
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_seconds: float = 30.0
+
+    # Plans with at least this many tasks are compiled in a worker thread
+    plan_offload_min_tasks: int = 50
+    # POST /plans/import: cap on a JSON body (NDJSON is streamed) and on one NDJSON line
+    plan_import_max_json_bytes: int = 8 * 2**20
+    plan_import_max_line_bytes: int = 2**20
+    # …and on the plans in one request (413 past it), which bounds the response too
+    plan_import_max_plans: int = 1000
+
+    # Admission control in front of upstream calls
+    admission_max_in_flight: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout_seconds: float = 10.0
+    admission_shed_retry_after_seconds: float = 2.0
+    rate_limit_per_client_per_minute: float = 30.0  # 0 disables
+    rate_limit_burst: int = 10
+    # Proxy addresses/CIDRs whose X-Forwarded-For is believed, e.g. ["10.0.0.0/8"];
+    # empty: clients are keyed by the peer address
+    trusted_proxies: List[str] = []
+
+    # WebSocket chat transport
+    ws_heartbeat_seconds: float = 20.0
+    ws_idle_timeout_seconds: float = 300.0
+    ws_send_queue_size: int = 256
+    ws_send_timeout_seconds: float = 10.0
+
+    idempotency_max_sessions: int = 10_000
+    idempotency_keys_per_session: int = 16
+
+    # Snapshots of the memory store, restored on startup
+    snapshot_enabled: bool = True
+    snapshot_path: str = "data/sessions.snap"
+    snapshot_interval_seconds: float = 60.0
+
+    # Funnel/usage analytics state, persisted periodically and on shutdown
+    analytics_path: str = "data/analytics.json"
+    analytics_persist_interval_seconds: float = 60.0
+
+    # Saved session templates (see agent.templates), rewritten on every change
+    templates_path: str = "data/templates.json"
+
+    # Archival of completed sessions: transcripts move to day files on disk
+    archive_enabled: bool = True
+    archive_dir: str = "data/archive"
+    archive_after_hours: float = 24.0
+    archive_interval_seconds: float = 900.0
+
+    # /debug/* endpoints answer only requests carrying this X-Debug-Token; empty disables them
+    debug_token: str = ""
+    # Event-loop lag probe and blocked-loop watchdog (stack samples at /debug/loop)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_seconds: float = 0.25
+    loop_block_threshold_ms: float = 100.0
+    # RSS and store size are logged (and set as gauges) this often; 0 disables
+    memory_sample_interval_seconds: float = 300.0
+
     @property
     def is_production(self) -> bool:
         return self.app_env == "production"
@@ -1,18 +1,201 @@
-from functools import lru_cache
-from anthropic import AsyncAnthropic
+import asyncio
+import hmac
+import importlib
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import Header, HTTPException
+
 from .config import get_settings
+from .agent.resilience import ResilientCaller
+from .agent.model_routing import ModelRouter
+from .agent.background import BackgroundExtractionRunner
+from .agent.token_budget import TokenBudget
+from .agent.admission import AdmissionController
+from .agent.archival import SessionArchiver
+from .agent.analytics import PlanningAnalytics
+from .agent.templates import TemplateRegistry
+from .agent.plan_import import PlanImporter
 from .storage.base import SessionStore
 from .storage.memory_store import InMemorySessionStore
+from .storage.codec import SessionCodec
+from .storage.sharding import ShardedSessionStore
+from .storage.write_behind import WriteBehindSessionStore
+from .utils.idempotency import TurnDeduplicator
+from .utils.loop_monitor import LoopMonitor
+from .utils.memory import TracemallocTracker
+from .utils.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+
+def _memory_store() -> InMemorySessionStore:
+    return InMemorySessionStore(codec=SessionCodec(compression=settings.session_compression))
+
+
 # Single shared store instance (module-level singleton)
-_session_store: SessionStore = InMemorySessionStore()
+_session_store: SessionStore
+if settings.session_shards > 1:
+    _session_store = ShardedSessionStore(
+        {f"shard-{i}": _memory_store() for i in range(settings.session_shards)},
+        vnodes=settings.session_shard_vnodes,
+    )
+else:
+    _session_store = _memory_store()
+if settings.session_write_behind:
+    # Turns are acknowledged before their save reaches the backing store
+    _session_store = WriteBehindSessionStore.from_settings(settings, _session_store)
+
+# Replay cache for retried chat turns — shared so duplicates join across requests
+_turn_deduplicator = TurnDeduplicator(
+    max_sessions=settings.idempotency_max_sessions,
+    max_keys_per_session=settings.idempotency_keys_per_session,
+)
+
+# Coalesces concurrent plan fetch/compile/render for the same session version
+_plan_flight = SingleFlight()
+
+# Shared so the circuit breaker and latency history span all requests
+_claude_caller = ResilientCaller.from_settings(settings)
+
+_model_router = ModelRouter.from_settings(settings)
+
+_token_budget = TokenBudget.from_settings(settings)
+
+# Global cap on in-flight upstream calls, shared by every request
+_admission_controller = AdmissionController.from_settings(settings)
+
+_extraction_runner = BackgroundExtractionRunner(
+    max_concurrency=settings.background_extraction_concurrency,
+)
+
+_analytics = PlanningAnalytics()
+
+# Loaded from disk by the app lifespan
+_template_registry = TemplateRegistry.from_settings(settings)
+
+_plan_importer = PlanImporter.from_settings(settings, _session_store)
+
+# Shares the per-session turn locks so archival never races a turn
+_session_archiver = SessionArchiver.from_settings(
+    settings, _session_store, lock=_extraction_runner.lock,
+)
+
+# tracemalloc snapshots taken through /debug/memory
+_tracemalloc_tracker = TracemallocTracker()
+
+# Started by the app lifespan; its blocked-loop samples are served at /debug/loop
+_loop_monitor = LoopMonitor.from_settings(settings)
+
+
+# Created on first use: importing the SDK is the largest part of a cold start
+_claude_client: Optional["AsyncAnthropic"] = None
+
+
+def get_claude_client() -> "AsyncAnthropic":
+    global _claude_client
+    if _claude_client is None:
+        from anthropic import AsyncAnthropic
+
+        # Shared so requests reuse its connection pool. Retries are owned by
+        # ResilientCaller; disable the SDK's own retry loop.
+        _claude_client = AsyncAnthropic(api_key=settings.anthropic_api_key, max_retries=0)
+    return _claude_client
+
+
+async def warm_up() -> None:
+    """
+    Pay the first-request costs in the background right after startup: import the
+    SDK (in a thread, so the loop keeps serving), build the extraction schemas and
+    open the upstream TLS connection; load the static UI bundle.
+    """
+    from .agent.stage_handlers import STAGE_HANDLER_CLASSES, extraction_schema
+    from .utils.startup import startup
+    from .utils.static_assets import get_static_assets
 
+    with startup.phase("warmup.import_sdk"):
+        await asyncio.to_thread(importlib.import_module, "anthropic")
+    with startup.phase("warmup.schemas"):
+        for handler_class in STAGE_HANDLER_CLASSES.values():
+            extraction_schema(handler_class.extraction_model)
+    with startup.phase("warmup.static_assets"):
+        await asyncio.to_thread(get_static_assets)
+    if settings.warmup_connect:
+        with startup.phase("warmup.connect"):
+            try:
+                # Cheapest authenticated call; leaves a pooled keep-alive connection
+                await asyncio.wait_for(get_claude_client().models.list(limit=1), timeout=10)
+            except Exception as exc:
+                logger.info(f"Upstream warm-up connection failed (will connect on demand): {exc}")
+    startup.report("Warm-up timing")
 
-def get_claude_client() -> AsyncAnthropic:
-    return AsyncAnthropic(api_key=settings.anthropic_api_key)
+
+def get_claude_caller() -> ResilientCaller:
+    return _claude_caller
+
+
+def get_model_router() -> ModelRouter:
+    return _model_router
+
+
+def get_token_budget() -> TokenBudget:
+    return _token_budget
+
+
+def get_admission_controller() -> AdmissionController:
+    return _admission_controller
+
+
+def get_extraction_runner() -> BackgroundExtractionRunner:
+    return _extraction_runner
+
+
+def get_analytics() -> PlanningAnalytics:
+    return _analytics
+
+
+def get_template_registry() -> TemplateRegistry:
+    return _template_registry
+
+
+def get_plan_importer() -> PlanImporter:
+    return _plan_importer
+
+
+def get_session_archiver() -> SessionArchiver:
+    return _session_archiver
 
 
 def get_session_store() -> SessionStore:
     return _session_store
+
+
+def get_turn_deduplicator() -> TurnDeduplicator:
+    return _turn_deduplicator
+
+
+def get_plan_flight() -> SingleFlight:
+    return _plan_flight
+
+
+def get_tracemalloc_tracker() -> TracemallocTracker:
+    return _tracemalloc_tracker
+
+
+def get_loop_monitor() -> LoopMonitor:
+    return _loop_monitor
+
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)) -> None:
+    """Guard for operator-only routes (/debug/*, the global session listing)."""
+    expected = settings.debug_token
+    if not expected:
+        # Disabled: indistinguishable from a route that doesn't exist
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_debug_token or not hmac.compare_digest(x_debug_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
@@ -1,29 +1,140 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+from typing import List, Tuple
+
+from .utils.startup import startup
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
+
+startup.mark("import.framework")
 
 from .config import get_settings
 from .utils.logging import configure_logging
+from .utils.metrics import metrics
+from .utils.memory import sample_memory
+from .utils.periodic import run_periodically
+from .utils.compression import CompressionMiddleware
+from .utils.loop_monitor import LoopMonitorMiddleware
+from .utils.static_assets import Asset, get_static_assets
+from .storage.base import SessionStore
+from .storage.memory_store import InMemorySessionStore
+from .storage.sharding import ShardedSessionStore
+from .storage.snapshot import SnapshotError
+from .storage.write_behind import WriteBehindSessionStore
 
 STATIC_DIR = Path(__file__).parent / "static"
 
 settings = get_settings()
+startup.mark("import.settings")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup.mark("server.boot")
     configure_logging(settings.log_level)
     logging.getLogger(__name__).info(
         f"Starting Project Planning Agent | env={settings.app_env} "
         f"| store={settings.session_store}"
     )
+    from .dependencies import (
+        get_analytics, get_extraction_runner, get_loop_monitor, get_session_archiver, get_session_store,
+        get_template_registry, warm_up,
+    )
+
+    store = get_session_store()
+    write_behind = isinstance(store, WriteBehindSessionStore)
+    # Snapshots cover the memory stores themselves, under any write-behind layer
+    backend = store.backend if write_behind else store
+    snapshot_targets = _snapshot_targets(backend) if settings.snapshot_enabled else []
+    snapshots = bool(snapshot_targets)
+    for memory_store, path in snapshot_targets:
+        _restore_snapshot(memory_store, path)
+    if snapshots and isinstance(backend, ShardedSessionStore):
+        # Sessions restored onto a shard the ring no longer assigns them to move in the background
+        backend.rebalance()
+    startup.mark("lifespan.restore_snapshot")
+
+    funnel = get_analytics()
+    funnel.load(settings.analytics_path)
+    startup.mark("lifespan.load_analytics")
+    get_template_registry().load()
+
+    archiver = get_session_archiver()
+    tasks = [run_periodically(
+        settings.analytics_persist_interval_seconds,
+        lambda: funnel.save(settings.analytics_path),
+        "analytics-persist",
+    )]
+    if settings.archive_enabled:
+        tasks.append(run_periodically(settings.archive_interval_seconds, archiver.run_once, "session-archival"))
+    if snapshots:
+        async def snapshot() -> None:
+            if write_behind:
+                await store.flush()
+            for memory_store, path in snapshot_targets:
+                await memory_store.snapshot(path)
+
+        tasks.append(run_periodically(settings.snapshot_interval_seconds, snapshot, "session-snapshot"))
+    if settings.memory_sample_interval_seconds > 0:
+        tasks.append(run_periodically(
+            settings.memory_sample_interval_seconds, lambda: sample_memory(store), "memory-sampler",
+        ))
+    monitor = get_loop_monitor()
+    if settings.loop_monitor_enabled:
+        monitor.start()
+    if settings.warmup_enabled:
+        # Off the startup path: the server accepts requests while this runs
+        tasks.append(asyncio.create_task(warm_up(), name="warm-up"))
+    startup.mark("lifespan.start_tasks")
+    startup.report("Startup timing")
     yield
     logging.getLogger(__name__).info("Shutting down")
 
+    for task in tasks:
+        task.cancel()
+    # Let a periodic snapshot or save that is mid-write finish before the final ones
+    await asyncio.gather(*tasks, return_exceptions=True)
+    monitor.stop()
+    await get_extraction_runner().drain()
+    if write_behind:
+        # Every acknowledged save reaches the backend before the process exits
+        await store.close()
+    if isinstance(backend, ShardedSessionStore):
+        await backend.wait_for_migration()
+    for memory_store, path in snapshot_targets:
+        count = await memory_store.snapshot(path)
+        logging.getLogger(__name__).info(f"Snapshotted {count} session(s) to {path}")
+    await funnel.save(settings.analytics_path)
+    archiver.archive.close()
+
+
+def _snapshot_targets(store: SessionStore) -> List[Tuple[InMemorySessionStore, str]]:
+    """(memory store, snapshot path) pairs; each shard gets its own file."""
+    if isinstance(store, InMemorySessionStore):
+        return [(store, settings.snapshot_path)]
+    if isinstance(store, ShardedSessionStore):
+        path = Path(settings.snapshot_path)
+        return [
+            (shard, str(path.with_name(f"{path.stem}.{name}{path.suffix}")))
+            for name, shard in store.shards.items()
+            if isinstance(shard, InMemorySessionStore)
+        ]
+    return []
+
+
+def _restore_snapshot(store: InMemorySessionStore, path: str) -> None:
+    if not Path(path).exists():
+        return
+    try:
+        store.restore(path)
+    except (OSError, SnapshotError) as exc:
+        logging.getLogger(__name__).warning(f"Ignoring unreadable snapshot {path}: {exc}")
+
 
 app = FastAPI(
     title="Project Planning Agent",
@@ -41,6 +152,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Innermost, so its per-request record sits in the task that runs the route
+app.add_middleware(LoopMonitorMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
 
 
 @app.get("/health", tags=["Health"])
@@ -48,13 +167,35 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    return metrics.snapshot()
+
+
+def _asset_response(request: Request, asset: Asset, cache_control: str) -> Response:
+    encoding, body = asset.select(request.headers.get("accept-encoding", ""))
+    etag = asset.etag_for(encoding)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.content_type, headers=headers)
+
+
 @app.get("/", include_in_schema=False)
-async def serve_ui():
-    response = FileResponse(STATIC_DIR / "index.html")
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    return response
+async def serve_ui(request: Request):
+    # The shell is revalidated on every load (cheap 304s); the assets it references
+    # are fingerprinted, so they can be cached forever
+    return _asset_response(request, get_static_assets().shell, "no-cache")
+
+
+@app.get("/assets/{name}", include_in_schema=False)
+async def serve_asset(name: str, request: Request):
+    asset = get_static_assets().assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return _asset_response(request, asset, "public, max-age=31536000, immutable")
 
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -62,8 +203,12 @@ app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # Routes are registered after models/storage/agent are defined.
 # Import here to avoid circular imports at module load time.
-from .api.routes import chat, sessions, plans  # noqa: E402
+from .api.routes import chat, sessions, templates, plans, analytics, debug  # noqa: E402
 
 app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
 app.include_router(sessions.router, prefix="/api/v1", tags=["Sessions"])
+app.include_router(templates.router, prefix="/api/v1", tags=["Templates"])
 app.include_router(plans.router, prefix="/api/v1", tags=["Plans"])
+app.include_router(analytics.router, prefix="/api/v1", tags=["Analytics"])
+app.include_router(debug.router, prefix="/debug", tags=["Debug"], include_in_schema=False)
+startup.mark("import.app_and_routes")
@@ -1,11 +1,14 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel
-from .session import PlanningStage
+from .plan import ProjectPlan
+from .session import PlanningStage, ProjectType, StageDataSet
 
 
 class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     message: str
+    # Alternative to the Idempotency-Key header for clients that can't set headers
+    client_message_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -15,6 +18,8 @@ class ChatResponse(BaseModel):
     stage_label: str
     is_complete: bool
     progress_percent: int
+    # True when extraction runs in the background; its outcome arrives with the next turn
+    extraction_pending: bool = False
 
 
 class SessionSummary(BaseModel):
@@ -23,9 +28,116 @@ class SessionSummary(BaseModel):
     is_complete: bool
     created_at: str
     updated_at: str
+    extraction_pending: bool = False
+    pending_notice: Optional[str] = None
+
+
+class SessionListItem(BaseModel):
+    session_id: str
+    current_stage: PlanningStage
+    is_complete: bool
+    created_at: str
+    updated_at: str
+    project_name: Optional[str] = None
+
+
+class SessionListResponse(BaseModel):
+    sessions: List[SessionListItem]
+    # None when filters without an index (is_complete, updated_*, project_name) make
+    # counting every match a full scan
+    total: Optional[int] = None
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class MessageItem(BaseModel):
+    role: str
+    content: str
+    timestamp: str
+    stage: Optional[PlanningStage] = None
+
+
+class MessageListResponse(BaseModel):
+    session_id: str
+    messages: List[MessageItem]
+    total: int
+    # Pass back as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class PlanResponse(BaseModel):
     session_id: str
-    plan_json: dict
+    # A freshly compiled plan, or the JSON one cached on an archived session
+    plan_json: Union[ProjectPlan, Dict[str, Any]]
     plan_markdown: str
+
+
+class ContradictionItem(BaseModel):
+    description: str
+    clarification_question: str
+
+
+class PlanImportResult(BaseModel):
+    # Position of the plan in the request (array index or NDJSON line, blank lines skipped)
+    index: int
+    reference: Optional[str] = None
+    # Id of the completed session; its plan is at /session/{session_id}/plan
+    session_id: Optional[str] = None
+    contradictions: List[ContradictionItem] = []
+    error: Optional[str] = None
+
+
+class PlanImportResponse(BaseModel):
+    imported: int
+    failed: int
+    results: List[PlanImportResult]
+
+
+class TemplateCreateRequest(BaseModel):
+    name: str
+    description: Optional[str] = None
+    # Either copy `stages` (default: all committed ones) from an existing session...
+    session_id: Optional[str] = None
+    stages: Optional[List[PlanningStage]] = None
+    # ...or supply the stage data directly
+    stage_data: Optional[StageDataSet] = None
+    project_type: Optional[ProjectType] = None
+
+
+class TemplateSummary(BaseModel):
+    template_id: str
+    name: str
+    description: Optional[str] = None
+    project_type: Optional[ProjectType] = None
+    stages: List[PlanningStage]
+    created_at: str
+
+
+class TemplateDetail(TemplateSummary):
+    stage_data: StageDataSet
+
+
+class TemplateListResponse(BaseModel):
+    # The source session's id is never returned: templates are shared, sessions are not
+    templates: List[TemplateSummary]
+
+
+class SessionFromTemplateRequest(BaseModel):
+    template_id: str
+    # Default: every stage the template has
+    stages: Optional[List[PlanningStage]] = None
+
+
+class CloneSessionRequest(BaseModel):
+    # Default: strategic constraints and risk & governance
+    stages: Optional[List[PlanningStage]] = None
+
+
+class SeededSessionResponse(BaseModel):
+    session_id: str
+    current_stage: PlanningStage
+    is_complete: bool
+    prefilled_stages: List[PlanningStage]
+    # Clarification when a pre-filled stage conflicted with an earlier one; also
+    # delivered with the first chat turn
+    pending_notice: Optional[str] = None
@@ -1,9 +1,13 @@
 from enum import Enum
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Any, Dict, Iterator, Optional, List, Tuple, Type, Union
+from pydantic import BaseModel, Field, SerializerFunctionWrapHandler, model_serializer
 import uuid
 
+from .stage_data import (
+    OutcomeData, ConstraintsData, PhasesData, TasksData, RiskGovernanceData,
+)
+
 
 class PlanningStage(str, Enum):
     DEFINE_OUTCOME = "define_outcome"
@@ -29,10 +33,103 @@ class ProjectType(str, Enum):
     PROGRAM = "program"
 
 
+STAGE_DATA_MODELS: Dict[PlanningStage, Type[BaseModel]] = {
+    PlanningStage.DEFINE_OUTCOME: OutcomeData,
+    PlanningStage.STRATEGIC_CONSTRAINTS: ConstraintsData,
+    PlanningStage.PHASES_AND_MILESTONES: PhasesData,
+    PlanningStage.TASKS_AND_SUBTASKS: TasksData,
+    PlanningStage.RISK_AND_GOVERNANCE: RiskGovernanceData,
+}
+
+
+class StageDataSet(BaseModel):
+    """
+    Committed, validated data for each planning stage — one optional field per stage.
+
+    Data is validated once when it is committed (or when a stored session is loaded),
+    so consumers read ready-made models. Serialises to the same
+    `{stage_value: {...}}` dict shape that sessions were stored with before, and keeps
+    mapping-style access (`sd["define_outcome"]`, `in`, `.get`) for existing callers;
+    assigning a dict through `sd[stage] = {...}` validates it into the stage's model.
+    """
+
+    define_outcome: Optional[OutcomeData] = None
+    strategic_constraints: Optional[ConstraintsData] = None
+    phases_and_milestones: Optional[PhasesData] = None
+    tasks_and_subtasks: Optional[TasksData] = None
+    risk_and_governance: Optional[RiskGovernanceData] = None
+
+    @classmethod
+    def coerce(cls, value: Union["StageDataSet", dict, None]) -> "StageDataSet":
+        if isinstance(value, StageDataSet):
+            return value
+        return cls.model_validate(value or {})
+
+    @staticmethod
+    def _stage(key: Union[PlanningStage, str]) -> PlanningStage:
+        try:
+            stage = PlanningStage(key)
+        except ValueError:
+            raise KeyError(key)
+        if stage not in STAGE_DATA_MODELS:
+            raise KeyError(key)
+        return stage
+
+    def commit(self, stage: PlanningStage, data: BaseModel) -> None:
+        """Store an already-validated extraction result without re-validating it."""
+        setattr(self, self._stage(stage).value, data)
+
+    def __getitem__(self, key: Union[PlanningStage, str]) -> BaseModel:
+        value = getattr(self, self._stage(key).value)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Union[PlanningStage, str], value: Any) -> None:
+        stage = self._stage(key)
+        model = STAGE_DATA_MODELS[stage]
+        setattr(self, stage.value, value if isinstance(value, model) else model.model_validate(value))
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            return getattr(self, self._stage(key).value) is not None
+        except (KeyError, TypeError):
+            return False
+
+    def get(self, key: Union[PlanningStage, str], default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self) -> Iterator[Tuple[str, BaseModel]]:
+        for stage in STAGE_DATA_MODELS:
+            value = getattr(self, stage.value)
+            if value is not None:
+                yield stage.value, value
+
+    def keys(self) -> List[str]:
+        return [k for k, _ in self.items()]
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @model_serializer(mode="wrap")
+    def _drop_uncommitted(self, handler: SerializerFunctionWrapHandler) -> dict:
+        return {k: v for k, v in handler(self).items() if v is not None}
+
+
 class ConversationMessage(BaseModel):
     role: str
     content: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # Stage the message was exchanged in; None for sessions stored before it was tracked
+    stage: Optional[PlanningStage] = None
+    # Memoised local token estimate (see agent.token_budget)
+    token_count: Optional[int] = None
 
 
 class Session(BaseModel):
@@ -40,16 +137,46 @@ class Session(BaseModel):
     project_type: Optional[ProjectType] = None
     current_stage: PlanningStage = PlanningStage.DEFINE_OUTCOME
     messages: List[ConversationMessage] = Field(default_factory=list)
-    stage_data: dict = Field(default_factory=dict)
+    stage_data: StageDataSet = Field(default_factory=StageDataSet)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     is_complete: bool = False
+    # Stage transition / clarification produced by background extraction, shown next turn
+    pending_notice: Optional[str] = None
+
+    # Running token totals maintained by TokenBudget; messages[:token_count_cursor] are counted
+    token_count_cursor: int = 0
+    history_tokens: int = 0
+    stage_tokens: Dict[str, int] = Field(default_factory=dict)
+    # Actual input + output tokens reported by the API across all calls
+    tokens_used: int = 0
+    # Set once a completed session is archived: messages live in the transcript archive
+    # and the plan is cached here (see agent.archival)
+    transcript_ref: Optional[str] = None
+    compiled_plan: Optional[Dict[str, Any]] = None
+    compiled_plan_markdown: Optional[str] = None
+
+    @property
+    def is_archived(self) -> bool:
+        return self.transcript_ref is not None
 
     def get_claude_messages(self) -> List[dict]:
         return [{"role": m.role, "content": m.content} for m in self.messages]
 
+    def stage_user_text(self, stage: PlanningStage) -> str:
+        """User text for one stage, newest last. Untagged history falls back to the last message."""
+        tagged = [m.content for m in self.messages if m.role == "user" and m.stage == stage]
+        if tagged:
+            return "\n".join(tagged)
+        last_user = next((m for m in reversed(self.messages) if m.role == "user"), None)
+        return last_user.content if last_user else ""
+
     def advance_stage(self) -> None:
         idx = STAGE_ORDER.index(self.current_stage)
-        if idx < len(STAGE_ORDER) - 1:
-            self.current_stage = STAGE_ORDER[idx + 1]
+        # Stages already pre-filled from a template or clone (see agent.templates) are skipped
+        while idx < len(STAGE_ORDER) - 1:
+            idx += 1
+            if STAGE_ORDER[idx] not in self.stage_data:
+                break
+        self.current_stage = STAGE_ORDER[idx]
         self.updated_at = datetime.utcnow()
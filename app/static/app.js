@@ -0,0 +1,675 @@
+// ════════════════════════════════════════
+// STAGE CONFIG — with grouped field pills
+// ════════════════════════════════════════
+const STAGE_CONFIG = {
+  define_outcome: {
+    num: 1, hex: "#3b82f6",
+    title: "Define Outcome",
+    desc: "Tell us what you are building, who it is for, and what success looks like.",
+    // Groups: each group gets a colored pill header
+    groups: [
+      {
+        label: "Project Identity",
+        fields: [
+          { key:"project_name", label:"Project name", placeholder:"e.g. Koru App", type:"input" },
+        ]
+      },
+      {
+        label: "Audience & Purpose",
+        fields: [
+          { key:"audience", label:"Who is it for?",  placeholder:"e.g. adults managing workplace stress",      type:"input" },
+          { key:"purpose",  label:"Core purpose",    placeholder:"e.g. guided meditation and breathing tools", type:"input" },
+        ]
+      },
+      {
+        label: "Success Criteria",
+        fields: [
+          { key:"success_metric", label:"What does success look like?", placeholder:"e.g. 1,000 active users within 3 months of launch", type:"input" },
+        ]
+      },
+    ],
+    assemble: f => `Project name: ${f.project_name}. It is for: ${f.audience}. Core purpose: ${f.purpose}. Success means: ${f.success_metric}.`
+  },
+
+  strategic_constraints: {
+    num: 2, hex: "#8b5cf6",
+    title: "Strategic Constraints",
+    desc: "Share the practical limits that will shape the plan.",
+    groups: [
+      {
+        label: "Timeline",
+        fields: [
+          { key:"deadline", label:"Deadline", placeholder:"e.g. end of Q4 2026", type:"input" },
+        ]
+      },
+      {
+        label: "Resources",
+        fields: [
+          { key:"budget",    label:"Budget",            placeholder:"e.g. $50,000 or TBD",                       type:"input" },
+          { key:"team_size", label:"Team size & roles",  placeholder:"e.g. 3 engineers, 1 PM, 1 designer",       type:"input" },
+        ]
+      },
+      {
+        label: "Process",
+        fields: [
+          { key:"methodology", label:"Methodology", placeholder:"e.g. Agile, Waterfall, Hybrid, no preference", type:"input" },
+        ]
+      },
+    ],
+    assemble: f => `Deadline: ${f.deadline}. Budget: ${f.budget}. Team: ${f.team_size}. Methodology: ${f.methodology}.`
+  },
+
+  phases_and_milestones: {
+    num: 3, hex: "#06b6d4",
+    title: "Phases & Milestones",
+    desc: "Break the project into major phases and name the key deliverable for each.",
+    groups: [
+      {
+        label: "Phase Structure",
+        fields: [
+          { key:"phases",   label:"Major phases (comma-separated)", placeholder:"e.g. Discovery, Design, Build, Launch",  type:"input" },
+          { key:"timeline", label:"Overall timeline",               placeholder:"e.g. 6 months total, Jan–Jun 2026",      type:"input" },
+        ]
+      },
+      {
+        label: "Key Deliverables",
+        fields: [
+          { key:"milestone_1", label:"Deliverable for Phase 1", placeholder:"e.g. Approved requirements document", type:"input" },
+          { key:"milestone_2", label:"Deliverable for Phase 2", placeholder:"e.g. Signed-off design mockups",      type:"input" },
+        ]
+      },
+    ],
+    assemble: f => `Phases: ${f.phases}. Phase 1 deliverable: ${f.milestone_1}. Phase 2 deliverable: ${f.milestone_2}. Timeline: ${f.timeline}.`
+  },
+
+  tasks_and_subtasks: {
+    num: 4, hex: "#f59e0b",
+    title: "Tasks & Subtasks",
+    desc: "For each phase, list the work items, owners, and how long they take.",
+    groups: [
+      {
+        label: "Phase Focus",
+        fields: [
+          { key:"phase_focus", label:"Which phase are we breaking down?", placeholder:"e.g. Discovery", type:"input" },
+        ]
+      },
+      {
+        label: "Work Items",
+        fields: [
+          { key:"tasks", label:"Main tasks (one per line)", placeholder:"e.g.\nStakeholder interviews\nCompetitor analysis\nTechnical scoping", type:"textarea" },
+        ]
+      },
+      {
+        label: "Ownership & Duration",
+        fields: [
+          { key:"owners",    label:"Who owns each task?",   placeholder:"e.g. PM owns interviews, Engineer owns scoping",  type:"input" },
+          { key:"durations", label:"Estimated durations",   placeholder:"e.g. interviews: 3 days, scoping: 5 days",        type:"input" },
+        ]
+      },
+    ],
+    assemble: f => `Phase: ${f.phase_focus}. Tasks: ${f.tasks.replace(/\n/g,', ')}. Owners: ${f.owners}. Durations: ${f.durations}.`
+  },
+
+  risk_and_governance: {
+    num: 5, hex: "#ef4444",
+    title: "Risk & Governance",
+    desc: "Identify what could go wrong and how the project will be monitored.",
+    groups: [
+      {
+        label: "Key Risks",
+        fields: [
+          { key:"risks", label:"Risks (one per line)", placeholder:"e.g.\nKey engineer leaves\nScope creep\nThird-party delays", type:"textarea" },
+        ]
+      },
+      {
+        label: "Stakeholders",
+        fields: [
+          { key:"stakeholders", label:"Stakeholders", placeholder:"e.g. CEO, CTO, Head of Product", type:"input" },
+        ]
+      },
+      {
+        label: "Measurement & Cadence",
+        fields: [
+          { key:"kpis",           label:"Success KPIs",    placeholder:"e.g. 1,000 MAU, 4.5+ app store rating",          type:"input" },
+          { key:"review_cadence", label:"Review cadence",  placeholder:"e.g. weekly standup, monthly steering committee", type:"input" },
+        ]
+      },
+    ],
+    assemble: f => `Risks: ${f.risks.replace(/\n/g,'; ')}. Stakeholders: ${f.stakeholders}. KPIs: ${f.kpis}. Review cadence: ${f.review_cadence}.`
+  },
+
+  complete: { num:6, hex:"#10b981", title:"Complete", desc:"", groups:[], assemble:()=>"" }
+};
+
+// Flat fields array derived from groups (for backward-compat with submitStageForm)
+Object.values(STAGE_CONFIG).forEach(cfg => {
+  if (cfg.groups) {
+    cfg.fields = cfg.groups.flatMap(g => g.fields || []);
+  } else {
+    cfg.fields = cfg.fields || [];
+  }
+});
+
+const STAGE_ORDER = [
+  "define_outcome","strategic_constraints","phases_and_milestones",
+  "tasks_and_subtasks","risk_and_governance","complete"
+];
+
+const HINTS = {
+  define_outcome:        "Stage 1 — Fill in the form or type freely to describe your project and success goal.",
+  strategic_constraints: "Stage 2 — Share your deadline, budget, team size, and methodology.",
+  phases_and_milestones: "Stage 3 — Describe the major phases and key deliverable for each.",
+  tasks_and_subtasks:    "Stage 4 — For each phase, list tasks, owners, and durations.",
+  risk_and_governance:   "Stage 5 — Share key risks, stakeholders, KPIs, and review cadence.",
+  complete:              "Planning complete — view your structured project plan above."
+};
+
+// ════════════════════════════════════════
+// STATE
+// ════════════════════════════════════════
+let sessionId    = null;
+let planMarkdown = "";
+let currentStage = "define_outcome";
+
+const messagesEl     = document.getElementById("messages");
+const inputEl        = document.getElementById("user-input");
+const sendBtn        = document.getElementById("send-btn");
+const hintDot        = document.getElementById("hint-dot");
+const hintText       = document.getElementById("hint-text");
+const completeBanner = document.getElementById("complete-banner");
+
+// ════════════════════════════════════════
+// INPUT HANDLING
+// ════════════════════════════════════════
+inputEl.addEventListener("input", () => {
+  inputEl.style.height = "auto";
+  inputEl.style.height = Math.min(inputEl.scrollHeight, 130) + "px";
+});
+inputEl.addEventListener("keydown", e => {
+  if (e.key === "Enter" && !e.shiftKey) { e.preventDefault(); sendMessage(); }
+});
+
+// ════════════════════════════════════════
+// UTILITIES
+// ════════════════════════════════════════
+function esc(s) {
+  if (!s) return "";
+  return String(s).replace(/&/g,"&amp;").replace(/</g,"&lt;").replace(/>/g,"&gt;");
+}
+
+// Mix hex color with white to produce a lighter tint
+function lightenHex(hex, t = 0.88) {
+  const r = parseInt(hex.slice(1,3), 16);
+  const g = parseInt(hex.slice(3,5), 16);
+  const b = parseInt(hex.slice(5,7), 16);
+  return `rgb(${Math.round(r+(255-r)*t)},${Math.round(g+(255-g)*t)},${Math.round(b+(255-b)*t)})`;
+}
+
+// ════════════════════════════════════════
+// MARKDOWN → SAFE HTML
+// ════════════════════════════════════════
+function md(text) {
+  return text
+    .replace(/&/g,"&amp;").replace(/</g,"&lt;").replace(/>/g,"&gt;")
+    .replace(/\*\*(.*?)\*\*/g,"<strong>$1</strong>")
+    .replace(/_(.*?)_/g,"<em>$1</em>")
+    .replace(/\*(.*?)\*/g,"<em>$1</em>")
+    .replace(/^### (.+)$/gm,"<h3>$1</h3>")
+    .replace(/^## (.+)$/gm,"<h2>$1</h2>")
+    .replace(/^# (.+)$/gm,"<h1>$1</h1>")
+    .replace(/^---$/gm,"<hr>")
+    .replace(/^- (.+)$/gm,"<li>$1</li>")
+    .replace(/(<li>[\s\S]*?<\/li>)/g,"<ul>$1</ul>")
+    .replace(/\n{2,}/g,"<br><br>")
+    .replace(/\n/g,"<br>");
+}
+
+// ════════════════════════════════════════
+// STAGE INPUT CARD — grouped with pill labels
+// ════════════════════════════════════════
+function insertStageCard(stageKey) {
+  const cfg = STAGE_CONFIG[stageKey];
+  if (!cfg || !cfg.groups || !cfg.groups.length) return;
+
+  const cardId = "card-" + stageKey;
+  if (document.getElementById(cardId)) return;
+
+  const card = document.createElement("div");
+  card.className = "stage-card";
+  card.id = cardId;
+  card.style.setProperty("--card-hex", cfg.hex);
+
+  // Compute pill colors from stage hex
+  const pillBg     = lightenHex(cfg.hex, 0.88);
+  const pillBorder = cfg.hex;
+  const pillColor  = cfg.hex;
+
+  // Build grouped form HTML
+  let groupsHtml = "";
+  cfg.groups.forEach(g => {
+    let fieldsHtml = "";
+    g.fields.forEach(f => {
+      const inputHtml = f.type === "textarea"
+        ? `<textarea id="f_${stageKey}_${f.key}" placeholder="${esc(f.placeholder)}"></textarea>`
+        : `<input    id="f_${stageKey}_${f.key}" type="text" placeholder="${esc(f.placeholder)}" />`;
+      fieldsHtml += `
+        <div class="form-field">
+          <label for="f_${stageKey}_${f.key}">${esc(f.label)}</label>
+          ${inputHtml}
+        </div>`;
+    });
+
+    groupsHtml += `
+      <div class="field-group">
+        <span class="field-group-pill"
+              style="background:${pillBg}; border-color:${pillBorder}; color:${pillColor}">
+          ${esc(g.label)}
+        </span>
+        <div class="group-fields">${fieldsHtml}</div>
+      </div>`;
+  });
+
+  card.innerHTML = `
+    <div class="stage-card-header">
+      <span class="badge">Stage ${cfg.num}</span>
+      <span class="stage-title">${cfg.title}</span>
+    </div>
+    <div class="stage-card-body">
+      <p class="stage-desc">${cfg.desc}</p>
+      <div class="stage-form" id="form-${stageKey}">
+        ${groupsHtml}
+        <button class="stage-submit-btn" id="submit-${stageKey}"
+                onclick="submitStageForm('${stageKey}')">
+          Send to Agent →
+        </button>
+      </div>
+      <div class="form-submitted" id="submitted-${stageKey}">
+        ✓ Submitted — see the agent's response above
+      </div>
+    </div>`;
+
+  messagesEl.appendChild(card);
+  // offsetTop is relative to #messages (its offsetParent via position:relative)
+  // Wait 200ms so layout and animation are fully settled before measuring
+  setTimeout(() => {
+    const newCard = document.getElementById(cardId);
+    if (newCard) {
+      messagesEl.scrollTop = newCard.offsetTop - 16;
+    }
+  }, 200);
+}
+
+function submitStageForm(stageKey) {
+  const cfg = STAGE_CONFIG[stageKey];
+  const values = {};
+
+  cfg.fields.forEach(f => {
+    const el = document.getElementById(`f_${stageKey}_${f.key}`);
+    values[f.key] = (el ? el.value.trim() : "") || "(not specified)";
+  });
+
+  const message = cfg.assemble(values);
+
+  const form      = document.getElementById(`form-${stageKey}`);
+  const submitted = document.getElementById(`submitted-${stageKey}`);
+  if (form)      form.style.display      = "none";
+  if (submitted) submitted.style.display = "flex";
+
+  sendMessageText(message);
+}
+
+// ════════════════════════════════════════
+// BUBBLE + STAGE TRANSITION
+// ════════════════════════════════════════
+function addAgentTurn(text) {
+  const parts      = text.split("\n\n---\n");
+  const replyText  = parts[0].trim();
+  const dividerText = parts[1] ? parts[1].trim() : null;
+
+  appendBubble("agent", replyText);
+
+  if (dividerText) {
+    const nextStageKey = Object.keys(STAGE_CONFIG).find(k => {
+      const cfg = STAGE_CONFIG[k];
+      return cfg.title && dividerText.toLowerCase().includes(cfg.title.toLowerCase());
+    });
+    if (nextStageKey) insertStageCard(nextStageKey);
+  }
+}
+
+function appendBubble(role, text) {
+  const wrap = document.createElement("div");
+  wrap.className = `msg ${role}`;
+
+  const av = document.createElement("div");
+  av.className = "avatar";
+  av.textContent = role === "user" ? "You" : "AI";
+
+  const bub = document.createElement("div");
+  bub.className = "bubble";
+  bub.innerHTML = md(text);
+
+  wrap.appendChild(av);
+  wrap.appendChild(bub);
+  messagesEl.appendChild(wrap);
+  messagesEl.scrollTop = messagesEl.scrollHeight;
+}
+
+function showTyping() {
+  const wrap = document.createElement("div");
+  wrap.className = "msg agent typing";
+  wrap.id = "typing";
+
+  const av = document.createElement("div");
+  av.className = "avatar"; av.textContent = "AI";
+
+  const bub = document.createElement("div");
+  bub.className = "bubble";
+  bub.innerHTML = `<div class="dots"><span></span><span></span><span></span></div>`;
+
+  wrap.appendChild(av); wrap.appendChild(bub);
+  messagesEl.appendChild(wrap);
+  messagesEl.scrollTop = messagesEl.scrollHeight;
+}
+
+function removeTyping() {
+  const t = document.getElementById("typing");
+  if (t) t.remove();
+}
+
+// ════════════════════════════════════════
+// PROGRESS STEPPER — named steps with dots
+// ════════════════════════════════════════
+function updateProgress(stageValue) {
+  currentStage = stageValue;
+  const cfg = STAGE_CONFIG[stageValue] || STAGE_CONFIG.define_outcome;
+  const idx = STAGE_ORDER.indexOf(stageValue);
+
+  // Update global stage color CSS variable
+  document.documentElement.style.setProperty('--stage-color', cfg.hex);
+
+  // Update each step-item
+  const stepItems = document.querySelectorAll(".step-item");
+  stepItems.forEach((item, i) => {
+    const isDone   = i < idx;
+    const isActive = i === idx;
+    item.classList.toggle("done",   isDone);
+    item.classList.toggle("active", isActive);
+
+    // Show ✓ for completed steps, number for others
+    const dot = item.querySelector(".step-dot");
+    if (dot) dot.textContent = isDone ? "✓" : String(i + 1);
+  });
+
+  hintText.textContent = HINTS[stageValue] || "";
+}
+
+// ════════════════════════════════════════
+// SEND (two entry points)
+// ════════════════════════════════════════
+function sendMessage() {
+  const text = inputEl.value.trim();
+  if (!text) return;
+  inputEl.value = "";
+  inputEl.style.height = "auto";
+  sendMessageText(text);
+}
+
+async function sendMessageText(text) {
+  if (!text || sendBtn.disabled) return;
+
+  appendBubble("user", text);
+  sendBtn.disabled = true;
+  showTyping();
+
+  try {
+    // Without a WebSocket, fall back to one POST per turn. A socket that drops
+    // mid-turn is reported, not retried over HTTP, so the turn isn't sent twice.
+    const ws = await openSocket().catch(() => null);
+    const data = ws ? await sendOverSocket(ws, text) : await sendOverHttp(text);
+    removeTyping();
+    applyTurn(data);
+  } catch (err) {
+    removeTyping();
+    removeStreamBubble();
+    appendBubble("agent", err.status
+      ? `⚠️ ${err.detail || "Something went wrong. Please try again."}`
+      : "⚠️ Could not reach the server. Is it running?");
+    sendBtn.disabled = false;
+  }
+}
+
+function applyTurn(data) {
+  sessionId = data.session_id;
+  removeStreamBubble();
+
+  updateProgress(data.current_stage);
+  addAgentTurn(data.reply);
+
+  if (data.is_complete) {
+    completeBanner.style.display = "block";
+    inputEl.disabled = true;
+    inputEl.placeholder = "Planning complete — click 'View Project Plan' above.";
+  } else {
+    sendBtn.disabled = false;
+    inputEl.focus();
+  }
+}
+
+async function sendOverHttp(text) {
+  const body = { message: text };
+  if (sessionId) body.session_id = sessionId;
+
+  const res = await fetch("/api/v1/chat", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw { status: res.status, detail: err.detail };
+  }
+  return res.json();
+}
+
+// ════════════════════════════════════════
+// WEBSOCKET — one connection per session, reply streamed as it's written
+// ════════════════════════════════════════
+let socket = null;
+let socketReady = null;
+let pendingTurn = null;
+let streamBubble = null;
+let streamText = "";
+
+function openSocket() {
+  if (socketReady) return socketReady;
+  if (!("WebSocket" in window)) return Promise.reject(new Error("unsupported"));
+
+  const proto = location.protocol === "https:" ? "wss" : "ws";
+  const query = sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : "";
+  socketReady = new Promise((resolve, reject) => {
+    const ws = new WebSocket(`${proto}://${location.host}/api/v1/ws/chat${query}`);
+    ws.onmessage = (ev) => {
+      const event = JSON.parse(ev.data);
+      if (event.type === "session") { sessionId = event.session_id; socket = ws; resolve(ws); return; }
+      onSocketEvent(ws, event);
+    };
+    ws.onerror = () => reject(new Error("socket error"));
+    ws.onclose = () => {
+      socket = null; socketReady = null;
+      reject(new Error("socket closed"));
+      if (pendingTurn) { pendingTurn.reject(new Error("socket closed")); pendingTurn = null; }
+    };
+  });
+  return socketReady;
+}
+
+function onSocketEvent(ws, event) {
+  switch (event.type) {
+    case "ping":
+      ws.send(JSON.stringify({ type: "pong" }));
+      break;
+    case "reply_delta":
+      removeTyping();
+      if (!streamBubble) {
+        appendBubble("agent", "");
+        streamBubble = messagesEl.lastElementChild;
+        streamText = "";
+      }
+      streamText += event.text;
+      streamBubble.querySelector(".bubble").innerHTML = md(streamText);
+      messagesEl.scrollTop = messagesEl.scrollHeight;
+      break;
+    case "reply":
+      if (pendingTurn) { pendingTurn.resolve(event); pendingTurn = null; }
+      break;
+    case "error":
+      if (pendingTurn) { pendingTurn.reject({ status: event.status, detail: event.detail }); pendingTurn = null; }
+      break;
+  }
+}
+
+function sendOverSocket(ws, text) {
+  return new Promise((resolve, reject) => {
+    pendingTurn = { resolve, reject };
+    ws.send(JSON.stringify({ type: "message", message: text }));
+  });
+}
+
+function removeStreamBubble() {
+  if (streamBubble) streamBubble.remove();
+  streamBubble = null;
+  streamText = "";
+}
+
+// ════════════════════════════════════════
+// PLAN VIEW
+// ════════════════════════════════════════
+async function showPlan() {
+  if (!sessionId) return;
+  const res = await fetch(`/api/v1/session/${sessionId}/plan`);
+  if (!res.ok) { alert("Could not load plan."); return; }
+  const data = await res.json();
+  planMarkdown = data.plan_markdown;
+  renderPlan(data.plan_json);
+  document.getElementById("chat-view").style.display = "none";
+  document.getElementById("plan-view").style.display  = "flex";
+}
+
+function renderPlan(plan) {
+  const body = document.getElementById("plan-body");
+  let html = "";
+
+  html += `<h1>${esc(plan.project_name)}</h1>`;
+  html += `<div class="plan-meta">`;
+  if (plan.deadline)    html += `<span class="meta-chip">📅 ${esc(plan.deadline)}</span>`;
+  if (plan.budget)      html += `<span class="meta-chip">💰 ${esc(plan.budget)}</span>`;
+  if (plan.team_size)   html += `<span class="meta-chip">👥 ${plan.team_size} people</span>`;
+  if (plan.methodology) html += `<span class="meta-chip">⚙️ ${esc(plan.methodology)}</span>`;
+  html += `</div>`;
+  html += `<p style="color:var(--muted);font-size:14px;margin-bottom:20px">${esc(plan.success_definition)}</p>`;
+  html += `<hr>`;
+
+  const milestones = plan.project_type === "program"
+    ? (plan.pillars||[]).flatMap(p=>p.milestones||[])
+    : (plan.milestones||[]);
+
+  if (milestones.length) {
+    html += `<div class="section-header">
+      <span class="section-pill" style="background:#06b6d4">Project Plan</span>
+    </div>`;
+    milestones.forEach(ms => {
+      html += `<h3>${esc(ms.name)}</h3>`;
+      if (ms.deliverable) html += `<p style="font-size:13px;color:var(--muted);margin-bottom:8px">Deliverable: ${esc(ms.deliverable)}</p>`;
+      if (ms.tasks && ms.tasks.length) {
+        html += `<ul>`;
+        ms.tasks.forEach(t => {
+          const meta = [t.owner && `Owner: ${esc(t.owner)}`, t.duration_days && `${t.duration_days}d`].filter(Boolean).join(" · ");
+          html += `<li style="border-left-color:#06b6d4"><strong>${esc(t.name)}</strong>${meta ? ` <em style="font-weight:400;font-size:12px"> — ${meta}</em>` : ""}`;
+          if (t.subtasks && t.subtasks.length) {
+            html += `<ul style="margin-top:6px">`;
+            t.subtasks.forEach(st => {
+              const stm = [st.owner && esc(st.owner), st.timeline && esc(st.timeline)].filter(Boolean).join(", ");
+              html += `<li style="background:#f1f5f9;border-left-color:#f59e0b">${esc(st.name)}${stm ? ` <em>— ${stm}</em>` : ""}</li>`;
+            });
+            html += `</ul>`;
+          }
+          html += `</li>`;
+        });
+        html += `</ul>`;
+      }
+    });
+  }
+
+  const gov = plan.governance;
+  if (gov) {
+    html += `<hr>`;
+    html += `<div class="section-header">
+      <span class="section-pill" style="background:#ef4444">Governance &amp; Risk</span>
+    </div>`;
+    if (gov.stakeholders && gov.stakeholders.length) {
+      html += `<h3>Stakeholders</h3><ul>`;
+      gov.stakeholders.forEach(s => html += `<li style="border-left-color:#8b5cf6">${esc(s)}</li>`);
+      html += `</ul>`;
+    }
+    if (gov.kpis && gov.kpis.length) {
+      html += `<h3>KPIs</h3><ul>`;
+      gov.kpis.forEach(k => {
+        const t = k.target ? ` — Target: ${esc(k.target)}` : "";
+        html += `<li style="border-left-color:#3b82f6"><strong>${esc(k.metric)}</strong>${t}</li>`;
+      });
+      html += `</ul>`;
+    }
+    if (gov.risks && gov.risks.length) {
+      html += `<h3>Risks</h3><ul>`;
+      gov.risks.forEach(r => {
+        const sev = (r.severity||"").toLowerCase();
+        const cls = sev==="high" ? "risk-high" : sev==="medium" ? "risk-medium" : "risk-low";
+        const bg  = sev==="high" ? "#ef4444" : sev==="medium" ? "#f59e0b" : "#10b981";
+        const badge = `<span style="background:${bg};color:#fff;border-radius:4px;padding:1px 7px;font-size:11px;font-weight:700;margin-right:6px">${sev.toUpperCase()}</span>`;
+        html += `<li class="${cls}">${badge}${esc(r.description)}${r.mitigation ? `<br><em style="font-size:12.5px">Mitigation: ${esc(r.mitigation)}</em>` : ""}</li>`;
+      });
+      html += `</ul>`;
+    }
+    if (gov.external_vendors && gov.external_vendors.length) {
+      html += `<h3>External Vendors</h3><ul>`;
+      gov.external_vendors.forEach(v => html += `<li style="border-left-color:var(--muted)">${esc(v)}</li>`);
+      html += `</ul>`;
+    }
+    if (gov.review_cadence) {
+      html += `<h3>Review Cadence</h3><p style="font-size:14px;margin:4px 0 12px">${esc(gov.review_cadence)}</p>`;
+    }
+  }
+
+  body.innerHTML = html;
+}
+
+function backToChat() {
+  document.getElementById("plan-view").style.display  = "none";
+  document.getElementById("chat-view").style.display = "flex";
+}
+
+function downloadPlan() {
+  const blob = new Blob([planMarkdown],{type:"text/markdown"});
+  const url  = URL.createObjectURL(blob);
+  const a    = document.createElement("a");
+  a.href=url; a.download="project-plan.md"; a.click();
+  URL.revokeObjectURL(url);
+}
+
+// ════════════════════════════════════════
+// INIT
+// ════════════════════════════════════════
+window.addEventListener("load", () => {
+  updateProgress("define_outcome");
+
+  appendBubble("agent",
+    "I am your **Project Planning Agent**.\n\n" +
+    "I will guide you through **5 structured stages** to build a complete, actionable project plan — " +
+    "covering outcomes, constraints, phases, tasks, and risks.\n\n" +
+    "Fill in the form below and click **Send to Agent**, or type freely in the text box."
+  );
+
+  insertStageCard("define_outcome");
+  inputEl.focus();
+});
@@ -0,0 +1,97 @@
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+# record: u16 session_id_len | u32 payload_len | session_id | payload
+_RECORD = struct.Struct("<HI")
+
+
+class TranscriptArchive:
+    """
+    Append-only on-disk archive of session transcripts, one file per UTC day.
+
+    Payloads are encoded sessions (see storage.codec) whose blocks are already
+    compressed. `append` returns a reference "<file>:<offset>:<length>" that is kept on
+    the session; `read` serves it from a read-only memory map of the day file.
+    `reclaim` deletes past day files no session refers to any more (every session
+    in them was rehydrated or deleted).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._write_lock = threading.Lock()
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def append(self, session_id: str, payload: bytes) -> str:
+        sid = session_id.encode("utf-8")
+        record = _RECORD.pack(len(sid), len(payload)) + sid + payload
+        name = self._current_name()
+        with self._write_lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / name, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+        return f"{name}:{offset}:{len(record)}"
+
+    def read(self, ref: str) -> Tuple[str, bytes]:
+        """(session_id, payload) for a reference returned by `append`."""
+        name, offset, length = self._parse(ref)
+        view = self._map(name, offset + length)
+        sid_len, payload_len = _RECORD.unpack_from(view, offset)
+        start = offset + _RECORD.size
+        session_id = view[start:start + sid_len].decode("utf-8")
+        start += sid_len
+        return session_id, view[start:start + payload_len]
+
+    def reclaim(self, referenced: Iterable[str]) -> int:
+        """Delete day files other than today's whose name isn't in `referenced`; returns bytes freed."""
+        keep = set(referenced)
+        freed = 0
+        with self._write_lock:
+            keep.add(self._current_name())
+            for path in self.directory.glob("transcripts-*.bin"):
+                if path.name in keep:
+                    continue
+                view = self._maps.pop(path.name, None)
+                if view is not None:
+                    view.close()
+                freed += path.stat().st_size
+                path.unlink()
+        return freed
+
+    @classmethod
+    def file_of(cls, ref: str) -> str:
+        return cls._parse(ref)[0]
+
+    @staticmethod
+    def _current_name() -> str:
+        return f"transcripts-{datetime.utcnow():%Y-%m-%d}.bin"
+
+    def close(self) -> None:
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+
+    @staticmethod
+    def _parse(ref: str) -> Tuple[str, int, int]:
+        name, offset, length = ref.rsplit(":", 2)
+        if "/" in name or "\\" in name or name.startswith("."):
+            raise ValueError(f"Invalid archive reference: {ref}")
+        return name, int(offset), int(length)
+
+    def _map(self, name: str, needed: int) -> mmap.mmap:
+        view = self._maps.get(name)
+        if view is None or len(view) < needed:
+            # Day files grow while they're current; remap to cover the new records
+            if view is not None:
+                view.close()
+            with open(self.directory / name, "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = view
+        return view
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from ..models.session import Session
+from .codec import SessionView
+from .index import SessionPage, SessionQuery
+from .projections import MessagePage, SessionHeader
 
 
 class SessionStore(ABC):
@@ -12,3 +15,45 @@ class SessionStore(ABC):
 
     @abstractmethod
     async def delete(self, session_id: str) -> None: ...
+
+    @abstractmethod
+    async def list_sessions(
+        self, query: Optional[SessionQuery] = None, limit: int = 50, cursor: Optional[str] = None,
+    ) -> SessionPage:
+        """Filtered, cursor-paginated listing served from secondary indexes."""
+
+    # ── Projections ──────────────────────────────────────────────
+    # Reads that need part of a session. These defaults load the whole session;
+    # backends override them to read only the part asked for.
+    async def get_header(self, session_id: str) -> Optional[SessionHeader]:
+        session = await self.get(session_id)
+        return SessionHeader.from_session(session) if session else None
+
+    async def exists(self, session_id: str) -> bool:
+        return await self.get(session_id) is not None
+
+    async def get_messages(
+        self, session_id: str, cursor: Optional[str] = None, limit: int = 50,
+    ) -> Optional[MessagePage]:
+        """A page of the transcript, oldest first; None if the session doesn't exist."""
+        session = await self.get(session_id)
+        return MessagePage.from_messages(session.messages, cursor, limit) if session else None
+
+    async def revision(self, session_id: str) -> Optional[int]:
+        """
+        A number that changes on every save of the session, so holders of a live copy
+        can tell whether it went stale. None when the store doesn't track revisions.
+        """
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """Cheap size totals for periodic monitoring; empty when the backend has none."""
+        return {}
+
+    @abstractmethod
+    async def memory_usage(self, top: int = 10) -> Dict[str, Any]:
+        """Approximate bytes held per session and in total, with the `top` largest sessions."""
+
+    @abstractmethod
+    async def views(self) -> List[SessionView]:
+        """Lazy views of every stored session, for background passes such as archival."""
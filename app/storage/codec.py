@@ -0,0 +1,285 @@
+import json
+import logging
+import struct
+import zlib
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.session import Session, ConversationMessage, StageDataSet, STAGE_ORDER
+
+try:  # optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────────────────────────
+# Layout
+#
+#   MAGIC | u32 header_len | u32 plan_len | u32 stage_data_len | u16 block_count
+#   header JSON | plan JSON | stage_data JSON | blocks...
+#
+#   plan: [compiled_plan, compiled_plan_markdown] cached on archived sessions, or
+#   empty; kept out of the header so summaries never parse it
+#   block: u8 stage | u8 flags | u32 message_count | u32 payload_len | payload
+#   flags: bit 0 = sealed (stage finished, contents immutable), bits 1-2 = compression
+#   payload: JSON array of [role, timestamp_us, content, token_count] rows
+#
+# Roles and stages are small ints, timestamps are epoch microseconds. Blocks are runs
+# of consecutive messages from the same stage; sealed blocks are compressed.
+#
+# Version 1 blobs (no plan section; the cached plan sat in the header) still decode.
+# ─────────────────────────────────────────────────────────────────
+MAGIC = b"PS2\x00"
+_PREFIX = struct.Struct("<4sIIIH")
+MAGIC_V1 = b"PS1\x00"
+_PREFIX_V1 = struct.Struct("<4sIIH")
+_PLAN_FIELDS = {"compiled_plan", "compiled_plan_markdown"}
+_BLOCK = struct.Struct("<BBII")
+
+COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_ZSTD = 0, 1, 2
+COMPRESSION_CODES = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+FLAG_SEALED = 0x01
+
+ROLE_CODES = {"user": 0, "assistant": 1}
+ROLES = {v: k for k, v in ROLE_CODES.items()}
+NO_STAGE = 0xFF
+STAGE_CODES = {stage: i for i, stage in enumerate(STAGE_ORDER)}
+
+_EPOCH = datetime(1970, 1, 1)
+_JSON_SEPARATORS = (",", ":")
+
+
+def _to_epoch_us(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_epoch_us(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=_JSON_SEPARATORS, ensure_ascii=False).encode("utf-8")
+
+
+class SessionCodec:
+    """
+    Compact binary encoding for sessions held in memory or written to snapshots.
+
+    Completed stages' messages (and every block of a finished session) are compressed
+    with zlib, or zstd when the optional `zstandard` package is installed. Sealed
+    blocks are immutable, so `encode(..., previous=blob)` reuses them byte-for-byte and
+    a save only re-encodes the active stage.
+
+    `SessionView` decodes sections lazily: reading the header or stage_data never
+    touches the message blocks.
+    """
+
+    def __init__(self, compression: str = "zlib", min_compress_bytes: int = 256, level: int = 6):
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; falling back to zlib session compression")
+            compression = "zlib"
+        self.compression = COMPRESSION_CODES[compression]
+        self.min_compress_bytes = min_compress_bytes
+        self.level = level
+
+    # ── encode ───────────────────────────────────────────────────
+    def encode(self, session: Session, previous: Optional[bytes] = None) -> bytes:
+        header = session.model_dump(mode="json", exclude={"messages", "stage_data", *_PLAN_FIELDS})
+        header["created_at"] = _to_epoch_us(session.created_at)
+        header["updated_at"] = _to_epoch_us(session.updated_at)
+        header["message_count"] = len(session.messages)
+        header_bytes = _dumps(header)
+        plan_bytes = b""
+        if session.compiled_plan is not None:
+            plan_bytes = _dumps([session.compiled_plan, session.compiled_plan_markdown])
+        stage_bytes = session.stage_data.model_dump_json().encode("utf-8")
+
+        reusable = self._sealed_blocks(previous) if previous else {}
+        blocks: List[bytes] = []
+        offset = 0
+        for stage_code, messages in self._runs(session.messages):
+            sealed = session.is_complete or (
+                stage_code != NO_STAGE and stage_code != STAGE_CODES[session.current_stage]
+            )
+            reused = reusable.get((offset, stage_code, len(messages))) if sealed else None
+            blocks.append(reused or self._encode_block(stage_code, messages, sealed))
+            offset += len(messages)
+
+        return b"".join(
+            [_PREFIX.pack(MAGIC, len(header_bytes), len(plan_bytes), len(stage_bytes), len(blocks)),
+             header_bytes, plan_bytes, stage_bytes, *blocks]
+        )
+
+    @staticmethod
+    def _runs(messages: List[ConversationMessage]):
+        run: List[ConversationMessage] = []
+        run_code = None
+        for m in messages:
+            code = STAGE_CODES[m.stage] if m.stage is not None else NO_STAGE
+            if run and code != run_code:
+                yield run_code, run
+                run = []
+            run_code = code
+            run.append(m)
+        if run:
+            yield run_code, run
+
+    def _encode_block(self, stage_code: int, messages: List[ConversationMessage], sealed: bool) -> bytes:
+        rows = [
+            [ROLE_CODES.get(m.role, m.role), _to_epoch_us(m.timestamp), m.content, m.token_count]
+            for m in messages
+        ]
+        payload = _dumps(rows)
+        compression = COMPRESSION_NONE
+        if sealed and self.compression != COMPRESSION_NONE and len(payload) >= self.min_compress_bytes:
+            compression = self.compression
+            payload = self._compress(payload)
+        flags = (FLAG_SEALED if sealed else 0) | (compression << 1)
+        return _BLOCK.pack(stage_code, flags, len(messages), len(payload)) + payload
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == COMPRESSION_ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(payload)
+        return zlib.compress(payload, self.level)
+
+    def _sealed_blocks(self, blob: bytes) -> Dict[Tuple[int, int, int], bytes]:
+        """Raw bytes of each sealed block in `blob`, keyed by (message offset, stage, count)."""
+        out = {}
+        offset = 0
+        for stage_code, flags, count, start, end in SessionView(blob)._block_table:
+            if flags & FLAG_SEALED:
+                out[(offset, stage_code, count)] = blob[start - _BLOCK.size:end]
+            offset += count
+        return out
+
+    # ── decode ───────────────────────────────────────────────────
+    def decode(self, blob: bytes) -> Session:
+        return SessionView(blob).session()
+
+    def view(self, blob: bytes) -> "SessionView":
+        return SessionView(blob)
+
+
+def _decompress(payload: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Session block is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return payload
+
+
+class SessionView:
+    """Lazy reader over an encoded session; each section is decoded on first access."""
+
+    def __init__(self, blob: bytes):
+        if blob[:len(MAGIC)] == MAGIC:
+            _, self._header_len, self._plan_len, self._stage_len, self._block_count = _PREFIX.unpack_from(blob, 0)
+            self._header_start = _PREFIX.size
+            self._version = 2
+        elif blob[:len(MAGIC_V1)] == MAGIC_V1:
+            _, self._header_len, self._stage_len, self._block_count = _PREFIX_V1.unpack_from(blob, 0)
+            self._plan_len = 0
+            self._header_start = _PREFIX_V1.size
+            self._version = 1
+        else:
+            raise ValueError("Not an encoded session")
+        self._blob = blob
+
+    @cached_property
+    def header(self) -> Dict[str, Any]:
+        start = self._header_start
+        header = json.loads(self._blob[start:start + self._header_len])
+        header["created_at"] = _from_epoch_us(header["created_at"])
+        header["updated_at"] = _from_epoch_us(header["updated_at"])
+        return header
+
+    @cached_property
+    def cached_plan(self) -> Dict[str, Any]:
+        """compiled_plan / compiled_plan_markdown of an archived session, else empty."""
+        if not self._plan_len:
+            # Version 1 blobs kept them in the header
+            return {k: self.header[k] for k in _PLAN_FIELDS if self.header.get(k) is not None}
+        start = self._header_start + self._header_len
+        plan, markdown = json.loads(self._blob[start:start + self._plan_len])
+        return {"compiled_plan": plan, "compiled_plan_markdown": markdown}
+
+    @property
+    def session_id(self) -> str:
+        return self.header["session_id"]
+
+    @property
+    def message_count(self) -> int:
+        return self.header["message_count"]
+
+    @cached_property
+    def stage_data(self) -> StageDataSet:
+        start = self._header_start + self._header_len + self._plan_len
+        return StageDataSet.model_validate_json(self._blob[start:start + self._stage_len])
+
+    @cached_property
+    def _block_table(self) -> List[Tuple[int, int, int, int, int]]:
+        """(stage, flags, count, payload_start, payload_end) per block — no payload decoding."""
+        table = []
+        pos = self._header_start + self._header_len + self._plan_len + self._stage_len
+        for _ in range(self._block_count):
+            stage_code, flags, count, length = _BLOCK.unpack_from(self._blob, pos)
+            pos += _BLOCK.size
+            table.append((stage_code, flags, count, pos, pos + length))
+            pos += length
+        return table
+
+    def sizes(self) -> Dict[str, int]:
+        """Encoded bytes per section, for memory accounting; no payload is decoded."""
+        cached_plan, header_len = self._plan_len, self._header_len
+        if self._version == 1 and self.cached_plan:
+            # Version 1: the plan is inside the header section
+            cached_plan = len(_dumps([self.cached_plan.get(k) for k in sorted(_PLAN_FIELDS)]))
+            header_len = max(0, header_len - cached_plan)
+        return {
+            "total": len(self._blob),
+            "header": header_len,
+            "cached_plan": cached_plan,
+            "stage_data": self._stage_len,
+            "messages": sum(end - begin + _BLOCK.size for _, _, _, begin, end in self._block_table),
+        }
+
+    def messages(self, start: int = 0, stop: Optional[int] = None) -> List[ConversationMessage]:
+        """Decode messages[start:stop], skipping (and not decompressing) blocks outside the range."""
+        stop = self.message_count if stop is None else min(stop, self.message_count)
+        out: List[ConversationMessage] = []
+        offset = 0
+        for stage_code, flags, count, begin, end in self._block_table:
+            if offset + count <= start:
+                offset += count
+                continue
+            if offset >= stop:
+                break
+            rows = json.loads(_decompress(self._blob[begin:end], flags >> 1))
+            stage = STAGE_ORDER[stage_code] if stage_code != NO_STAGE else None
+            for i, (role, ts, content, token_count) in enumerate(rows):
+                if start <= offset + i < stop:
+                    # Trusted input written by our own encoder — skip re-validation
+                    out.append(ConversationMessage.model_construct(
+                        role=ROLES.get(role, role) if isinstance(role, int) else role,
+                        content=content,
+                        timestamp=_from_epoch_us(ts),
+                        stage=stage,
+                        token_count=token_count,
+                    ))
+            offset += count
+        return out
+
+    def session(self) -> Session:
+        header = {k: v for k, v in self.header.items() if k != "message_count"}
+        session = Session.model_validate({**header, **self.cached_plan, "stage_data": {}})
+        session.stage_data = self.stage_data
+        session.messages = self.messages()
+        return session
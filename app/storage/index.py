@@ -0,0 +1,198 @@
+import base64
+import bisect
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..models.session import Session, PlanningStage
+from .codec import SessionView
+
+# Sessions are listed oldest first; (created_at, session_id) is unique and immutable
+_SortKey = Tuple[datetime, str]
+
+
+@dataclass(frozen=True)
+class SessionRecord:
+    """Index entry for one session — everything listing and filtering needs."""
+    session_id: str
+    current_stage: PlanningStage
+    is_complete: bool
+    created_at: datetime
+    updated_at: datetime
+    project_name: Optional[str] = None
+
+    @property
+    def sort_key(self) -> _SortKey:
+        return self.created_at, self.session_id
+
+    @classmethod
+    def from_session(cls, session: Session) -> "SessionRecord":
+        outcome = session.stage_data.define_outcome
+        return cls(
+            session_id=session.session_id,
+            current_stage=session.current_stage,
+            is_complete=session.is_complete,
+            created_at=session.created_at,
+            updated_at=session.updated_at,
+            project_name=outcome.project_name if outcome else None,
+        )
+
+    @classmethod
+    def from_view(cls, view: SessionView) -> "SessionRecord":
+        """Built from the encoded header and stage_data; messages are not decoded."""
+        header = view.header
+        outcome = view.stage_data.define_outcome
+        return cls(
+            session_id=header["session_id"],
+            current_stage=PlanningStage(header["current_stage"]),
+            is_complete=header["is_complete"],
+            created_at=header["created_at"],
+            updated_at=header["updated_at"],
+            project_name=outcome.project_name if outcome else None,
+        )
+
+
+@dataclass
+class SessionQuery:
+    current_stage: Optional[PlanningStage] = None
+    is_complete: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    # Case-insensitive substring of the Stage 1 project name
+    project_name: Optional[str] = None
+
+    @property
+    def indexed(self) -> bool:
+        """True when SessionIndex serves every filter from its key lists alone."""
+        return (
+            self.is_complete is None
+            and self.updated_after is None
+            and self.updated_before is None
+            and self.project_name is None
+        )
+
+    def matches(self, record: SessionRecord) -> bool:
+        if self.current_stage is not None and record.current_stage != self.current_stage:
+            return False
+        if self.is_complete is not None and record.is_complete != self.is_complete:
+            return False
+        if self.created_after is not None and record.created_at < self.created_after:
+            return False
+        if self.created_before is not None and record.created_at >= self.created_before:
+            return False
+        if self.updated_after is not None and record.updated_at < self.updated_after:
+            return False
+        if self.updated_before is not None and record.updated_at >= self.updated_before:
+            return False
+        if self.project_name is not None:
+            if not record.project_name or self.project_name.lower() not in record.project_name.lower():
+                return False
+        return True
+
+
+@dataclass
+class SessionPage:
+    sessions: List[SessionRecord] = field(default_factory=list)
+    # None when counting would mean scanning past the page (filters without an index)
+    total: Optional[int] = 0
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(key: _SortKey) -> str:
+    raw = f"{key[0].isoformat()}|{key[1]}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> _SortKey:
+    try:
+        created_at, session_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), session_id
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+class SessionIndex:
+    """
+    Secondary indexes over stored sessions, maintained on every save and delete.
+
+    - `_records`: session_id → SessionRecord
+    - `_by_created`: records' sort keys in order, for created_at ranges and cursors
+    - `_by_stage`: current_stage → that stage's sort keys in order, so stage filters
+      touch only that stage
+
+    A query bisects the cursor and created_at range on one key list, then filters
+    the rest lazily, stopping at the first match past the page. Queries never
+    deserialize a session.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, SessionRecord] = {}
+        self._by_created: List[_SortKey] = []
+        self._by_stage: Dict[PlanningStage, List[_SortKey]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._records
+
+    def put(self, record: SessionRecord) -> None:
+        previous = self._records.get(record.session_id)
+        if previous is not None:
+            if previous.sort_key != record.sort_key:
+                _remove_key(self._by_created, previous.sort_key)
+                bisect.insort(self._by_created, record.sort_key)
+            _remove_key(self._by_stage[previous.current_stage], previous.sort_key)
+        else:
+            bisect.insort(self._by_created, record.sort_key)
+        bisect.insort(self._by_stage.setdefault(record.current_stage, []), record.sort_key)
+        self._records[record.session_id] = record
+
+    def remove(self, session_id: str) -> None:
+        record = self._records.pop(session_id, None)
+        if record is None:
+            return
+        _remove_key(self._by_created, record.sort_key)
+        _remove_key(self._by_stage[record.current_stage], record.sort_key)
+
+    def query(self, query: SessionQuery, limit: int = 50, cursor: Optional[str] = None) -> SessionPage:
+        if query.current_stage is not None:
+            keys = self._by_stage.get(query.current_stage, [])
+        else:
+            keys = self._by_created
+
+        lo, hi = 0, len(keys)
+        if query.created_after is not None:
+            lo = bisect.bisect_left(keys, (query.created_after, ""))
+        if query.created_before is not None:
+            hi = bisect.bisect_left(keys, (query.created_before, ""))
+        start = bisect.bisect_right(keys, decode_cursor(cursor), lo, hi) if cursor else lo
+
+        if query.indexed:
+            page = [self._records[sid] for _, sid in keys[start:start + limit]]
+            has_more, total = start + limit < hi, max(0, hi - lo)
+        else:
+            page, has_more = [], False
+            for i in range(start, hi):
+                record = self._records[keys[i][1]]
+                if not query.matches(record):
+                    continue
+                if len(page) == limit:
+                    has_more = True
+                    break
+                page.append(record)
+            # Exact only when this page is the whole result
+            total = len(page) if not cursor and not has_more else None
+        return SessionPage(
+            sessions=page,
+            total=total,
+            next_cursor=encode_cursor(page[-1].sort_key) if has_more and page else None,
+        )
+
+
+def _remove_key(keys: List[_SortKey], key: _SortKey) -> None:
+    i = bisect.bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -1,29 +1,212 @@
 import asyncio
-from typing import Optional, Dict
+import heapq
+import logging
+import time
+from typing import Any, Optional, Dict, Iterator, List, Set, Tuple
 from .base import SessionStore
+from .codec import SessionCodec, SessionView
+from .index import SessionIndex, SessionPage, SessionQuery, SessionRecord
+from .projections import MessagePage, SessionHeader
+from .snapshot import SnapshotReader, write_snapshot
 from ..models.session import Session
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class InMemorySessionStore(SessionStore):
     """
     Thread-safe in-memory store for development and Render free-tier deployments.
-    State is scoped to the running process — sessions survive restarts only if the
-    process keeps running (Render free tier keeps the process alive while active).
+    State is scoped to the running process, but `snapshot()` / `restore()` carry it
+    across restarts through a local snapshot file.
+
+    Sessions are held in SessionCodec's compact binary form rather than as dicts.
+    After a restore, sessions stay in the memory-mapped snapshot until first read.
     """
 
-    def __init__(self):
-        self._store: Dict[str, dict] = {}
+    def __init__(self, codec: Optional[SessionCodec] = None):
+        self._store: Dict[str, bytes] = {}
         self._lock = asyncio.Lock()
+        self.codec = codec or SessionCodec()
+        self._snapshot: Optional[SnapshotReader] = None
+        # Sessions deleted since the restore that are still present in the snapshot
+        self._deleted: Set[str] = set()
+        self._index = SessionIndex()
+        self._revisions: Dict[str, int] = {}
+        # Snapshot-resident sessions are indexed on the first listing, not at restore
+        self._index_stale = False
 
     async def get(self, session_id: str) -> Optional[Session]:
         async with self._lock:
-            data = self._store.get(session_id)
-            return Session(**data) if data else None
+            blob = self._blob(session_id)
+        return self.codec.decode(blob) if blob else None
 
     async def save(self, session: Session) -> None:
         async with self._lock:
-            self._store[session.session_id] = session.model_dump(mode="json")
+            previous = self._blob(session.session_id)
+        # Encode outside the lock; finished stages' blocks are reused from `previous`
+        blob = self.codec.encode(session, previous=previous)
+        record = SessionRecord.from_session(session)
+        async with self._lock:
+            self._store[session.session_id] = blob
+            self._deleted.discard(session.session_id)
+            self._index.put(record)
+            self._revisions[session.session_id] = self._revisions.get(session.session_id, 0) + 1
 
     async def delete(self, session_id: str) -> None:
         async with self._lock:
             self._store.pop(session_id, None)
+            self._index.remove(session_id)
+            self._revisions.pop(session_id, None)
+            if self._snapshot is not None and session_id in self._snapshot:
+                self._deleted.add(session_id)
+
+    async def revision(self, session_id: str) -> Optional[int]:
+        return self._revisions.get(session_id, 0)
+
+    async def get_header(self, session_id: str) -> Optional[SessionHeader]:
+        # Reads never promote: only the views are built, the blob stays in the snapshot
+        async with self._lock:
+            blob = self._blob(session_id, promote=False)
+        return SessionHeader.from_view(self.codec.view(blob)) if blob else None
+
+    async def exists(self, session_id: str) -> bool:
+        # Membership only: snapshot-resident sessions are not promoted
+        if session_id in self._store:
+            return True
+        return (
+            self._snapshot is not None
+            and session_id not in self._deleted
+            and session_id in self._snapshot
+        )
+
+    async def get_messages(
+        self, session_id: str, cursor: Optional[str] = None, limit: int = 50,
+    ) -> Optional[MessagePage]:
+        async with self._lock:
+            blob = self._blob(session_id, promote=False)
+        return MessagePage.from_view(self.codec.view(blob), cursor, limit) if blob else None
+
+    async def list_sessions(
+        self, query: Optional[SessionQuery] = None, limit: int = 50, cursor: Optional[str] = None,
+    ) -> SessionPage:
+        async with self._lock:
+            if self._index_stale:
+                self._index_snapshot()
+            return self._index.query(query or SessionQuery(), limit=limit, cursor=cursor)
+
+    def _index_snapshot(self) -> None:
+        for session_id in self._snapshot.session_ids():
+            if session_id in self._index or session_id in self._deleted:
+                continue
+            blob = self._store.get(session_id) or self._snapshot.get(session_id)
+            self._index.put(SessionRecord.from_view(self.codec.view(blob)))
+        self._index_stale = False
+
+    async def views(self) -> List[SessionView]:
+        async with self._lock:
+            items = self._items()
+        return [self.codec.view(blob) for _, blob in items]
+
+    def _blob(self, session_id: str, promote: bool = True) -> Optional[bytes]:
+        """The encoded session; a snapshot-resident one is kept in memory only if `promote`."""
+        blob = self._store.get(session_id)
+        if blob is None and self._snapshot is not None and session_id not in self._deleted:
+            blob = self._snapshot.get(session_id)
+            if blob is not None and promote:
+                self._store[session_id] = blob
+        return blob
+
+    def _items(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Every live session: resident ones as of now, then those still only in the
+        snapshot, read from it one at a time without promoting them into memory.
+        Safe to consume off the loop: the resident set and deletions are copied here.
+        """
+        resident = list(self._store.items())
+        reader, deleted = self._snapshot, set(self._deleted)
+
+        def items() -> Iterator[Tuple[str, bytes]]:
+            yield from resident
+            if reader is not None:
+                seen = {session_id for session_id, _ in resident}
+                for session_id in reader.session_ids():
+                    if session_id not in seen and session_id not in deleted:
+                        yield session_id, reader.get(session_id)
+
+        return items()
+
+    # ── Memory accounting ────────────────────────────────────────
+    def stats(self) -> Dict[str, int]:
+        """Cheap totals for the periodic sampler: no decoding, one pass over lengths."""
+        snapshot_only = 0
+        if self._snapshot is not None:
+            snapshot_only = sum(
+                1 for sid in self._snapshot.session_ids() if sid not in self._store and sid not in self._deleted
+            )
+        return {
+            "sessions": len(self._store) + snapshot_only,
+            "resident_sessions": len(self._store),
+            "resident_bytes": sum(len(blob) for blob in self._store.values()),
+        }
+
+    async def memory_usage(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Approximate bytes held per session (encoded sizes by section) with totals
+        and the `top` largest sessions. Sessions still in the memory-mapped snapshot
+        are counted separately: they live in the page cache, not on the heap.
+        """
+        async with self._lock:
+            items = list(self._store.items())
+        # One pass over every resident session: keep it off the event loop
+        totals, largest = await asyncio.to_thread(self._sizes, items, top)
+        stats = self.stats()
+        return {
+            "sessions": stats["sessions"],
+            "resident_sessions": stats["resident_sessions"],
+            "resident_bytes": totals,
+            "snapshot_resident_sessions": stats["sessions"] - stats["resident_sessions"],
+            "snapshot_file_bytes": self._snapshot.size if self._snapshot is not None else 0,
+            "index_entries": len(self._index),
+            "largest_sessions": largest,
+        }
+
+    def _sizes(self, items: List[Tuple[str, bytes]], top: int) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        """Section totals from encoded lengths; only the `top` largest headers are parsed."""
+        sections = ("header", "cached_plan", "stage_data", "messages")
+        totals = {name: 0 for name in ("total",) + sections}
+        sizes = []
+        for session_id, blob in items:
+            entry = self.codec.view(blob).sizes()
+            for name in totals:
+                totals[name] += entry[name]
+            sizes.append((session_id, blob, entry))
+        largest = [
+            {"session_id": session_id, "message_count": self.codec.view(blob).message_count, **entry}
+            for session_id, blob, entry in heapq.nlargest(top, sizes, key=lambda e: e[2]["total"])
+        ]
+        return totals, largest
+
+    # ── Snapshots ────────────────────────────────────────────────
+    async def snapshot(self, path: str) -> int:
+        """Write every session to `path` (atomically); returns the session count."""
+        started = time.monotonic()
+        async with self._lock:
+            items = self._items()
+        # Snapshot-resident sessions are copied file to file, never onto the heap
+        count, size = await asyncio.to_thread(write_snapshot, path, items)
+        metrics.set_gauge("snapshot.sessions", count)
+        metrics.set_gauge("snapshot.bytes", size)
+        metrics.observe("snapshot.write_ms", (time.monotonic() - started) * 1000)
+        return count
+
+    def restore(self, path: str) -> int:
+        """Attach the snapshot at `path`; sessions are decoded lazily on first read."""
+        reader = SnapshotReader(path)
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = reader
+        self._deleted.clear()
+        self._index_stale = True
+        logger.info(f"Restored {reader.count} session(s) from snapshot {path}")
+        return reader.count
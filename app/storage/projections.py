@@ -0,0 +1,91 @@
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from ..models.session import Session, ConversationMessage, PlanningStage
+from .codec import SessionView
+
+
+@dataclass(frozen=True)
+class SessionHeader:
+    """A session without its messages or stage data — what summaries and checks need."""
+    session_id: str
+    current_stage: PlanningStage
+    is_complete: bool
+    created_at: datetime
+    updated_at: datetime
+    message_count: int
+    pending_notice: Optional[str] = None
+    # Set when the transcript has moved to the on-disk archive (see agent.archival)
+    transcript_ref: Optional[str] = None
+
+    @classmethod
+    def from_session(cls, session: Session) -> "SessionHeader":
+        return cls(
+            session_id=session.session_id,
+            current_stage=session.current_stage,
+            is_complete=session.is_complete,
+            created_at=session.created_at,
+            updated_at=session.updated_at,
+            message_count=len(session.messages),
+            pending_notice=session.pending_notice,
+            transcript_ref=session.transcript_ref,
+        )
+
+    @classmethod
+    def from_view(cls, view: SessionView) -> "SessionHeader":
+        """Built from the encoded header alone; stage_data and messages are not decoded."""
+        header = view.header
+        return cls(
+            session_id=header["session_id"],
+            current_stage=PlanningStage(header["current_stage"]),
+            is_complete=header["is_complete"],
+            created_at=header["created_at"],
+            updated_at=header["updated_at"],
+            message_count=header["message_count"],
+            pending_notice=header.get("pending_notice"),
+            transcript_ref=header.get("transcript_ref"),
+        )
+
+
+@dataclass
+class MessagePage:
+    messages: List[ConversationMessage] = field(default_factory=list)
+    total: int = 0
+    next_cursor: Optional[str] = None
+
+    @classmethod
+    def from_messages(cls, messages: List[ConversationMessage], cursor: Optional[str], limit: int) -> "MessagePage":
+        start = decode_message_cursor(cursor) if cursor else 0
+        return cls._page(messages[start:start + limit], start, limit, len(messages))
+
+    @classmethod
+    def from_view(cls, view: SessionView, cursor: Optional[str], limit: int) -> "MessagePage":
+        """Decodes only the blocks holding the requested messages."""
+        start = decode_message_cursor(cursor) if cursor else 0
+        return cls._page(view.messages(start, start + limit), start, limit, view.message_count)
+
+    @classmethod
+    def _page(cls, messages: List[ConversationMessage], start: int, limit: int, total: int) -> "MessagePage":
+        has_more = start + limit < total
+        return cls(
+            messages=messages,
+            total=total,
+            next_cursor=encode_message_cursor(start + limit) if has_more else None,
+        )
+
+
+# Transcripts only ever grow at the end, so a message offset is a stable cursor
+def encode_message_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"m|{offset}".encode("ascii")).decode("ascii")
+
+
+def decode_message_cursor(cursor: str) -> int:
+    try:
+        tag, offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split("|", 1)
+        if tag != "m" or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
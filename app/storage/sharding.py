@@ -0,0 +1,320 @@
+import asyncio
+import bisect
+import hashlib
+import heapq
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from ..models.session import Session
+from ..utils.metrics import Histogram
+from .base import SessionStore
+from .codec import SessionView
+from .index import SessionPage, SessionQuery, encode_cursor
+from .projections import MessagePage, SessionHeader
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with `vnodes` virtual nodes per shard. Adding a shard moves
+    only the keys on the arcs its virtual nodes take over (about 1/N of them).
+    """
+
+    def __init__(self, shards: Optional[List[str]] = None, vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.shards: List[str] = []
+        for name in shards or []:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        if name in self.shards:
+            raise ValueError(f"Shard {name} is already on the ring")
+        self.shards.append(name)
+        for i in range(self.vnodes):
+            point = _hash(f"{name}#{i}")
+            self._owners[point] = name
+            bisect.insort(self._points, point)
+
+    def copy(self) -> "HashRing":
+        return HashRing(list(self.shards), self.vnodes)
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError("Hash ring has no shards")
+        i = bisect.bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+
+@dataclass
+class ShardStats:
+    calls: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+    latency_ms: Histogram = field(default_factory=lambda: Histogram(window=512))
+
+    def to_dict(self, healthy_after: float) -> Dict[str, Any]:
+        recent_error = self.last_error_at is not None and time.time() - self.last_error_at < healthy_after
+        return {
+            "healthy": not recent_error,
+            "calls": self.calls,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency_ms": self.latency_ms.summary(),
+        }
+
+
+class ShardedSessionStore(SessionStore):
+    """
+    Routes sessions across N backend stores by a consistent hash of session_id.
+
+    `add_shard()` puts a new shard on the ring and starts a background migration:
+    each existing shard's sessions are scanned through its index and only those the
+    new ring assigns elsewhere are copied over and removed from the source. Until it
+    finishes, a read that misses on a session's new owner reads through to the shard
+    that owned it before. Saves, deletes and moves of one session are serialized by a
+    per-session lock, and a save re-checks the ring after its write: one that was
+    routed by the ring before `add_shard()` follows the session to its new owner. `rebalance()` runs the same pass over every shard, e.g.
+    after restoring shard snapshots taken with a different shard count.
+
+    Per-shard call counts, errors and latency are kept for `shard_stats()`.
+    """
+
+    def __init__(self, shards: Dict[str, SessionStore], vnodes: int = 64, healthy_after_seconds: float = 60.0):
+        if not shards:
+            raise ValueError("ShardedSessionStore needs at least one shard")
+        self.shards: Dict[str, SessionStore] = dict(shards)
+        self.ring = HashRing(list(shards), vnodes)
+        self.healthy_after_seconds = healthy_after_seconds
+        self.stats_by_shard: Dict[str, ShardStats] = {name: ShardStats() for name in shards}
+        # Set while a migration runs: the ring before the change (None = any shard may hold a key)
+        self._migrating = False
+        self._previous_ring: Optional[HashRing] = None
+        self._migration: Optional[asyncio.Task] = None
+        # Migrations that stopped on an error; the sessions not yet moved stay where they were
+        self.migration_errors = 0
+        self.last_migration_error: Optional[str] = None
+        # Per-session locks and their holders + waiters, so a move and a save never interleave
+        self._key_locks: Dict[str, Tuple[asyncio.Lock, List[int]]] = {}
+
+    # ── Routing ──────────────────────────────────────────────────
+    def shard_for(self, session_id: str) -> str:
+        return self.ring.node_for(session_id)
+
+    def _fallbacks(self, session_id: str, owner: str) -> List[str]:
+        """Shards that may still hold `session_id` while a migration is running."""
+        if not self._migrating:
+            return []
+        if self._previous_ring is not None:
+            previous = self._previous_ring.node_for(session_id)
+            return [previous] if previous != owner else []
+        return [name for name in self.shards if name != owner]
+
+    async def _call(self, name: str, fn: Callable[[SessionStore], Awaitable[T]]) -> T:
+        stats = self.stats_by_shard[name]
+        started = time.perf_counter()
+        stats.calls += 1
+        try:
+            return await fn(self.shards[name])
+        except Exception as exc:
+            stats.errors += 1
+            stats.last_error = f"{type(exc).__name__}: {exc}"
+            stats.last_error_at = time.time()
+            raise
+        finally:
+            stats.latency_ms.observe((time.perf_counter() - started) * 1000)
+
+    async def _read(self, session_id: str, fn: Callable[[SessionStore], Awaitable[T]]) -> Optional[T]:
+        owner = self.shard_for(session_id)
+        result = await self._call(owner, fn)
+        if result:
+            return result
+        for name in self._fallbacks(session_id, owner):
+            result = await self._call(name, fn)
+            if result:
+                return result
+        return result
+
+    @asynccontextmanager
+    async def _key_lock(self, session_id: str):
+        # Taken even when no migration runs: add_shard() may start during the write
+        lock, users = self._key_locks.setdefault(session_id, (asyncio.Lock(), [0]))
+        users[0] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            users[0] -= 1
+            if not users[0]:
+                del self._key_locks[session_id]
+
+    # ── SessionStore ─────────────────────────────────────────────
+    async def get(self, session_id: str) -> Optional[Session]:
+        return await self._read(session_id, lambda s: s.get(session_id))
+
+    async def get_header(self, session_id: str) -> Optional[SessionHeader]:
+        return await self._read(session_id, lambda s: s.get_header(session_id))
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self._read(session_id, lambda s: s.exists(session_id)))
+
+    async def get_messages(
+        self, session_id: str, cursor: Optional[str] = None, limit: int = 50,
+    ) -> Optional[MessagePage]:
+        return await self._read(session_id, lambda s: s.get_messages(session_id, cursor=cursor, limit=limit))
+
+    async def save(self, session: Session) -> None:
+        async with self._key_lock(session.session_id):
+            owner = self.shard_for(session.session_id)
+            await self._call(owner, lambda s: s.save(session))
+            while (current := self.shard_for(session.session_id)) != owner:
+                # The ring changed during the write; the migration may have missed this copy
+                await self._call(current, lambda s: s.save(session))
+                await self._call(owner, lambda s: s.delete(session.session_id))
+                owner = current
+            for name in self._fallbacks(session.session_id, owner):
+                # The owner now has the latest copy; drop any older one left behind
+                await self._call(name, lambda s: s.delete(session.session_id))
+
+    async def delete(self, session_id: str) -> None:
+        async with self._key_lock(session_id):
+            owner = self.shard_for(session_id)
+            for name in [owner, *self._fallbacks(session_id, owner)]:
+                await self._call(name, lambda s: s.delete(session_id))
+
+    async def revision(self, session_id: str) -> Optional[int]:
+        return await self._call(self.shard_for(session_id), lambda s: s.revision(session_id))
+
+    async def list_sessions(
+        self, query: Optional[SessionQuery] = None, limit: int = 50, cursor: Optional[str] = None,
+    ) -> SessionPage:
+        # Shards share one global order (created_at, session_id), so each shard's first
+        # `limit` matches after the cursor contain the merged page
+        pages = await asyncio.gather(*(
+            self._call(name, lambda s: s.list_sessions(query, limit=limit, cursor=cursor))
+            for name in self.shards
+        ))
+        seen, records = set(), []
+        for record in heapq.merge(*(p.sessions for p in pages), key=lambda r: r.sort_key):
+            if record.session_id not in seen:  # mid-migration copies
+                seen.add(record.session_id)
+                records.append(record)
+        page = records[:limit]
+        has_more = len(records) > limit or any(p.next_cursor for p in pages)
+        return SessionPage(
+            sessions=page,
+            total=None if any(p.total is None for p in pages) else sum(p.total for p in pages),
+            next_cursor=encode_cursor(page[-1].sort_key) if has_more and page else None,
+        )
+
+    async def views(self) -> List[SessionView]:
+        seen, views = set(), []
+        for name in self.shards:
+            for view in await self._call(name, lambda s: s.views()):
+                if view.session_id not in seen:
+                    seen.add(view.session_id)
+                    views.append(view)
+        return views
+
+    def stats(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for shard in self.shards.values():
+            for key, value in shard.stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    async def memory_usage(self, top: int = 10) -> Dict[str, Any]:
+        return {name: await shard.memory_usage(top=top) for name, shard in self.shards.items()}
+
+    def shard_stats(self) -> Dict[str, Any]:
+        return {
+            "shards": {
+                name: {**stats.to_dict(self.healthy_after_seconds), **self.shards[name].stats()}
+                for name, stats in self.stats_by_shard.items()
+            },
+            "migrating": self._migrating,
+            "migration_errors": self.migration_errors,
+            "last_migration_error": self.last_migration_error,
+        }
+
+    # ── Resharding ───────────────────────────────────────────────
+    def add_shard(self, name: str, store: SessionStore) -> asyncio.Task:
+        """Put `store` on the ring and migrate the sessions it now owns in the background."""
+        if self._migrating:
+            raise RuntimeError("A migration is running or did not finish; rebalance() first")
+        previous = self.ring.copy()
+        self.shards[name] = store
+        self.stats_by_shard[name] = ShardStats()
+        self.ring.add(name)
+        return self._start_migration(previous)
+
+    def rebalance(self) -> asyncio.Task:
+        """Move every session that isn't on its owner; reads fall back to any shard meanwhile."""
+        if self._migration is not None and not self._migration.done():
+            raise RuntimeError("A migration is already running")
+        return self._start_migration(None)
+
+    def _start_migration(self, previous: Optional[HashRing]) -> asyncio.Task:
+        self._migrating = True
+        self._previous_ring = previous
+        self._migration = asyncio.create_task(self._migrate(), name="shard-migration")
+        return self._migration
+
+    async def _migrate(self) -> int:
+        """
+        Sessions moved. An error stops the pass and is logged and counted rather than
+        raised, so awaiting the migration (e.g. at shutdown) never fails. Reads keep
+        falling back to the previous owners until `rebalance()` finishes the move.
+        """
+        moved = 0
+        started = time.monotonic()
+        try:
+            for source in list(self.shards):
+                for session_id in await self._session_ids(source):
+                    if self.shard_for(session_id) != source:
+                        moved += await self._move(session_id, source)
+                    await asyncio.sleep(0)  # let requests in between keys
+        except Exception as exc:
+            self.migration_errors += 1
+            self.last_migration_error = f"{type(exc).__name__}: {exc}"
+            logger.exception(f"Shard migration stopped after moving {moved} session(s)")
+            return moved
+        self._migrating = False
+        self._previous_ring = None
+        logger.info(f"Shard migration moved {moved} session(s) in {time.monotonic() - started:.1f}s")
+        return moved
+
+    async def _session_ids(self, name: str) -> List[str]:
+        ids, cursor = [], None
+        while True:
+            page = await self._call(name, lambda s: s.list_sessions(limit=200, cursor=cursor))
+            ids.extend(r.session_id for r in page.sessions)
+            if not page.next_cursor:
+                return ids
+            cursor = page.next_cursor
+
+    async def _move(self, session_id: str, source: str) -> int:
+        async with self._key_lock(session_id):
+            session = await self._call(source, lambda s: s.get(session_id))
+            if session is None:
+                return 0  # deleted, or already moved by a save
+            target = self.shard_for(session_id)
+            await self._call(target, lambda s: s.save(session))
+            await self._call(source, lambda s: s.delete(session_id))
+            return 1
+
+    async def wait_for_migration(self) -> None:
+        if self._migration is not None:
+            await self._migration
@@ -0,0 +1,115 @@
+import mmap
+import os
+import struct
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# ─────────────────────────────────────────────────────────────────
+# Layout
+#
+#   MAGIC | records... | index... | trailer
+#
+#   record:  u16 session_id_len | u32 blob_len | session_id | blob (storage.codec)
+#   index:   u16 session_id_len | u64 blob_offset | u32 blob_len | session_id
+#   trailer: u64 index_offset | u32 count | MAGIC
+#
+# Records are streamed out one at a time; the index is appended once they are all
+# written, so the writer never holds more than one session's bytes.
+# ─────────────────────────────────────────────────────────────────
+MAGIC = b"PSS1"
+_RECORD = struct.Struct("<HI")
+_INDEX = struct.Struct("<HQI")
+_TRAILER = struct.Struct("<QI4s")
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing its trailer or is otherwise malformed."""
+
+
+def write_snapshot(path: str, items: Iterable[Tuple[str, bytes]]) -> Tuple[int, int]:
+    """
+    Stream `(session_id, encoded session)` pairs to `path` atomically: the data is
+    written and fsynced to a temporary file that is then renamed over `path`. Each
+    call gets its own temporary file, so concurrent writers never share one.
+    Returns (session count, bytes written).
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f"{target.name}.", suffix=".tmp")
+    index = []
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            for session_id, blob in items:
+                sid = session_id.encode("utf-8")
+                f.write(_RECORD.pack(len(sid), len(blob)))
+                f.write(sid)
+                index.append((sid, f.tell(), len(blob)))
+                f.write(blob)
+            index_offset = f.tell()
+            for sid, offset, length in index:
+                f.write(_INDEX.pack(len(sid), offset, length))
+                f.write(sid)
+            f.write(_TRAILER.pack(index_offset, len(index), MAGIC))
+            size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return len(index), size
+
+
+class SnapshotReader:
+    """
+    Read-only, memory-mapped view of a snapshot.
+
+    Opening only validates the trailer; the index is parsed on first lookup and a
+    session's bytes are copied out only when it is asked for, so restoring doesn't
+    scale with the number of sessions in the file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < len(MAGIC) + _TRAILER.size or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise SnapshotError(f"{path} is not a session snapshot")
+        self._index_offset, self.count, magic = _TRAILER.unpack_from(self._map, len(self._map) - _TRAILER.size)
+        if magic != MAGIC:
+            self._map.close()
+            raise SnapshotError(f"{path} is truncated")
+
+    @cached_property
+    def _index(self) -> Dict[str, Tuple[int, int]]:
+        index = {}
+        pos = self._index_offset
+        for _ in range(self.count):
+            sid_len, offset, length = _INDEX.unpack_from(self._map, pos)
+            pos += _INDEX.size
+            index[self._map[pos:pos + sid_len].decode("utf-8")] = (offset, length)
+            pos += sid_len
+        return index
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._index
+
+    @property
+    def size(self) -> int:
+        return len(self._map)
+
+    def session_ids(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def get(self, session_id: str) -> Optional[bytes]:
+        entry = self._index.get(session_id)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._map[offset:offset + length]
+
+    def close(self) -> None:
+        self._map.close()
@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from ..models.session import Session
+from ..utils.metrics import MetricsRegistry, metrics as default_metrics
+from .base import SessionStore
+from .codec import SessionCodec, SessionView
+from .index import SessionPage, SessionQuery
+from .projections import MessagePage, SessionHeader
+
+logger = logging.getLogger(__name__)
+
+# Marks a pending delete in the dirty map
+_DELETED = object()
+
+
+class StoreBusyError(Exception):
+    """Raised by `save` when the backlog of unflushed sessions doesn't drain in time."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many session writes are pending")
+        self.retry_after = retry_after
+
+
+class WriteBehindSessionStore(SessionStore):
+    """
+    Write-behind layer in front of a (slower, durable) backend store.
+
+    `save` and `delete` are acknowledged once the change is recorded in memory; a
+    single flusher task writes dirty sessions to the backend every `flush_interval`
+    seconds, or as soon as `batch_size` sessions are dirty. Reads see pending changes
+    first, then fall through to the backend.
+
+    - Coalescing: only a session's latest state is kept, so N saves between flushes
+      cost one backend write.
+    - Ordering: there is one flusher and a session is written at most once per
+      flush, so the backend sees each session's changes in order; a save that lands
+      during a flush is written by the next one.
+    - Backpressure: `save` waits while `max_pending` sessions are dirty, for at most
+      `backpressure_timeout` seconds before raising StoreBusyError.
+    - Pending sessions are held encoded by SessionCodec, which also isolates them
+      from later in-place edits by the caller.
+    - Durability: `close()` (called from the app lifespan) flushes everything; a
+      failed write stays dirty and is retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        backend: SessionStore,
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+        max_pending: int = 1000,
+        backpressure_timeout: float = 5.0,
+        codec: Optional[SessionCodec] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.backpressure_timeout = backpressure_timeout
+        self.codec = codec or SessionCodec()
+        self.metrics = metrics or default_metrics
+        # session_id → latest unflushed session (encoded), or _DELETED
+        self._dirty: Dict[str, Union[bytes, object]] = {}
+        self._revisions: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, settings, backend: SessionStore) -> "WriteBehindSessionStore":
+        return cls(
+            backend,
+            flush_interval=settings.write_behind_flush_interval_seconds,
+            batch_size=settings.write_behind_batch_size,
+            max_pending=settings.write_behind_max_pending,
+            backpressure_timeout=settings.write_behind_backpressure_timeout_seconds,
+            codec=SessionCodec(compression=settings.session_compression),
+        )
+
+    # ── Writes ───────────────────────────────────────────────────
+    async def save(self, session: Session) -> None:
+        deadline = time.monotonic() + self.backpressure_timeout
+        while len(self._dirty) >= self.max_pending and session.session_id not in self._dirty:
+            # Backpressure: wait for the flusher rather than grow without bound
+            self.metrics.incr("write_behind.backpressure_waits")
+            self._wake.set()
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.metrics.incr("write_behind.backpressure_timeouts")
+                raise StoreBusyError(retry_after=self.backpressure_timeout) from None
+        self._mark(session.session_id, self.codec.encode(session))
+        self._revisions[session.session_id] = self._revisions.get(session.session_id, 0) + 1
+
+    async def delete(self, session_id: str) -> None:
+        self._mark(session_id, _DELETED)
+        self._revisions.pop(session_id, None)
+
+    def _mark(self, session_id: str, value: Union[bytes, object]) -> None:
+        if self._closed:
+            raise RuntimeError("Write-behind store is closed")
+        self._dirty[session_id] = value
+        self._ensure_flusher()
+        if len(self._dirty) >= self.batch_size:
+            self._wake.set()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run(), name="write-behind-flush")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning(f"Write-behind flush failed: {exc}")
+
+    async def flush(self) -> int:
+        """Write every pending change to the backend; returns how many were written."""
+        written = 0
+        async with self._flush_lock:
+            while self._dirty:
+                batch = dict(list(self._dirty.items())[:self.batch_size])
+                started = time.monotonic()
+                results = await asyncio.gather(
+                    *(self._write(session_id, value) for session_id, value in batch.items()),
+                    return_exceptions=True,
+                )
+                failed = 0
+                for (session_id, value), result in zip(batch.items(), results):
+                    if isinstance(result, BaseException):
+                        failed += 1
+                        logger.warning(f"Write-behind write of session {session_id} failed: {result}")
+                    elif self._dirty.get(session_id) is value:
+                        # Unchanged since the batch was taken; a newer save stays dirty
+                        del self._dirty[session_id]
+                written += len(batch) - failed
+                self.metrics.observe("write_behind.flush_ms", (time.monotonic() - started) * 1000)
+                self.metrics.incr("write_behind.writes", len(batch) - failed)
+                if len(self._dirty) < self.max_pending:
+                    self._drained.set()
+                if failed:
+                    self.metrics.incr("write_behind.failures", failed)
+                    # Retry on the next round rather than spin on a failing backend
+                    break
+            self.metrics.set_gauge("write_behind.pending", len(self._dirty))
+        return written
+
+    async def _write(self, session_id: str, value: Union[bytes, object]) -> None:
+        if value is _DELETED:
+            await self.backend.delete(session_id)
+        else:
+            await self.backend.save(self.codec.decode(value))
+
+    async def close(self) -> None:
+        """Stop the flusher and write everything still pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._dirty:
+            logger.error(f"Write-behind store closed with {len(self._dirty)} unflushed session(s)")
+        self._closed = True
+
+    # ── Reads ────────────────────────────────────────────────────
+    async def get(self, session_id: str) -> Optional[Session]:
+        pending = self._dirty.get(session_id)
+        if pending is _DELETED:
+            return None
+        if pending is not None:
+            return self.codec.decode(pending)
+        return await self.backend.get(session_id)
+
+    async def get_header(self, session_id: str) -> Optional[SessionHeader]:
+        pending = self._dirty.get(session_id)
+        if pending is _DELETED:
+            return None
+        if pending is not None:
+            return SessionHeader.from_view(self.codec.view(pending))
+        return await self.backend.get_header(session_id)
+
+    async def exists(self, session_id: str) -> bool:
+        pending = self._dirty.get(session_id)
+        if pending is not None:
+            return pending is not _DELETED
+        return await self.backend.exists(session_id)
+
+    async def get_messages(
+        self, session_id: str, cursor: Optional[str] = None, limit: int = 50,
+    ) -> Optional[MessagePage]:
+        pending = self._dirty.get(session_id)
+        if pending is _DELETED:
+            return None
+        if pending is not None:
+            return MessagePage.from_view(self.codec.view(pending), cursor, limit)
+        return await self.backend.get_messages(session_id, cursor=cursor, limit=limit)
+
+    async def revision(self, session_id: str) -> Optional[int]:
+        return self._revisions.get(session_id, 0)
+
+    # Listings and full scans go to the backend's indexes, so bring it up to date first
+    async def list_sessions(
+        self, query: Optional[SessionQuery] = None, limit: int = 50, cursor: Optional[str] = None,
+    ) -> SessionPage:
+        await self.flush()
+        return await self.backend.list_sessions(query, limit=limit, cursor=cursor)
+
+    async def views(self) -> List[SessionView]:
+        await self.flush()
+        return await self.backend.views()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.backend.stats(), "write_behind_pending": len(self._dirty)}
+
+    async def memory_usage(self, top: int = 10) -> Dict[str, Any]:
+        return {**await self.backend.memory_usage(top=top), "write_behind_pending": len(self._dirty)}
@@ -0,0 +1,111 @@
+import zlib
+from typing import Any, List
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .static_assets import brotli, compress, negotiate
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+class CompressionMiddleware:
+    """
+    gzip / brotli for HTTP responses of at least `minimum_size` bytes, negotiated from
+    Accept-Encoding (brotli preferred when installed). Responses that already carry a
+    Content-Encoding, such as the precompressed static assets, pass through untouched.
+
+    A single-message body (this API's JSON responses) is compressed whole. A streamed
+    body (`more_body` set on its first chunk) is never buffered: it is gzipped chunk
+    by chunk, each flushed so the client sees it as soon as it is sent, or passed
+    through unchanged if the client doesn't accept gzip. A compressed response's ETag
+    is made weak, so it never matches the identity bytes' strong validator.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate(accept_encoding, self.available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[Message] = []
+        passthrough = False
+        compressor = None  # zlib compressobj once a streamed body starts
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal passthrough, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)
+                if passthrough:
+                    await send(message)
+                else:
+                    start.append(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            if compressor is not None:
+                await self._send_chunk(send, compressor, body, more_body)
+                return
+            if not more_body:
+                await self._finish(send, start[0], body, encoding)
+                return
+            # First chunk of a streamed body
+            if negotiate(accept_encoding, ("gzip",)) is None:
+                passthrough = True
+                headers = MutableHeaders(raw=start[0]["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                await send(start[0])
+                await send(message)
+                return
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+            headers = MutableHeaders(raw=start[0]["headers"])
+            headers["content-encoding"] = "gzip"
+            if "content-length" in headers:
+                del headers["content-length"]
+            _weaken_etag(headers)
+            headers.add_vary_header("Accept-Encoding")
+            await send(start[0])
+            await self._send_chunk(send, compressor, body, more_body)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _send_chunk(send: Send, compressor: Any, body: bytes, more_body: bool) -> None:
+        data = compressor.compress(body)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _finish(self, send: Send, start: Message, body: bytes, encoding: str) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        if len(body) >= self.minimum_size:
+            compressed = compress(body, encoding, brotli_quality=self.brotli_quality, gzip_level=self.gzip_level)
+            if compressed is not None and len(compressed) < len(body):
+                body = compressed
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                _weaken_etag(headers)
+        headers.add_vary_header("Accept-Encoding")
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = f"W/{etag}"
@@ -0,0 +1,21 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_text_atomic(path: str, text: str) -> None:
+    """
+    Replace `path` with `text` in one step. The temporary file has a unique name, so
+    two writers (a periodic save and the one at shutdown) never write into the same
+    file, and one is removed if the write fails.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f"{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
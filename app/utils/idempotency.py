@@ -0,0 +1,91 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .memory import deep_sizeof
+from .single_flight import SingleFlight
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when a key is replayed with a different message than the original."""
+
+
+class TurnDeduplicator:
+    """
+    Replay cache for chat turns keyed by a client-supplied idempotency key.
+
+    Completed results are remembered per session scope in a bounded LRU
+    (sessions × keys per session). A duplicate that arrives while the original
+    turn is still running joins it via SingleFlight instead of starting a new one,
+    so a client retry never triggers extra Claude calls or duplicate messages.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, max_keys_per_session: int = 16):
+        self.max_sessions = max_sessions
+        self.max_keys_per_session = max_keys_per_session
+        self._results: "OrderedDict[str, OrderedDict[str, Tuple[str, Any]]]" = OrderedDict()
+        self._fingerprints: Dict[Tuple[str, str], str] = {}
+        self._flight = SingleFlight()
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        message: str,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        fingerprint = hashlib.sha256(message.encode("utf-8")).hexdigest()
+
+        cached = self._lookup(scope, key)
+        if cached is not None:
+            cached_fingerprint, result = cached
+            self._check_fingerprint(cached_fingerprint, fingerprint)
+            return result
+
+        flight_key = (scope, key)
+        if self._flight.in_flight(flight_key):
+            self._check_fingerprint(self._fingerprints[flight_key], fingerprint)
+        else:
+            self._fingerprints[flight_key] = fingerprint
+
+        async def _run_and_remember() -> Any:
+            try:
+                result = await fn()
+                self._remember(scope, key, fingerprint, result)
+                return result
+            finally:
+                self._fingerprints.pop(flight_key, None)
+
+        return await self._flight.do(flight_key, _run_and_remember)
+
+    def memory_usage(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._results),
+            "entries": sum(len(entries) for entries in self._results.values()),
+            "bytes": deep_sizeof(self._results),
+        }
+
+    def _lookup(self, scope: str, key: str) -> Optional[Tuple[str, Any]]:
+        entries = self._results.get(scope)
+        if entries is None or key not in entries:
+            return None
+        self._results.move_to_end(scope)
+        entries.move_to_end(key)
+        return entries[key]
+
+    def _remember(self, scope: str, key: str, fingerprint: str, result: Any) -> None:
+        entries = self._results.setdefault(scope, OrderedDict())
+        self._results.move_to_end(scope)
+        entries[key] = (fingerprint, result)
+        entries.move_to_end(key)
+        while len(entries) > self.max_keys_per_session:
+            entries.popitem(last=False)
+        while len(self._results) > self.max_sessions:
+            self._results.popitem(last=False)
+
+    @staticmethod
+    def _check_fingerprint(expected: str, actual: str) -> None:
+        if expected != actual:
+            raise IdempotencyKeyConflict(
+                "Idempotency key was already used with a different message"
+            )
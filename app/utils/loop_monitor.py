@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import MetricsRegistry, metrics as default_metrics
+
+logger = logging.getLogger(__name__)
+
+# The request being served ({"scope": ..., "session_id": ...}), so the watchdog thread
+# can attribute a stall to a route and session. Tasks a request spawns (SingleFlight,
+# etc.) inherit it through the context; the watchdog reads it with Task.get_context()
+# on Python 3.12+, and falls back to `_requests` (the request's own task) before that.
+_request: ContextVar[Optional[Dict[str, Any]]] = ContextVar("loop_monitor_request", default=None)
+_requests: Dict[asyncio.Task, Dict[str, Any]] = {}
+
+
+def tag_session(session_id: str) -> None:
+    """Attribute loop stalls in the current request to `session_id` (for ids not in the path)."""
+    request = _request.get()
+    if request is not None:
+        request["session_id"] = session_id
+
+
+class LoopMonitorMiddleware:
+    """Records each request's ASGI scope so LoopMonitor can name the route it blocked in."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        task = asyncio.current_task()
+        if scope["type"] not in ("http", "websocket") or task is None:
+            await self.app(scope, receive, send)
+            return
+        request = {"scope": scope}
+        token = _request.set(request)
+        _requests[task] = request
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _requests.pop(task, None)
+            _request.reset(token)
+
+
+@dataclass
+class BlockedCallback:
+    """One stall of the event loop, with the loop thread's stack while it was blocked."""
+    detected_at: float
+    blocked_ms: float
+    route: Optional[str] = None
+    session_id: Optional[str] = None
+    task: Optional[str] = None
+    stack: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "detected_at": self.detected_at,
+            "blocked_ms": round(self.blocked_ms, 1),
+            "route": self.route,
+            "session_id": self.session_id,
+            "task": self.task,
+            "stack": self.stack,
+        }
+
+
+class LoopBlockedError(AssertionError):
+    """Raised by `loop_budget` when the loop was blocked for longer than the budget."""
+
+
+class LoopMonitor:
+    """
+    Event-loop lag probe plus a slow-callback watchdog.
+
+    The probe is a task that sleeps `interval` seconds and records how late it woke
+    up as the `loop.lag_ms` histogram; anything synchronous on the loop shows up as
+    lag. The watchdog is a thread: when the probe hasn't run for `block_threshold_ms`
+    beyond its interval, the loop is stuck in one callback, so it samples the loop
+    thread's stack right then and attributes it to the request (route, session id)
+    whose task is running. Samples are kept in a bounded ring and logged.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.25,
+        block_threshold_ms: float = 100.0,
+        max_samples: int = 50,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.interval = interval
+        self.block_threshold_ms = block_threshold_ms
+        self.metrics = metrics or default_metrics
+        self.samples: Deque[BlockedCallback] = deque(maxlen=max_samples)
+        self.max_lag_ms = 0.0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = time.monotonic()
+        self._pending: Optional[BlockedCallback] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings) -> "LoopMonitor":
+        return cls(
+            interval=settings.loop_monitor_interval_seconds,
+            block_threshold_ms=settings.loop_block_threshold_ms,
+        )
+
+    def start(self) -> None:
+        """Start the probe on the running loop and the watchdog thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._probe_task = asyncio.create_task(self._probe(), name="loop-lag-probe")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _probe(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            with self._lock:
+                # Measured from the previous beat (or start()), so a stall before the
+                # probe's first run still counts
+                lag_ms = max(0.0, (now - self._beat - self.interval) * 1000)
+                self._beat = now
+                self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+                if self._pending is not None:
+                    # The stall is over; record how long it really lasted
+                    self._pending.blocked_ms = max(self._pending.blocked_ms, lag_ms)
+                    logger.warning(self._describe(self._pending))
+                    self._pending = None
+            self.metrics.observe("loop.lag_ms", lag_ms)
+
+    def _watch(self) -> None:
+        threshold = self.block_threshold_ms / 1000
+        poll = max(0.005, min(threshold, self.interval) / 4)
+        while not self._stopped.wait(poll):
+            with self._lock:
+                stalled = time.monotonic() - self._beat - self.interval
+                if stalled < threshold or self._pending is not None:
+                    continue
+                sample = self._sample(stalled * 1000)
+                self._pending = sample
+                self.samples.append(sample)
+            self.metrics.incr("loop.blocked")
+
+    def _sample(self, blocked_ms: float) -> BlockedCallback:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame)[-12:] if frame is not None else []
+        sample = BlockedCallback(detected_at=time.time(), blocked_ms=blocked_ms, stack=stack)
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return sample
+        sample.task = task.get_name()
+        request = _requests.get(task)
+        if request is None and hasattr(task, "get_context"):
+            request = task.get_context().get(_request)
+        if request is not None:
+            # Routing fills in "path_params" on the same scope dict
+            scope = request["scope"]
+            sample.route = f"{scope.get('method', 'WS')} {scope['path']}"
+            sample.session_id = request.get("session_id") or (scope.get("path_params") or {}).get("session_id")
+        return sample
+
+    @staticmethod
+    def _describe(sample: BlockedCallback) -> str:
+        where = "".join(sample.stack[-3:]).rstrip()
+        return (
+            f"Event loop blocked for {sample.blocked_ms:.0f} ms | route={sample.route} "
+            f"| session={sample.session_id} | task={sample.task}\n{where}"
+        )
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [s.to_dict() for s in self.samples]
+        return {
+            "interval_seconds": self.interval,
+            "block_threshold_ms": self.block_threshold_ms,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "lag_ms": self.metrics.snapshot()["histograms"].get("loop.lag_ms"),
+            "blocked": samples,
+        }
+
+
+@asynccontextmanager
+async def loop_budget(budget_ms: float, interval: float = 0.005):
+    """
+    Test mode: fail with LoopBlockedError if anything inside the block holds the event
+    loop for longer than `budget_ms`, e.g.
+
+        async with loop_budget(50):
+            await client.get(f"/api/v1/session/{session_id}/plan")
+    """
+    monitor = LoopMonitor(interval=interval, block_threshold_ms=budget_ms, metrics=MetricsRegistry())
+    monitor.start()
+    try:
+        yield monitor
+        # Let the probe wake once more so a stall at the very end is measured
+        await asyncio.sleep(interval * 2)
+    finally:
+        monitor.stop()
+    if monitor.max_lag_ms > budget_ms:
+        details = "\n\n".join(LoopMonitor._describe(s) for s in monitor.samples)
+        raise LoopBlockedError(
+            f"Event loop blocked for {monitor.max_lag_ms:.0f} ms (budget {budget_ms:.0f} ms)\n{details}"
+        )
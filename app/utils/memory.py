@@ -0,0 +1,138 @@
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from ..storage.base import SessionStore
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size; peak RSS where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def deep_sizeof(obj: Any, limit: int = 100_000) -> int:
+    """
+    Approximate bytes reachable from `obj`: containers, Pydantic models and plain
+    objects are walked, shared objects counted once. Stops after `limit` objects so a
+    debug request stays bounded.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, Enum)) or item is None:
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, BaseModel):
+            stack.append(item.__dict__)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+
+class TracemallocTracker:
+    """
+    On-demand tracemalloc snapshots, diffed to find what grew between two points in
+    time. Tracing costs memory and CPU on every allocation, so it only runs between
+    the first `take()` and `stop()`.
+    """
+
+    def __init__(self, max_snapshots: int = 8):
+        self.max_snapshots = max_snapshots
+        self._snapshots: Dict[int, tracemalloc.Snapshot] = {}
+        self._next_id = 1
+        self._started_here = False
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def take(self, frames: int = 1) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_here = True
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._snapshots[snapshot_id] = snapshot
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.pop(min(self._snapshots))
+        current, peak = tracemalloc.get_traced_memory()
+        return {"id": snapshot_id, "traced_bytes": current, "traced_peak_bytes": peak}
+
+    def diff(self, base: int, current: int, top: int = 20) -> List[Dict[str, Any]]:
+        """Top allocation sites by growth from snapshot `base` to `current`."""
+        try:
+            before, after = self._snapshots[base], self._snapshots[current]
+        except KeyError as exc:
+            raise KeyError(f"Unknown snapshot {exc.args[0]}") from exc
+        stats = after.compare_to(before, "lineno")
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in stats[:top]
+        ]
+
+    def snapshot_ids(self) -> List[int]:
+        return sorted(self._snapshots)
+
+    def stop(self) -> None:
+        self._snapshots.clear()
+        if self._started_here and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_here = False
+
+
+async def sample_memory(store: "SessionStore") -> None:
+    """Periodic job: RSS and session store size as gauges plus one log line."""
+    rss = rss_bytes()
+    stats = store.stats()
+    if rss is not None:
+        metrics.set_gauge("memory.rss_bytes", rss)
+    for name, value in stats.items():
+        metrics.set_gauge(f"memory.store_{name}", value)
+    rss_mb = f"{rss / 2**20:.1f} MiB" if rss is not None else "n/a"
+    logger.info(
+        f"Memory: rss={rss_mb} | sessions={stats.get('sessions', '?')} "
+        f"| resident_bytes={stats.get('resident_bytes', '?')}"
+    )
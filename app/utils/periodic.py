@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def run_periodically(interval: float, job: Callable[[], Awaitable[object]], name: str) -> asyncio.Task:
+    """
+    Run `job` every `interval` seconds until the returned task is cancelled.
+    Failures are logged and the loop carries on.
+
+    Cancelling doesn't interrupt a run in progress: work it handed to a thread can't
+    be stopped, so the task finishes that run before it ends. Awaiting the cancelled
+    task therefore means the job is no longer running.
+    """
+
+    async def _loop() -> None:
+        while True:
+            await asyncio.sleep(interval)
+            run = asyncio.ensure_future(job())
+            try:
+                await asyncio.shield(run)
+            except asyncio.CancelledError:
+                await asyncio.gather(run, return_exceptions=True)
+                raise
+            except Exception as exc:
+                logger.warning(f"Periodic job {name} failed: {exc}")
+
+    return asyncio.create_task(_loop(), name=name)
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelResponse(JSONResponse):
+    """
+    JSON response for a Pydantic model we built ourselves.
+
+    Returning a Response from a route makes FastAPI skip its `response_model`
+    pass (validate the object again, dump it to Python, walk that through
+    jsonable_encoder, then json.dumps it); the model is serialized to bytes in one
+    pass by pydantic-core instead. The route's `response_model` still documents the
+    body in OpenAPI. Non-model content falls back to the standard JSON rendering.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return super().render(content)
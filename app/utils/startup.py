@@ -0,0 +1,53 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """
+    Per-phase startup timing, in the spirit of `python -X importtime`.
+
+    `mark(name)` closes a sequential phase (time since the previous mark);
+    `phase(name)` times a block that may overlap others, such as the background
+    warm-up. Each phase is also published as a `startup.<name>_ms` gauge.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self._last = self.origin
+        self.phases: List[Tuple[str, float]] = []
+
+    def _record(self, name: str, ms: float) -> None:
+        self.phases.append((name, ms))
+        metrics.set_gauge(f"startup.{name}_ms", round(ms, 1))
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self._record(name, (now - self._last) * 1000)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, (time.perf_counter() - started) * 1000)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    def report(self, title: str) -> None:
+        width = max((len(name) for name, _ in self.phases), default=0)
+        lines = [f"  {name:<{width}}  {ms:8.1f} ms" for name, ms in self.phases]
+        logger.info(f"{title} ({self.elapsed_ms:.0f} ms since import):\n" + "\n".join(lines))
+
+
+# Created when app.main starts importing, so marks measure from there
+startup = StartupProfile()
@@ -0,0 +1,180 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`python -m app.utils.static_assets` (run by the Render build) writes each asset in
+app/static as `<name>.<hash>.<ext>` plus `.gz` / `.br` variants and a manifest into
+app/static/dist. At runtime the manifest is loaded from there; without a build the
+same variants are produced in memory on first use.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+try:  # optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST = "manifest.json"
+
+# Assets referenced from the HTML shell as /static/<name>
+FINGERPRINTED = ("app.css", "app.js")
+ASSET_PREFIX = "/assets/"
+CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+}
+
+
+def compress(data: bytes, encoding: str, brotli_quality: int = 11, gzip_level: int = 9) -> Optional[bytes]:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality) if brotli is not None else None
+    if encoding == "gzip":
+        # mtime=0 keeps the output (and so its ETag) deterministic
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    return None
+
+
+def negotiate(accept_encoding: str, available) -> Optional[str]:
+    """Best encoding the client accepts among `available` (brotli preferred), or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if re.search(r"q=0(\.0*)?\s*$", params):
+            continue
+        accepted.add(token.strip())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+@dataclass
+class Asset:
+    content_type: str
+    etag: str
+    # encoding ("identity", "gzip", "br") → bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, data: bytes, content_type: str) -> "Asset":
+        digest = hashlib.sha256(data).hexdigest()
+        asset = cls(content_type=content_type, etag=f'"{digest[:16]}"', variants={"identity": data})
+        for encoding in ("br", "gzip"):
+            compressed = compress(data, encoding)
+            # Only keep variants that actually save bytes
+            if compressed is not None and len(compressed) < len(data):
+                asset.variants[encoding] = compressed
+        return asset
+
+    def select(self, accept_encoding: str):
+        """(encoding or None, body) for a request's Accept-Encoding header."""
+        encoding = negotiate(accept_encoding, self.variants)
+        return encoding, self.variants[encoding or "identity"]
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Each variant is a different representation, so each gets its own strong ETag."""
+        return self.etag if not encoding else f'{self.etag[:-1]}-{encoding}"'
+
+
+class StaticAssets:
+    """The HTML shell (with fingerprinted asset URLs) and the fingerprinted assets."""
+
+    def __init__(self, static_dir: Path = STATIC_DIR, dist_dir: Path = DIST_DIR):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self.assets: Dict[str, Asset] = {}
+        self.shell: Optional[Asset] = None
+
+    @classmethod
+    def load(cls, static_dir: Path = STATIC_DIR, dist_dir: Path = DIST_DIR) -> "StaticAssets":
+        assets = cls(static_dir, dist_dir)
+        if not assets._load_dist():
+            assets._build()
+        return assets
+
+    def _build(self) -> None:
+        urls = {}
+        for name in FINGERPRINTED:
+            source = self.static_dir / name
+            if not source.exists():
+                continue
+            data = source.read_bytes()
+            stem, ext = name.rsplit(".", 1)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.{ext}"
+            self.assets[hashed] = Asset.build(data, CONTENT_TYPES["." + ext])
+            urls[f"/static/{name}"] = ASSET_PREFIX + hashed
+
+        html = (self.static_dir / "index.html").read_text(encoding="utf-8")
+        for plain, hashed in urls.items():
+            html = html.replace(f'"{plain}"', f'"{hashed}"')
+        self.shell = Asset.build(html.encode("utf-8"), CONTENT_TYPES[".html"])
+
+    def _load_dist(self) -> bool:
+        manifest_path = self.dist_dir / MANIFEST
+        if not manifest_path.exists():
+            return False
+        manifest = json.loads(manifest_path.read_text())
+        # A manifest from an older build would point at stale bytes
+        if manifest.get("source_hash") != self._source_hash():
+            logger.warning("Static build is out of date with app/static; rebuilding in memory")
+            return False
+        for name, entry in manifest["files"].items():
+            asset = Asset(content_type=entry["content_type"], etag=entry["etag"])
+            for encoding, filename in entry["variants"].items():
+                asset.variants[encoding] = (self.dist_dir / filename).read_bytes()
+            if name == "index.html":
+                self.shell = asset
+            else:
+                self.assets[name] = asset
+        return self.shell is not None
+
+    def _source_hash(self) -> str:
+        digest = hashlib.sha256()
+        for name in ("index.html",) + FINGERPRINTED:
+            path = self.static_dir / name
+            if path.exists():
+                digest.update(name.encode() + b"\0" + path.read_bytes())
+        return digest.hexdigest()
+
+    def write(self) -> None:
+        """Write every variant and the manifest to dist_dir (the build step)."""
+        self._build()
+        self.dist_dir.mkdir(parents=True, exist_ok=True)
+        suffixes = {"identity": "", "gzip": ".gz", "br": ".br"}
+        files = {}
+        for name, asset in [("index.html", self.shell), *self.assets.items()]:
+            variants = {}
+            for encoding, data in asset.variants.items():
+                filename = name + suffixes[encoding]
+                (self.dist_dir / filename).write_bytes(data)
+                variants[encoding] = filename
+            files[name] = {"content_type": asset.content_type, "etag": asset.etag, "variants": variants}
+        manifest = {"source_hash": self._source_hash(), "files": files}
+        (self.dist_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+
+@lru_cache()
+def get_static_assets() -> StaticAssets:
+    """Loaded on first use (or by the startup warm-up), not at import."""
+    return StaticAssets.load()
+
+
+if __name__ == "__main__":
+    assets = StaticAssets()
+    assets.write()
+    print(f"Wrote {len(assets.assets) + 1} static assets to {assets.dist_dir}")
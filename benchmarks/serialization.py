@@ -0,0 +1,118 @@
+"""
+Response serialization: FastAPI's `response_model` path vs ModelResponse.
+
+    python -m benchmarks.serialization [--milestones 40] [--tasks 25] [--subtasks 4]
+
+The `response_model` path is reproduced step by step as FastAPI runs it for a
+route that returns a model: build the response with a `model_dump()`ed plan,
+validate it against the response field, dump it to JSON-compatible Python, then
+`json.dumps` it in JSONResponse. The fast path hands the compiled plan to
+ModelResponse, which serializes it once with `model_dump_json`.
+"""
+import argparse
+import json
+import time
+from typing import Callable
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.api_schemas import PlanResponse
+from app.models.plan import GovernanceInfo, KPI, Milestone, Pillar, ProjectPlan, Risk, SubTask, Task
+from app.utils.responses import ModelResponse
+
+
+def build_plan(milestones: int, tasks: int, subtasks: int) -> ProjectPlan:
+    return ProjectPlan(
+        project_name="Benchmark Programme",
+        project_type="software",
+        success_definition="Every workstream delivered on schedule",
+        deadline="Q4 2027",
+        budget="$12,000,000",
+        team_size=120,
+        methodology="Agile",
+        pillars=[Pillar(name=f"Workstream {p}", milestones=[
+            Milestone(
+                name=f"Milestone {p}.{m}",
+                deliverable="Signed-off release",
+                timeline=f"Month {m + 1}",
+                owner="Programme Lead",
+                tasks=[
+                    Task(
+                        name=f"Task {p}.{m}.{t}",
+                        owner="Engineer",
+                        timeline=f"Week {t + 1}",
+                        duration_days=5,
+                        dependencies=[f"Task {p}.{m}.{t - 1}"] if t else [],
+                        subtasks=[
+                            SubTask(
+                                name=f"Subtask {p}.{m}.{t}.{s}",
+                                owner="Engineer",
+                                deliverable="Merged change — reviewed ✓",
+                            )
+                            for s in range(subtasks)
+                        ],
+                    )
+                    for t in range(tasks)
+                ],
+            )
+            for m in range(milestones // 4)
+        ]) for p in range(4)],
+        governance=GovernanceInfo(
+            stakeholders=["CEO", "CTO", "CFO"],
+            kpis=[KPI(metric=f"KPI {k}", target="95%") for k in range(20)],
+            risks=[Risk(description=f"Risk {r}", severity="high", mitigation="Weekly review") for r in range(20)],
+        ),
+    )
+
+
+def response_model_path(plan: ProjectPlan, markdown: str) -> bytes:
+    adapter = TypeAdapter(PlanResponse)
+    response = PlanResponse(session_id="bench", plan_json=plan.model_dump(), plan_markdown=markdown)
+    validated = adapter.validate_python(response, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def model_response_path(plan: ProjectPlan, markdown: str) -> bytes:
+    return ModelResponse(PlanResponse.model_construct(
+        session_id="bench", plan_json=plan, plan_markdown=markdown,
+    )).body
+
+
+def best_of(fn: Callable[[], bytes], repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--milestones", type=int, default=40)
+    parser.add_argument("--tasks", type=int, default=25)
+    parser.add_argument("--subtasks", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    plan = build_plan(args.milestones, args.tasks, args.subtasks)
+    markdown = "# Benchmark Programme\n" + "- task\n" * 5000
+
+    slow = response_model_path(plan, markdown)
+    fast = model_response_path(plan, markdown)
+    # Same document either way; only the whitespace between tokens differs
+    assert json.loads(slow) == json.loads(fast)
+
+    task_count = sum(len(m.tasks) for p in plan.pillars for m in p.milestones)
+    print(f"Plan: {task_count} tasks, {len(fast) / 1024:.0f} KiB of JSON")
+    baseline = best_of(lambda: response_model_path(plan, markdown), args.repeat, args.number)
+    optimized = best_of(lambda: model_response_path(plan, markdown), args.repeat, args.number)
+    print(f"  response_model path  {baseline:8.2f} ms")
+    print(f"  ModelResponse        {optimized:8.2f} ms  ({baseline / optimized:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
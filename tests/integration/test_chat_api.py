@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import dependencies
+from app.main import app
+from tests.unit.test_background_extraction import FakeMessages
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def fake_claude():
+    app.dependency_overrides[dependencies.get_claude_client] = lambda: SimpleNamespace(messages=FakeMessages())
+    yield
+    app.dependency_overrides.pop(dependencies.get_claude_client, None)
+
+
+def client_at(host: str) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app, client=(host, 1234)), base_url="http://test")
+
+
+async def test_idempotency_keys_are_scoped_to_the_client(fake_claude):
+    headers = {"Idempotency-Key": "first-turn"}
+    async with client_at("203.0.113.1") as alice, client_at("203.0.113.2") as bob:
+        first = await alice.post("/api/v1/chat", json={"message": "We're building Atlas"}, headers=headers)
+        replay = await alice.post("/api/v1/chat", json={"message": "We're building Atlas"}, headers=headers)
+        other = await bob.post("/api/v1/chat", json={"message": "We're building Hermes"}, headers=headers)
+
+    assert first.status_code == replay.status_code == other.status_code == 200
+    assert replay.json()["session_id"] == first.json()["session_id"]
+    assert other.json()["session_id"] != first.json()["session_id"]
@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from starlette.testclient import TestClient
+
+from app import dependencies
+from app.main import app
+from app.models.session import Session
+from tests.unit.test_background_extraction import OUTCOME
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def get_final_message(self):
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="".join(self.chunks))])
+
+
+class StreamingMessages:
+    def stream(self, **kwargs):
+        return FakeStream(["Sounds ", "good."])
+
+    async def create(self, **kwargs):
+        return SimpleNamespace(content=[SimpleNamespace(type="tool_use", input=OUTCOME)])
+
+
+@pytest.fixture
+def ws_client():
+    app.dependency_overrides[dependencies.get_claude_client] = lambda: SimpleNamespace(messages=StreamingMessages())
+    yield TestClient(app)
+    app.dependency_overrides.pop(dependencies.get_claude_client, None)
+
+
+def receive_until(ws, event_type):
+    events = []
+    while True:
+        event = ws.receive_json()
+        events.append(event)
+        if event["type"] in (event_type, "error"):
+            return events
+
+
+def test_ws_streams_reply_and_pushes_stage_change(ws_client):
+    with ws_client.websocket_connect("/api/v1/ws/chat") as ws:
+        hello = ws.receive_json()
+        assert hello["type"] == "session"
+        assert hello["current_stage"] == "define_outcome"
+
+        ws.send_json({"type": "message", "message": "We're building Atlas"})
+        events = receive_until(ws, "reply")
+
+    kinds = [e["type"] for e in events]
+    assert kinds == ["reply_delta", "reply_delta", "stage_changed", "reply"]
+    assert "".join(e["text"] for e in events if e["type"] == "reply_delta") == "Sounds good."
+    assert events[2]["to_stage"] == "strategic_constraints"
+    assert events[-1]["current_stage"] == "strategic_constraints"
+    assert events[-1]["reply"].startswith("Sounds good.")
+
+
+def test_ws_resumes_existing_session_and_answers_ping(ws_client):
+    session = Session()
+    with ws_client.websocket_connect(f"/api/v1/ws/chat?session_id={session.session_id}") as ws:
+        assert ws.receive_json()["type"] == "error"
+
+    asyncio.run(dependencies.get_session_store().save(session))
+    with ws_client.websocket_connect(f"/api/v1/ws/chat?session_id={session.session_id}") as ws:
+        assert ws.receive_json()["session_id"] == session.session_id
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+        ws.send_json({"type": "message", "message": "  "})
+        assert ws.receive_json()["status"] == 400
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from app import dependencies
+from app.config import get_settings
+from tests.unit.test_archival import build_old_session
+
+
+pytestmark = pytest.mark.anyio
+
+TOKEN = {"X-Debug-Token": "secret"}
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "debug_token", "secret")
+    yield
+    dependencies.get_tracemalloc_tracker().stop()
+
+
+async def test_debug_routes_are_hidden_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "debug_token", "")
+    assert (await client.get("/debug/memory", headers=TOKEN)).status_code == 404
+
+    monkeypatch.setattr(get_settings(), "debug_token", "secret")
+    assert (await client.get("/debug/memory")).status_code == 403
+    assert (await client.get("/debug/memory", headers={"X-Debug-Token": "wrong"})).status_code == 403
+
+
+async def test_memory_report_lists_largest_sessions(client, debug_token):
+    session = build_old_session()
+    session.messages[0].content = os.urandom(25_000).hex()  # incompressible
+    await dependencies.get_session_store().save(session)
+
+    res = await client.get("/debug/memory", headers=TOKEN, params={"top": 1})
+
+    assert res.status_code == 200
+    body = res.json()
+    largest = body["session_store"]["largest_sessions"][0]
+    assert largest["session_id"] == session.session_id
+    assert largest["message_count"] == 4
+    assert largest["messages"] > largest["stage_data"]
+    assert body["session_store"]["resident_bytes"]["total"] >= largest["total"]
+    assert "turn_deduplicator" in body["caches"]
+
+
+async def test_tracemalloc_snapshots_diff(client, debug_token):
+    first = (await client.post("/debug/memory/snapshots", headers=TOKEN)).json()
+    hoard = [bytearray(1024) for _ in range(200)]  # noqa: F841 - kept alive for the diff
+    second = (await client.post("/debug/memory/snapshots", headers=TOKEN)).json()
+
+    res = await client.get(f"/debug/memory/snapshots/{first['id']}/diff/{second['id']}", headers=TOKEN)
+    assert res.status_code == 200
+    assert any("test_debug_api.py" in row["location"] for row in res.json()["top"])
+
+    assert (await client.get(f"/debug/memory/snapshots/{first['id']}/diff/999", headers=TOKEN)).status_code == 404
+    assert (await client.delete("/debug/memory/snapshots", headers=TOKEN)).status_code == 204
+    assert not dependencies.get_tracemalloc_tracker().tracing
@@ -0,0 +1,156 @@
+import json
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app import dependencies
+from app.agent import plan_compiler
+from app.agent.admission import AdmissionController
+from app.agent.archival import SessionArchiver
+from app.main import app
+from app.storage.archive import TranscriptArchive
+from app.utils.metrics import MetricsRegistry
+from tests.unit.test_plan_compiler import build_complete_session
+from tests.unit.test_plan_import import plan_dict
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_get_plan_returns_json_and_markdown(client):
+    session = build_complete_session()
+    await dependencies.get_session_store().save(session)
+
+    res = await client.get(f"/api/v1/session/{session.session_id}/plan")
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["plan_json"]["project_name"] == "Test Project"
+    assert body["plan_markdown"].startswith("# Test Project")
+
+
+async def test_concurrent_plan_requests_share_one_compile(client, monkeypatch):
+    session = build_complete_session()
+    await dependencies.get_session_store().save(session)
+
+    compiles = []
+    original = plan_compiler.PlanCompiler.compile
+
+    def counting_compile(self, s):
+        compiles.append(s.session_id)
+        return original(self, s)
+
+    monkeypatch.setattr(plan_compiler.PlanCompiler, "compile", counting_compile)
+
+    url = f"/api/v1/session/{session.session_id}/plan"
+    responses = await asyncio.gather(*(client.get(url) for _ in range(5)))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["plan_markdown"] for r in responses}) == 1
+    assert len(compiles) < 5
+
+
+async def test_incomplete_session_is_rejected(client):
+    session = build_complete_session()
+    session.is_complete = False
+    await dependencies.get_session_store().save(session)
+
+    res = await client.get(f"/api/v1/session/{session.session_id}/plan")
+    assert res.status_code == 422
+
+
+async def test_archived_session_serves_cached_plan(client, monkeypatch, tmp_path):
+    store = dependencies.get_session_store()
+    session = build_complete_session()
+    archiver = SessionArchiver(store, TranscriptArchive(str(tmp_path)), archive_after=timedelta(0))
+    await archiver.archive_session(session)
+    await store.save(session)
+
+    def fail_compile(self, s):
+        raise AssertionError("archived plans should not be recompiled")
+
+    monkeypatch.setattr(plan_compiler.PlanCompiler, "compile", fail_compile)
+    res = await client.get(f"/api/v1/session/{session.session_id}/plan")
+    assert res.status_code == 200
+    assert res.json()["plan_json"]["project_name"] == "Test Project"
+
+
+async def test_plan_response_matches_model_dump_and_stays_documented(client):
+    session = build_complete_session()
+    await dependencies.get_session_store().save(session)
+
+    res = await client.get(f"/api/v1/session/{session.session_id}/plan")
+
+    plan = plan_compiler.PlanCompiler().compile(session)
+    expected = plan.model_dump(mode="json")
+    # generated_at is stamped per compile
+    assert {**res.json()["plan_json"], "generated_at": None} == {**expected, "generated_at": None}
+
+    schema = (await client.get("/openapi.json")).json()
+    plan_route = schema["paths"]["/api/v1/session/{session_id}/plan"]["get"]
+    assert plan_route["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/PlanResponse"
+    }
+    assert "ChatResponse" in schema["components"]["schemas"]
+
+
+async def test_import_ndjson_batch_creates_completed_sessions(client):
+    lines = [json.dumps(plan_dict(reference=f"r{i}")) for i in range(50)] + ["{}"]
+    res = await client.post(
+        "/api/v1/plans/import",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["imported"], body["failed"]) == (50, 1)
+    assert body["results"][-1]["error"]
+    plan = await client.get(f"/api/v1/session/{body['results'][0]['session_id']}/plan")
+    assert plan.json()["plan_json"]["project_name"] == "Test Project"
+
+
+async def test_import_json_body(client):
+    res = await client.post("/api/v1/plans/import", json=plan_dict(reference="one"))
+    assert res.json()["results"][0]["reference"] == "one"
+
+    res = await client.post("/api/v1/plans/import", json=[plan_dict(), plan_dict()])
+    assert res.json()["imported"] == 2
+
+    res = await client.post("/api/v1/plans/import", content=b"a,b", headers={"Content-Type": "text/csv"})
+    assert res.status_code == 415
+
+
+async def test_import_over_the_plan_limit_is_refused(client, monkeypatch):
+    monkeypatch.setattr(dependencies.get_plan_importer(), "max_plans", 2)
+    res = await client.post("/api/v1/plans/import", json=[plan_dict() for _ in range(3)])
+    assert res.status_code == 413
+
+
+async def test_ndjson_over_the_plan_limit_returns_what_was_imported(client, monkeypatch):
+    monkeypatch.setattr(dependencies.get_plan_importer(), "max_plans", 2)
+    res = await client.post(
+        "/api/v1/plans/import",
+        content="\n".join(json.dumps(plan_dict(reference=f"r{i}")) for i in range(3)).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["imported"], body["failed"]) == (2, 1)
+    assert "limit" in body["results"][-1]["error"]
+    for item in body["results"][:2]:
+        assert (await client.get(f"/api/v1/session/{item['session_id']}/plan")).status_code == 200
+
+
+async def test_imports_are_rate_limited(client):
+    admission = AdmissionController(rate_per_minute=1, burst=1, metrics=MetricsRegistry())
+    app.dependency_overrides[dependencies.get_admission_controller] = lambda: admission
+    try:
+        assert (await client.post("/api/v1/plans/import", json=plan_dict())).status_code == 200
+        res = await client.post("/api/v1/plans/import", json=plan_dict())
+    finally:
+        app.dependency_overrides.pop(dependencies.get_admission_controller, None)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
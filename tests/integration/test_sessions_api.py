@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+import pytest
+
+from app import dependencies
+from app.agent.archival import SessionArchiver
+from app.config import get_settings
+from app.main import app
+from app.storage.archive import TranscriptArchive
+from app.storage.codec import SessionView
+from tests.unit.test_archival import build_old_session
+from tests.unit.test_plan_compiler import build_complete_session
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def debug_token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "debug_token", "secret")
+    return {"X-Debug-Token": "secret"}
+
+
+async def test_list_sessions_requires_the_debug_token(client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "debug_token", "")
+    assert (await client.get("/api/v1/sessions")).status_code == 404
+    monkeypatch.setattr(get_settings(), "debug_token", "secret")
+    assert (await client.get("/api/v1/sessions")).status_code == 403
+
+
+async def test_list_sessions_filters_and_paginates(client, debug_token):
+    session = build_complete_session()
+    session.stage_data.define_outcome.project_name = "Listing Probe"
+    await dependencies.get_session_store().save(session)
+
+    res = await client.get("/api/v1/sessions", params={"is_complete": "true", "project_name": "listing probe"}, headers=debug_token)
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["total"] == 1
+    assert body["sessions"][0]["session_id"] == session.session_id
+    assert body["sessions"][0]["project_name"] == "Listing Probe"
+
+    res = await client.get("/api/v1/sessions", params={"limit": 1}, headers=debug_token)
+    assert len(res.json()["sessions"]) == 1
+
+
+async def test_list_sessions_rejects_bad_cursor(client, debug_token):
+    res = await client.get("/api/v1/sessions", params={"cursor": "%%%"}, headers=debug_token)
+    assert res.status_code == 400
+
+
+async def test_summary_and_delete_do_not_decode_messages(client, monkeypatch):
+    session = build_old_session()
+    await dependencies.get_session_store().save(session)
+
+    def fail_decode(self, start=0, stop=None):
+        raise AssertionError("messages should not be decoded")
+
+    monkeypatch.setattr(SessionView, "messages", fail_decode)
+    res = await client.get(f"/api/v1/session/{session.session_id}")
+    assert res.status_code == 200
+    assert res.json()["current_stage"] == session.current_stage.value
+
+    assert (await client.delete(f"/api/v1/session/{session.session_id}")).status_code == 204
+    assert (await client.delete(f"/api/v1/session/{session.session_id}")).status_code == 404
+
+
+async def test_messages_are_paginated_with_a_cursor(client):
+    session = build_old_session()
+    await dependencies.get_session_store().save(session)
+    url = f"/api/v1/session/{session.session_id}/messages"
+
+    first = (await client.get(url, params={"limit": 3})).json()
+    assert first["total"] == 4
+    assert [m["content"] for m in first["messages"]] == ["message 0", "message 1", "message 2"]
+    assert first["messages"][0]["stage"] == "define_outcome"
+
+    rest = (await client.get(url, params={"limit": 3, "cursor": first["next_cursor"]})).json()
+    assert [m["content"] for m in rest["messages"]] == ["message 3"]
+    assert rest["next_cursor"] is None
+
+    assert (await client.get(url, params={"cursor": "bm9wZQ=="})).status_code == 400
+    assert (await client.get("/api/v1/session/missing/messages")).status_code == 404
+
+
+async def test_archived_transcript_is_paged_from_the_archive(client, tmp_path):
+    store = dependencies.get_session_store()
+    archiver = SessionArchiver(store, TranscriptArchive(str(tmp_path)), archive_after=timedelta(0))
+    session = build_old_session()
+    await archiver.archive_session(session)
+    await store.save(session)
+
+    app.dependency_overrides[dependencies.get_session_archiver] = lambda: archiver
+    try:
+        res = await client.get(f"/api/v1/session/{session.session_id}/messages", params={"limit": 2})
+    finally:
+        app.dependency_overrides.pop(dependencies.get_session_archiver, None)
+
+    body = res.json()
+    assert body["total"] == 4
+    assert [m["content"] for m in body["messages"]] == ["message 0", "message 1"]
+    archiver.archive.close()
@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.utils.compression import CompressionMiddleware
+from app.utils.static_assets import StaticAssets
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shell_references_fingerprinted_assets_and_revalidates(client):
+    res = await client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["cache-control"] == "no-cache"
+    assert "/assets/app." in res.text
+    assert '"/static/app.js"' not in res.text
+
+    etag = res.headers["etag"]
+    res = await client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+    # The identity bytes are a different representation with their own validator
+    identity = await client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert identity.status_code == 200
+    assert identity.headers["etag"] != etag
+
+
+async def test_fingerprinted_asset_is_immutable(client):
+    name = next(n for n in StaticAssets.load().assets if n.endswith(".js"))
+    res = await client.get(f"/assets/{name}", headers={"Accept-Encoding": "identity"})
+    assert res.status_code == 200
+    assert "immutable" in res.headers["cache-control"]
+    assert "content-encoding" not in res.headers
+    assert "sendMessageText" in res.text
+
+    assert (await client.get("/assets/app.0000.js")).status_code == 404
+
+
+async def test_large_api_responses_are_compressed(client):
+    res = await client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["vary"]
+    assert res.json()["info"]["title"] == "Project Planning Agent"
+
+    small = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+async def test_streamed_responses_are_gzipped_chunk_by_chunk():
+    probe = FastAPI()
+    sent = []
+
+    @probe.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield f'{{"line": {i}}}\n'.encode() * 200
+        return StreamingResponse(lines(), media_type="application/json")
+
+    @probe.get("/tagged")
+    async def tagged():
+        return JSONResponse({"data": "x" * 4000}, headers={"ETag": '"abc"'})
+
+    async def app(scope, receive, send):
+        async def record(message):
+            sent.append(message)
+            await send(message)
+        await CompressionMiddleware(probe, minimum_size=100)(scope, receive, record)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        res = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.text.count('"line": 2') == 200
+        bodies = [m for m in sent if m["type"] == "http.response.body"]
+        # One compressed message per chunk as it arrives, not one buffered body
+        assert len(bodies) == 4 and all(m["body"] for m in bodies[:3])
+        assert gzip.decompress(b"".join(m["body"] for m in bodies)).count(b'"line": 1') == 200
+
+        sent.clear()
+        res = await client.get("/stream", headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in res.headers
+        assert res.text.count('"line": 0') == 200
+
+        res = await client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.headers["etag"] == 'W/"abc"'
+
+
+def test_build_writes_manifest_that_load_reuses(tmp_path):
+    built = StaticAssets(dist_dir=tmp_path)
+    built.write()
+    assert (tmp_path / "manifest.json").exists()
+    assert (tmp_path / "index.html.gz").exists()
+
+    loaded = StaticAssets.load(dist_dir=tmp_path)
+    assert loaded.shell.etag == built.shell.etag
+    assert set(loaded.assets) == set(built.assets)
@@ -0,0 +1,67 @@
+import pytest
+
+from app import dependencies
+from tests.unit.test_archival import build_old_session
+from tests.unit.test_plan_compiler import build_complete_session
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def templates_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(dependencies.get_template_registry(), "path", str(tmp_path / "templates.json"))
+
+
+async def test_template_from_session_seeds_new_sessions(client):
+    source = build_complete_session()
+    await dependencies.get_session_store().save(source)
+
+    res = await client.post("/api/v1/templates", json={
+        "name": "Agile rollout",
+        "session_id": source.session_id,
+        "stages": ["strategic_constraints", "phases_and_milestones"],
+    })
+    assert res.status_code == 201
+    template_id = res.json()["template_id"]
+    listed = {t["template_id"]: t for t in (await client.get("/api/v1/templates")).json()["templates"]}
+    assert listed[template_id]["stages"] == ["strategic_constraints", "phases_and_milestones"]
+    assert "source_session_id" not in listed[template_id]
+    detail = (await client.get(f"/api/v1/templates/{template_id}")).json()
+    assert detail["stage_data"]["strategic_constraints"]["team_size"] == 5
+
+    res = await client.post("/api/v1/sessions/from-template", json={"template_id": template_id})
+    assert res.status_code == 201
+    body = res.json()
+    assert body["current_stage"] == "define_outcome"
+    assert body["prefilled_stages"] == ["strategic_constraints", "phases_and_milestones"]
+    messages = (await client.get(f"/api/v1/session/{body['session_id']}/messages")).json()
+    assert messages["total"] == 4
+
+    assert (await client.delete(f"/api/v1/templates/{template_id}")).status_code == 204
+    res = await client.post("/api/v1/sessions/from-template", json={"template_id": template_id})
+    assert res.status_code == 404
+
+
+async def test_template_from_stage_data_is_validated(client):
+    res = await client.post("/api/v1/templates", json={
+        "name": "Broken", "stage_data": {"strategic_constraints": {"team_size": "many"}},
+    })
+    assert res.status_code == 422
+    res = await client.post("/api/v1/templates", json={"name": "Neither"})
+    assert res.status_code == 422
+
+
+async def test_clone_requires_a_completed_session(client):
+    complete, in_progress = build_complete_session(), build_old_session()
+    in_progress.is_complete = False
+    for session in (complete, in_progress):
+        await dependencies.get_session_store().save(session)
+
+    res = await client.post(f"/api/v1/session/{complete.session_id}/clone")
+    assert res.status_code == 201
+    assert res.json()["prefilled_stages"] == ["strategic_constraints", "risk_and_governance"]
+
+    res = await client.post(f"/api/v1/session/{in_progress.session_id}/clone", json={})
+    assert res.status_code == 422
+    assert (await client.post("/api/v1/session/missing/clone")).status_code == 404
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from starlette.requests import HTTPConnection
+
+from app.agent.admission import (
+    AdmissionController, AdmissionRejected, PRIORITY_ACTIVE, PRIORITY_NEW,
+)
+from app.api.routes.chat import client_id
+from app.config import get_settings
+from app.utils.metrics import MetricsRegistry
+
+
+pytestmark = pytest.mark.anyio
+
+
+def make_controller(**kwargs) -> AdmissionController:
+    kwargs.setdefault("metrics", MetricsRegistry())
+    return AdmissionController(**kwargs)
+
+
+async def test_in_flight_limit_queues_excess_calls():
+    controller = make_controller(max_in_flight=1, max_queue=4)
+    await controller.acquire()
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.queue_depth == 1 and not waiter.done()
+
+    controller.release()
+    await waiter
+    assert controller.in_flight == 1 and controller.queue_depth == 0
+
+
+async def test_full_queue_sheds_immediately():
+    controller = make_controller(max_in_flight=1, max_queue=1, shed_retry_after=3)
+    await controller.acquire()
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.retry_after == 3
+    assert controller.metrics.counter("admission.shed") == 1
+
+    controller.release()
+    await queued
+
+
+async def test_queue_wait_times_out():
+    controller = make_controller(max_in_flight=1, queue_timeout=0.01)
+    await controller.acquire()
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire()
+    assert controller.queue_depth == 0
+    controller.release()
+    assert controller.in_flight == 0
+
+
+async def test_active_sessions_are_served_before_new_ones():
+    controller = make_controller(max_in_flight=1)
+    await controller.acquire()
+    order = []
+
+    async def wait_for_slot(priority, label):
+        await controller.acquire(priority)
+        order.append(label)
+        controller.release()
+
+    new = asyncio.create_task(wait_for_slot(PRIORITY_NEW, "new"))
+    await asyncio.sleep(0)
+    active = asyncio.create_task(wait_for_slot(PRIORITY_ACTIVE, "active"))
+    await asyncio.sleep(0)
+
+    controller.release()
+    await asyncio.gather(new, active)
+    assert order == ["active", "new"]
+
+
+def test_per_client_rate_limit():
+    controller = make_controller(rate_per_minute=60, burst=2)
+    controller.check_rate("client-a")
+    controller.check_rate("client-a")
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.check_rate("client-a")
+    assert exc_info.value.retry_after >= 1
+    # Other clients have their own bucket
+    controller.check_rate("client-b")
+
+
+def make_connection(peer: str, forwarded: str = None) -> HTTPConnection:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return HTTPConnection({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_client_id_ignores_forwarded_for_from_untrusted_peers(monkeypatch):
+    monkeypatch.setattr(get_settings(), "trusted_proxies", [])
+    assert client_id(make_connection("203.0.113.5", "1.2.3.4")) == "203.0.113.5"
+
+    monkeypatch.setattr(get_settings(), "trusted_proxies", ["10.0.0.0/8"])
+    assert client_id(make_connection("203.0.113.5", "1.2.3.4")) == "203.0.113.5"
+
+
+def test_client_id_takes_the_right_most_untrusted_hop(monkeypatch):
+    monkeypatch.setattr(get_settings(), "trusted_proxies", ["10.0.0.0/8"])
+    # The client forged the first hop; the proxy appended the address it saw
+    connection = make_connection("10.0.0.2", "6.6.6.6, 198.51.100.7, 10.0.0.9")
+    assert client_id(connection) == "198.51.100.7"
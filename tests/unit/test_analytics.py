@@ -0,0 +1,90 @@
+import random
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.analytics import P2Quantile, PlanningAnalytics
+from app.agent.state_machine import PlanningStateMachine
+from app.models.session import Session
+from tests.unit.test_background_extraction import FakeMessages
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_p2_quantile_tracks_median_and_p90():
+    rng = random.Random(7)
+    samples = [rng.uniform(0, 1000) for _ in range(5000)]
+    median, p90 = P2Quantile(0.5), P2Quantile(0.9)
+    for x in samples:
+        median.add(x)
+        p90.add(x)
+    ordered = sorted(samples)
+    assert median.value() == pytest.approx(ordered[2500], rel=0.05)
+    assert p90.value() == pytest.approx(ordered[4500], rel=0.05)
+
+
+def test_p2_quantile_exact_for_few_samples():
+    sketch = P2Quantile(0.5)
+    assert sketch.value() is None
+    for x in (3, 1, 2):
+        sketch.add(x)
+    assert sketch.value() == 2
+
+
+async def test_state_machine_feeds_funnel():
+    analytics = PlanningAnalytics()
+    sm = PlanningStateMachine(SimpleNamespace(messages=FakeMessages()), "model", 1024, analytics=analytics)
+    session = Session()
+    await sm.process_message(session, "We're building Atlas")
+    await sm.process_message(session, "Deadline is Q4")
+
+    summary = analytics.summary()
+    outcome, constraints = summary["stages"][:2]
+    assert summary["sessions_started"] == 1
+    assert (outcome["reached"], outcome["advanced"], outcome["conversion_rate"]) == (1, 1, 1.0)
+    assert outcome["median_turns_to_advance"] == 1
+    assert constraints["reached"] == 1
+    assert constraints["turns"] == 1
+
+
+def test_state_survives_save_and_load(tmp_path):
+    path = str(tmp_path / "analytics.json")
+    analytics = PlanningAnalytics()
+    analytics.session_started()
+    for tokens in (100, 200, 300, 400, 500, 600, 700):
+        analytics.completed(Session(tokens_used=tokens))
+    PlanningAnalytics._write(path, analytics.to_dict())
+
+    restored = PlanningAnalytics()
+    assert restored.load(path)
+    assert restored.summary() == analytics.summary()
+    assert not PlanningAnalytics().load(str(tmp_path / "missing.json"))
+
+
+def test_concurrent_saves_never_share_a_temporary_file(tmp_path):
+    path = str(tmp_path / "analytics.json")
+    states = [PlanningAnalytics() for _ in range(4)]
+    for i, analytics in enumerate(states):
+        for _ in range(i + 1):
+            analytics.session_started()
+    errors = []
+
+    def save_repeatedly(analytics):
+        try:
+            for _ in range(25):
+                PlanningAnalytics._write(path, analytics.to_dict())
+        except OSError as exc:
+            errors.append(exc)
+
+    writers = [threading.Thread(target=save_repeatedly, args=(a,)) for a in states]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+
+    assert errors == []
+    restored = PlanningAnalytics()
+    assert restored.load(path) and 1 <= restored.sessions_started <= 4
+    assert [p.name for p in tmp_path.iterdir()] == ["analytics.json"]
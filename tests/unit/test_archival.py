@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.agent.archival import SessionArchiver
+from app.models.session import ConversationMessage, PlanningStage
+from app.storage.archive import TranscriptArchive
+from app.storage.memory_store import InMemorySessionStore
+from tests.unit.test_plan_compiler import build_complete_session
+
+pytestmark = pytest.mark.anyio
+
+
+def build_archiver(tmp_path):
+    store = InMemorySessionStore()
+    return store, SessionArchiver(store, TranscriptArchive(str(tmp_path)), archive_after=timedelta(hours=1))
+
+
+def build_old_session(hours_ago: float = 2):
+    session = build_complete_session()
+    session.messages = [
+        ConversationMessage(role="user", content=f"message {i}", stage=PlanningStage.DEFINE_OUTCOME)
+        for i in range(4)
+    ]
+    session.updated_at = datetime.utcnow() - timedelta(hours=hours_ago)
+    return session
+
+
+async def test_archives_old_completed_sessions_only(tmp_path):
+    store, archiver = build_archiver(tmp_path)
+    old, recent, active = build_old_session(), build_old_session(0), build_old_session()
+    active.is_complete = False
+    for s in (old, recent, active):
+        await store.save(s)
+
+    assert await archiver.run_once() == 1
+
+    archived = await store.get(old.session_id)
+    assert archived.is_archived
+    assert archived.messages == []
+    assert archived.compiled_plan["project_name"] == "Test Project"
+    assert archived.compiled_plan_markdown.startswith("# Test Project")
+    assert archived.updated_at == old.updated_at
+    assert not (await store.get(recent.session_id)).is_archived
+    assert not (await store.get(active.session_id)).is_archived
+    assert list(tmp_path.glob("transcripts-*.bin"))
+
+    # Already archived sessions are skipped
+    assert await archiver.run_once() == 0
+
+
+async def test_rehydrate_restores_transcript(tmp_path):
+    store, archiver = build_archiver(tmp_path)
+    sessions = [build_old_session() for _ in range(3)]
+    for s in sessions:
+        await store.save(s)
+    await archiver.run_once()
+
+    for original in sessions:
+        session = archiver.rehydrate(await store.get(original.session_id))
+        assert not session.is_archived
+        assert session.compiled_plan is None
+        assert [m.content for m in session.messages] == [m.content for m in original.messages]
+
+
+def test_archive_rejects_path_references(tmp_path):
+    archive = TranscriptArchive(str(tmp_path))
+    ref = archive.append("abc", b"payload")
+    assert archive.read(ref) == ("abc", b"payload")
+    with pytest.raises(ValueError):
+        archive.read("../secrets:0:10")
+
+
+async def test_day_files_without_live_references_are_reclaimed(tmp_path):
+    store, archiver = build_archiver(tmp_path)
+    kept, rehydrated = build_old_session(), build_old_session()
+    for s in (kept, rehydrated):
+        await store.save(s)
+    await archiver.run_once()
+    today = next(tmp_path.glob("transcripts-*.bin"))
+    # Pretend both were archived on an earlier day
+    earlier = tmp_path / "transcripts-2000-01-01.bin"
+    today.rename(earlier)
+    for s in (kept, rehydrated):
+        session = await store.get(s.session_id)
+        session.transcript_ref = session.transcript_ref.replace(today.name, earlier.name)
+        await store.save(session)
+
+    session = archiver.rehydrate(await store.get(rehydrated.session_id))
+    await store.save(session)
+    await archiver.run_once()
+    assert earlier.exists()
+
+    await store.delete(kept.session_id)
+    await archiver.run_once()
+    assert not earlier.exists()
+    assert archiver.metrics.counter("archive.bytes_reclaimed") > 0
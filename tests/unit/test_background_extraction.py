@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.background import BackgroundExtractionRunner
+from app.agent.state_machine import PlanningStateMachine
+from app.models.session import Session, PlanningStage
+
+
+pytestmark = pytest.mark.anyio
+
+OUTCOME = {
+    "project_name": "Atlas",
+    "project_type": "general",
+    "success_definition": "Launch the app",
+    "measurable_result": "1000 users",
+}
+
+
+class FakeMessages:
+    def __init__(self, release: asyncio.Event = None):
+        self.release = release
+
+    async def create(self, **kwargs):
+        if "tools" in kwargs:
+            if self.release is not None:
+                await self.release.wait()
+            return SimpleNamespace(content=[SimpleNamespace(type="tool_use", input=OUTCOME)])
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="Sounds good.")])
+
+
+def make_state_machine(release: asyncio.Event = None) -> PlanningStateMachine:
+    claude = SimpleNamespace(messages=FakeMessages(release))
+    return PlanningStateMachine(claude, "model", 1024)
+
+
+async def test_deferred_turn_returns_reply_without_advancing():
+    sm = make_state_machine()
+    session = Session()
+
+    reply, session = await sm.process_message(session, "We're building Atlas", defer_extraction=True)
+
+    assert reply == "Sounds good."
+    assert session.current_stage == PlanningStage.DEFINE_OUTCOME
+
+
+async def test_deferred_extraction_advances_and_notice_reaches_next_turn():
+    sm = make_state_machine()
+    session = Session()
+    await sm.process_message(session, "We're building Atlas", defer_extraction=True)
+
+    notice = await sm.run_deferred_extraction(session)
+
+    assert notice is not None
+    assert session.current_stage == PlanningStage.STRATEGIC_CONSTRAINTS
+    assert notice in session.messages[-1].content
+
+    reply, session = await sm.process_message(session, "Deadline is Q4", defer_extraction=True)
+    assert reply.startswith(notice)
+    assert session.pending_notice is None
+
+
+async def test_next_turn_waits_for_pending_extraction():
+    release = asyncio.Event()
+    sm = make_state_machine(release)
+    runner = BackgroundExtractionRunner(max_concurrency=2)
+    session = Session()
+    await sm.process_message(session, "We're building Atlas", defer_extraction=True)
+
+    async def job():
+        await sm.run_deferred_extraction(session)
+
+    runner.schedule(session.session_id, job)
+    assert runner.is_pending(session.session_id)
+
+    waiter = asyncio.create_task(runner.wait(session.session_id))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    release.set()
+    await waiter
+    assert session.current_stage == PlanningStage.STRATEGIC_CONSTRAINTS
+    await asyncio.sleep(0)
+    assert not runner.is_pending(session.session_id)
+
+
+async def test_jobs_for_same_session_run_in_order():
+    runner = BackgroundExtractionRunner(max_concurrency=4)
+    order = []
+
+    def make_job(n, delay):
+        async def job():
+            await asyncio.sleep(delay)
+            order.append(n)
+        return job
+
+    runner.schedule("s1", make_job(1, 0.02))
+    runner.schedule("s1", make_job(2, 0))
+    await runner.drain()
+    assert order == [1, 2]
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app.utils.idempotency import TurnDeduplicator, IdempotencyKeyConflict
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_replay_returns_cached_result_without_rerunning():
+    dedup = TurnDeduplicator()
+    calls = []
+
+    async def turn():
+        calls.append(1)
+        return "reply"
+
+    first = await dedup.run("s1", "k1", "hello", turn)
+    second = await dedup.run("s1", "k1", "hello", turn)
+    assert first == second == "reply"
+    assert len(calls) == 1
+
+
+async def test_concurrent_duplicates_join_in_flight_turn():
+    dedup = TurnDeduplicator()
+    calls = []
+    release = asyncio.Event()
+
+    async def turn():
+        calls.append(1)
+        await release.wait()
+        return "reply"
+
+    tasks = [asyncio.create_task(dedup.run("s1", "k1", "hello", turn)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert results == ["reply"] * 3
+    assert len(calls) == 1
+
+
+async def test_failed_turn_is_not_cached():
+    dedup = TurnDeduplicator()
+    attempts = []
+
+    async def turn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "reply"
+
+    with pytest.raises(RuntimeError):
+        await dedup.run("s1", "k1", "hello", turn)
+    assert await dedup.run("s1", "k1", "hello", turn) == "reply"
+    assert len(attempts) == 2
+
+
+async def test_key_reused_with_different_message_conflicts():
+    dedup = TurnDeduplicator()
+
+    async def turn():
+        return "reply"
+
+    await dedup.run("s1", "k1", "hello", turn)
+    with pytest.raises(IdempotencyKeyConflict):
+        await dedup.run("s1", "k1", "something else", turn)
+
+
+async def test_cache_is_bounded_per_session():
+    dedup = TurnDeduplicator(max_keys_per_session=2)
+    calls = []
+
+    async def turn():
+        calls.append(1)
+        return len(calls)
+
+    for key in ("a", "b", "c"):
+        await dedup.run("s1", key, "hello", turn)
+    # "a" was evicted, so replaying it runs the turn again
+    assert await dedup.run("s1", "a", "hello", turn) == 4
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.local_extractors import ConstraintsExtractor
+from app.agent.stage_handlers import StrategicConstraintsHandler
+from app.models.session import Session, PlanningStage, ConversationMessage
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_extracts_all_constraint_fields():
+    result = ConstraintsExtractor().extract(
+        "We're a team of 6 with a budget of $250k. We run Scrum and "
+        "need to launch by end of Q3 2026."
+    )
+    assert result.data.team_size == 6
+    assert result.data.budget == "$250k"
+    assert result.data.methodology == "Scrum"
+    assert result.data.deadline == "end of Q3 2026"
+    assert result.confidence > 0.9
+
+
+def test_word_numbers_and_month_dates():
+    result = ConstraintsExtractor().extract(
+        "Five engineers, Kanban, deadline is March 15, 2027."
+    )
+    assert result.data.team_size == 5
+    assert result.data.methodology == "Kanban"
+    assert result.data.deadline == "March 15, 2027"
+
+
+def test_specific_framework_preferred_over_agile():
+    result = ConstraintsExtractor().extract("We're agile, specifically Scrum.")
+    assert result.data.methodology == "Scrum"
+
+
+def test_partial_information_has_low_confidence():
+    result = ConstraintsExtractor().extract("We need it by Q2 2026.")
+    assert result.data.deadline == "Q2 2026"
+    assert result.confidence < 0.5
+
+
+def test_nothing_found_returns_none():
+    assert ConstraintsExtractor().extract("Not sure yet, let me check with finance.") is None
+
+
+def make_session(text: str) -> Session:
+    session = Session(current_stage=PlanningStage.STRATEGIC_CONSTRAINTS)
+    session.messages.append(
+        ConversationMessage(role="user", content=text, stage=PlanningStage.STRATEGIC_CONSTRAINTS)
+    )
+    return session
+
+
+class FailingMessages:
+    async def create(self, **kwargs):
+        raise AssertionError("model should not be called")
+
+
+async def test_confident_local_extraction_skips_model_call():
+    claude = SimpleNamespace(messages=FailingMessages())
+    handler = StrategicConstraintsHandler(claude, "large", 1024, local_min_confidence=0.75)
+    data = await handler.attempt_extraction(
+        make_session("Team of 4, $100k budget, Scrum, deadline is Q4 2026.")
+    )
+    assert data.team_size == 4
+    assert data.deadline == "Q4 2026"
+
+
+async def test_low_confidence_falls_through_to_model():
+    calls = []
+
+    class Messages:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(content=[])
+
+    handler = StrategicConstraintsHandler(
+        SimpleNamespace(messages=Messages()), "large", 1024, local_min_confidence=0.75
+    )
+    assert await handler.attempt_extraction(make_session("By Q4 2026.")) is None
+    assert len(calls) == 1
+
+
+def test_negated_methodology_is_unresolved():
+    result = ConstraintsExtractor().extract(
+        "We cannot use scrum; the team of 4 has a $200k budget and must launch by Q4 2026."
+    )
+    assert result.unresolved == ["methodology"]
+    assert result.data.methodology is None
+    assert result.data.team_size == 4
+
+
+def test_conflicting_head_counts_are_unresolved():
+    result = ConstraintsExtractor().extract(
+        "We have 3 people and 2 designers, a $100k budget, Kanban, and the deadline is Q3 2026."
+    )
+    assert result.unresolved == ["team_size"]
+    assert result.data.team_size is None
+
+
+@pytest.mark.parametrize("text", [
+    "We kicked off on March 5 2026 with a team of 6, using Scrum, budget $250k",
+    "The old project shipped by 2019; this one has a team of 4 using Kanban and $50k",
+])
+def test_dates_that_are_not_this_projects_deadline_are_unresolved(text):
+    result = ConstraintsExtractor().extract(text)
+    assert "deadline" in result.unresolved
+    assert result.data.deadline is None
+
+
+@pytest.mark.parametrize("text", [
+    "We cannot use scrum; the team of 4 has a $200k budget and must launch by Q4 2026.",
+    "We have 3 people and 2 designers, a $100k budget, Kanban, and the deadline is Q3 2026.",
+    "We kicked off on March 5 2026 with a team of 6, using Scrum, budget $250k",
+    "The old project shipped by 2019; this one has a team of 4 using Kanban and $50k",
+])
+async def test_unresolved_fields_fall_back_to_the_model(text):
+    calls = []
+
+    class Messages:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(content=[])
+
+    handler = StrategicConstraintsHandler(
+        SimpleNamespace(messages=Messages()), "large", 1024, local_min_confidence=0.75
+    )
+    assert await handler.attempt_extraction(make_session(text)) is None
+    assert len(calls) == 1
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from app import dependencies
+from app.agent import plan_compiler
+from app.utils.loop_monitor import LoopBlockedError, LoopMonitor, loop_budget
+from app.utils.metrics import MetricsRegistry
+from tests.unit.test_plan_compiler import build_complete_session
+
+pytestmark = pytest.mark.anyio
+
+
+def blocking_helper(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def test_budget_fails_when_the_loop_is_blocked():
+    with pytest.raises(LoopBlockedError) as info:
+        async with loop_budget(50):
+            blocking_helper(0.2)
+
+    assert "blocking_helper" in str(info.value)
+
+
+async def test_budget_passes_when_work_yields():
+    async with loop_budget(50) as monitor:
+        for _ in range(5):
+            await asyncio.sleep(0.02)
+    assert monitor.samples == type(monitor.samples)()
+
+
+async def test_blocked_request_is_attributed_to_route_and_session(client, monkeypatch):
+    session = build_complete_session()
+    await dependencies.get_session_store().save(session)
+
+    def slow_compile(self, s):
+        blocking_helper(0.3)
+        return original(self, s)
+
+    original = plan_compiler.PlanCompiler.compile
+    monkeypatch.setattr(plan_compiler.PlanCompiler, "compile", slow_compile)
+    monitor = LoopMonitor(interval=0.01, block_threshold_ms=100, metrics=MetricsRegistry())
+    monitor.start()
+    try:
+        res = await client.get(f"/api/v1/session/{session.session_id}/plan")
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    assert res.status_code == 200
+    [sample] = monitor.samples
+    assert sample.route == f"GET /api/v1/session/{session.session_id}/plan"
+    assert sample.session_id == session.session_id
+    assert sample.blocked_ms >= 250
+    assert any("blocking_helper" in line for line in sample.stack)
+    assert monitor.report()["lag_ms"]["count"] > 0
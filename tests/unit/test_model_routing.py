@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.model_routing import CallType, ModelRoute, ModelRouter
+from app.agent.stage_handlers import DefineOutcomeHandler, TasksAndSubtasksHandler
+from app.config import Settings
+from app.models.session import Session, PlanningStage, ConversationMessage
+
+
+pytestmark = pytest.mark.anyio
+
+
+def make_router(**overrides) -> ModelRouter:
+    settings = Settings(
+        anthropic_api_key="test",
+        claude_model="large",
+        claude_fast_model="small",
+        **overrides,
+    )
+    return ModelRouter.from_settings(settings)
+
+
+class FakeMessages:
+    def __init__(self, tool_inputs: dict):
+        self.tool_inputs = tool_inputs
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        block = SimpleNamespace(type="tool_use", input=self.tool_inputs[kwargs["model"]])
+        return SimpleNamespace(content=[block])
+
+
+def make_session() -> Session:
+    session = Session()
+    session.messages.append(ConversationMessage(role="user", content="We're launching Atlas"))
+    return session
+
+
+def test_fast_model_used_for_early_stage_extraction():
+    router = make_router()
+    assert router.route(CallType.EXTRACTION, PlanningStage.DEFINE_OUTCOME).model == "small"
+    assert router.route(CallType.EXTRACTION, PlanningStage.TASKS_AND_SUBTASKS).model == "large"
+    assert router.route(CallType.REPLY, PlanningStage.DEFINE_OUTCOME).model == "large"
+
+
+def test_explicit_route_override():
+    router = make_router(
+        claude_model_routes={"extraction:tasks_and_subtasks": {"max_tokens": 4096}}
+    )
+    route = router.route(CallType.EXTRACTION, PlanningStage.TASKS_AND_SUBTASKS)
+    assert route == ModelRoute("large", 4096)
+
+
+def test_no_fallback_when_already_on_large_model():
+    router = make_router()
+    assert router.fallback(CallType.EXTRACTION, PlanningStage.TASKS_AND_SUBTASKS) is None
+    assert router.fallback(CallType.EXTRACTION, PlanningStage.DEFINE_OUTCOME).model == "large"
+
+
+async def test_invalid_fast_extraction_falls_back_to_large_model():
+    valid = {
+        "project_name": "Atlas",
+        "project_type": "general",
+        "success_definition": "Launch",
+        "measurable_result": "1000 users",
+    }
+    messages = FakeMessages({"small": {"project_name": "Atlas"}, "large": valid})
+    claude = SimpleNamespace(messages=messages)
+    handler = DefineOutcomeHandler(claude, "large", 1024, router=make_router())
+
+    data = await handler.attempt_extraction(make_session())
+
+    assert data is not None and data.project_name == "Atlas"
+    assert [c["model"] for c in messages.calls] == ["small", "large"]
+
+
+async def test_large_model_extraction_is_not_retried():
+    messages = FakeMessages({"large": {"tasks": "not-a-list"}})
+    claude = SimpleNamespace(messages=messages)
+    handler = TasksAndSubtasksHandler(claude, "large", 1024, router=make_router())
+
+    assert await handler.attempt_extraction(make_session()) is None
+    assert len(messages.calls) == 1
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app.agent.plan_import import PlanImporter, TooManyPlans
+from app.models.session import PlanningStage
+from app.utils.metrics import MetricsRegistry
+from tests.unit.test_plan_compiler import build_complete_session
+
+
+pytestmark = pytest.mark.anyio
+
+
+def plan_dict(**overrides) -> dict:
+    return {**build_complete_session().stage_data.model_dump(mode="json"), **overrides}
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def test_ndjson_lines_split_across_chunks_become_complete_sessions(store):
+    importer = PlanImporter(store, metrics=MetricsRegistry())
+    lines = [json.dumps(plan_dict(reference=f"r{i}")) for i in range(3)]
+    body = ("\n".join(lines[:2]) + "\n\n" + lines[2]).encode()  # blank line, no trailing newline
+
+    results = [r async for r in importer.import_ndjson(chunked(body, 7))]
+
+    assert [(r.index, r.reference, r.error) for r in results] == [(0, "r0", None), (1, "r1", None), (2, "r2", None)]
+    session = await store.get(results[0].session_id)
+    assert session.is_complete and session.current_stage == PlanningStage.COMPLETE
+    assert session.stage_data.model_dump(mode="json") == build_complete_session().stage_data.model_dump(mode="json")
+
+
+async def test_bad_and_oversized_lines_fail_alone(store):
+    importer = PlanImporter(store, max_line_bytes=4096, metrics=MetricsRegistry())
+    big = json.dumps(plan_dict(reference="x" * 10_000))
+    body = "\n".join(["{not json", json.dumps({"define_outcome": {}}), big, json.dumps(plan_dict())]).encode()
+
+    results = [r async for r in importer.import_ndjson(chunked(body, 1000))]
+
+    assert [r.error is None for r in results] == [False, False, False, True]
+    assert "define_outcome.project_name" in results[1].error
+    assert "exceeds 4096 bytes" in results[2].error
+    assert importer.metrics.snapshot()["counters"]["plans.import_failed"] == 3
+
+
+async def test_contradictions_are_reported_without_blocking(store):
+    plan = plan_dict()
+    plan["strategic_constraints"]["team_size"] = 1
+    importer = PlanImporter(store, metrics=MetricsRegistry())
+
+    result = await importer.import_plan(0, plan)
+
+    assert result.session_id is not None
+    assert len(result.contradictions) == 1
+    assert "team of 1" in result.contradictions[0].description
+
+
+async def test_unknown_project_type_is_rejected(store):
+    plan = plan_dict()
+    plan["define_outcome"]["project_type"] = "portfolio"
+    result = await PlanImporter(store, metrics=MetricsRegistry()).import_plan(0, plan)
+    assert result.session_id is None and "define_outcome" in result.error
+
+
+async def test_ndjson_stops_at_the_plan_limit(store):
+    importer = PlanImporter(store, max_plans=2, metrics=MetricsRegistry())
+    body = "\n".join(json.dumps(plan_dict(reference=f"r{i}")) for i in range(3)).encode()
+
+    results = [r async for r in importer.import_ndjson(chunked(body, 64))]
+
+    assert [r.reference for r in results] == ["r0", "r1", None]
+    assert "limit of 2" in results[-1].error and results[-1].index == 2
+    assert importer.metrics.counter("plans.imported") == 2
+    # The plans imported before the limit are saved and reported with their ids
+    for result in results[:2]:
+        assert (await store.get(result.session_id)).is_complete
+
+
+async def test_json_array_over_the_plan_limit_is_refused_whole(store):
+    importer = PlanImporter(store, max_plans=2, metrics=MetricsRegistry())
+    with pytest.raises(TooManyPlans):
+        async for _ in importer.import_many([plan_dict() for _ in range(3)]):
+            pass
+    assert importer.metrics.counter("plans.imported") == 0
@@ -0,0 +1,141 @@
+import asyncio
+import httpx
+import pytest
+from anthropic import APIStatusError, BadRequestError
+
+from app.agent.resilience import (
+    CircuitBreaker, CircuitOpenError, ResilientCaller, RetryPolicy,
+)
+from app.utils.metrics import MetricsRegistry
+
+
+pytestmark = pytest.mark.anyio
+
+
+def make_status_error(status: int, retry_after: str = None) -> APIStatusError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(status, headers=headers, request=request)
+    cls = BadRequestError if status == 400 else APIStatusError
+    return cls("error", response=response, body=None)
+
+
+def make_caller(**kwargs) -> ResilientCaller:
+    kwargs.setdefault("retry", RetryPolicy(max_attempts=3, base_delay=0, max_delay=0))
+    kwargs.setdefault("metrics", MetricsRegistry())
+    return ResilientCaller(**kwargs)
+
+
+async def test_retries_overloaded_then_succeeds():
+    caller = make_caller()
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise make_status_error(529)
+        return "ok"
+
+    assert await caller.call(fn, call_type="reply") == "ok"
+    assert len(attempts) == 3
+    assert caller.metrics.counter("claude.reply.retries") == 2
+
+
+async def test_does_not_retry_client_errors():
+    caller = make_caller()
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        raise make_status_error(400)
+
+    with pytest.raises(APIStatusError):
+        await caller.call(fn, call_type="reply")
+    assert len(attempts) == 1
+
+
+def test_retry_after_header_is_a_floor():
+    policy = RetryPolicy(base_delay=0.01, max_delay=10, retry_budget=30)
+    assert policy.delay(0, retry_after=2.0) >= 2.0
+    assert policy.delay(0, retry_after=20.0) == 20.0
+    assert policy.delay(0, retry_after=60.0) is None
+
+
+async def test_gives_up_when_retry_after_exceeds_the_budget():
+    caller = make_caller(retry=RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, retry_budget=5))
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        raise make_status_error(429, retry_after="60")
+
+    with pytest.raises(APIStatusError):
+        await caller.call(fn, call_type="reply")
+    assert len(attempts) == 1
+    assert caller.metrics.counter("claude.reply.retries") == 0
+
+
+async def test_circuit_opens_and_fails_fast():
+    caller = make_caller(
+        retry=RetryPolicy(max_attempts=1),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    )
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        raise make_status_error(503)
+
+    for _ in range(2):
+        with pytest.raises(APIStatusError):
+            await caller.call(fn, call_type="reply")
+    with pytest.raises(CircuitOpenError):
+        await caller.call(fn, call_type="reply")
+    assert len(attempts) == 2
+
+
+async def test_half_open_probe_closes_circuit_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    caller = make_caller(retry=RetryPolicy(max_attempts=1), breaker=breaker)
+
+    async def failing():
+        raise make_status_error(500)
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(APIStatusError):
+        await caller.call(failing, call_type="reply")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert await caller.call(ok, call_type="reply") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_attempt_timeout_is_retried():
+    caller = make_caller(attempt_timeout=0.01)
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    assert await caller.call(fn, call_type="extraction") == "ok"
+    assert len(attempts) == 2
+
+
+async def test_hedged_request_wins_when_primary_is_slow():
+    caller = make_caller(hedge_min_samples=1)
+    caller.metrics.observe("claude.extraction.latency_ms", 10)
+    attempts = []
+
+    async def fn():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(5)
+            return "slow"
+        return "fast"
+
+    assert await caller.call(fn, call_type="extraction", hedge=True) == "fast"
+    assert caller.metrics.counter("claude.extraction.hedge_wins") == 1
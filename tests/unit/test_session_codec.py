@@ -0,0 +1,143 @@
+import json
+import struct
+from unittest.mock import patch
+
+import pytest
+
+from app.models.session import Session, ConversationMessage, PlanningStage
+from app.storage.codec import SessionCodec, SessionView, FLAG_SEALED, COMPRESSION_NONE, MAGIC_V1
+from app.storage.memory_store import InMemorySessionStore
+from tests.unit.test_plan_compiler import build_complete_session
+
+pytestmark = pytest.mark.anyio
+
+
+def build_session_mid_plan() -> Session:
+    session = build_complete_session()
+    session.is_complete = False
+    session.current_stage = PlanningStage.PHASES_AND_MILESTONES
+    session.pending_notice = "Stage 2 confirmed."
+    session.tokens_used = 1234
+    session.stage_tokens = {"define_outcome": 300}
+    for stage in (PlanningStage.DEFINE_OUTCOME, PlanningStage.STRATEGIC_CONSTRAINTS,
+                  PlanningStage.PHASES_AND_MILESTONES):
+        for i in range(6):
+            session.messages.append(ConversationMessage(
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"{stage.value} message {i} " + "lorem ipsum dolor sit amet " * 10,
+                stage=stage,
+                token_count=i or None,
+            ))
+    return session
+
+
+def test_round_trip_preserves_session():
+    session = build_session_mid_plan()
+    codec = SessionCodec()
+    decoded = codec.decode(codec.encode(session))
+    assert decoded.model_dump() == session.model_dump()
+
+
+def test_round_trip_legacy_untagged_messages():
+    session = Session(messages=[
+        ConversationMessage(role="user", content="hello"),
+        ConversationMessage(role="assistant", content="hi", stage=PlanningStage.DEFINE_OUTCOME),
+    ])
+    decoded = SessionCodec().decode(SessionCodec().encode(session))
+    assert [m.stage for m in decoded.messages] == [m.stage for m in session.messages]
+    assert [m.content for m in decoded.messages] == ["hello", "hi"]
+
+
+def test_finished_stages_are_sealed_and_compressed():
+    session = build_session_mid_plan()
+    codec = SessionCodec()
+    blob = codec.encode(session)
+    table = SessionView(blob)._block_table
+    assert len(table) == 3
+    *finished, active = table
+    for _, flags, _, _, _ in finished:
+        assert flags & FLAG_SEALED and flags >> 1 != COMPRESSION_NONE
+    assert active[1] == 0
+    assert len(blob) < len(session.model_dump_json())
+
+
+def test_sealed_blocks_are_reused_on_reencode():
+    session = build_session_mid_plan()
+    codec = SessionCodec()
+    previous = codec.encode(session)
+    session.messages.append(ConversationMessage(
+        role="user", content="one more", stage=PlanningStage.PHASES_AND_MILESTONES,
+    ))
+
+    with patch.object(codec, "_encode_block", wraps=codec._encode_block) as encode_block:
+        blob = codec.encode(session, previous=previous)
+    assert encode_block.call_count == 1  # only the active stage
+    assert codec.decode(blob).messages[-1].content == "one more"
+
+
+def test_view_reads_header_without_decoding_messages():
+    session = build_session_mid_plan()
+    view = SessionView(SessionCodec().encode(session))
+    with patch("app.storage.codec._decompress") as decompress:
+        assert view.session_id == session.session_id
+        assert view.message_count == len(session.messages)
+        assert view.header["current_stage"] == "phases_and_milestones"
+        assert view.stage_data.strategic_constraints.team_size == 5
+    decompress.assert_not_called()
+
+
+def test_view_message_slice():
+    session = build_session_mid_plan()
+    view = SessionView(SessionCodec().encode(session))
+    window = view.messages(5, 8)
+    assert [m.content for m in window] == [m.content for m in session.messages[5:8]]
+    assert view.messages(len(session.messages) - 2) == session.messages[-2:]
+
+
+async def test_memory_store_round_trips_encoded_sessions():
+    store = InMemorySessionStore(codec=SessionCodec(compression="none"))
+    session = build_session_mid_plan()
+    await store.save(session)
+    assert isinstance(store._store[session.session_id], bytes)
+    loaded = await store.get(session.session_id)
+    assert loaded.model_dump() == session.model_dump()
+    assert loaded is not session
+
+
+def test_cached_plan_is_kept_out_of_the_header():
+    session = build_complete_session()
+    session.compiled_plan = {"phases": ["x" * 1000]}
+    session.compiled_plan_markdown = "# Plan"
+    view = SessionView(SessionCodec().encode(session))
+    assert "compiled_plan" not in view.header
+    assert view.sizes()["header"] < 1000 < view.sizes()["cached_plan"]
+    assert view.cached_plan == {"compiled_plan": session.compiled_plan, "compiled_plan_markdown": "# Plan"}
+    assert view.session().model_dump() == session.model_dump()
+
+
+def test_version_1_blobs_still_decode():
+    session = build_complete_session()
+    session.compiled_plan = {"phases": []}
+    blob = SessionCodec(compression="none").encode(session)
+    view = SessionView(blob)
+    header = {**json.loads(blob[view._header_start:view._header_start + view._header_len]), **view.cached_plan}
+    header_bytes = json.dumps(header).encode()
+    rest = blob[view._header_start + view._header_len + view._plan_len:]
+    legacy = struct.pack("<4sIIH", MAGIC_V1, len(header_bytes), view._stage_len, view._block_count) + header_bytes + rest
+    assert SessionView(legacy).session().model_dump() == session.model_dump()
+
+
+async def test_memory_usage_parses_only_the_largest_headers():
+    store = InMemorySessionStore()
+    sessions = [build_session_mid_plan() for _ in range(5)]
+    for s in sessions:
+        await store.save(s)
+
+    parsed = []
+    original = json.loads
+    with patch("app.storage.codec.json.loads", side_effect=lambda raw: parsed.append(raw) or original(raw)):
+        usage = await store.memory_usage(top=2)
+
+    assert len(usage["largest_sessions"]) == 2
+    assert len(parsed) == 2
+    assert usage["resident_bytes"]["total"] == sum(len(b) for b in store._store.values())
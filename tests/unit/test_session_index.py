@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.session import Session, PlanningStage
+from app.storage.index import SessionQuery
+from app.storage.memory_store import InMemorySessionStore
+from tests.unit.test_plan_compiler import build_complete_session
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2026, 1, 1)
+
+
+async def build_store():
+    store = InMemorySessionStore()
+    for i in range(10):
+        session = Session(created_at=T0 + timedelta(hours=i), updated_at=T0 + timedelta(hours=i))
+        session.current_stage = PlanningStage.TASKS_AND_SUBTASKS if i % 3 == 0 else PlanningStage.DEFINE_OUTCOME
+        await store.save(session)
+    complete = build_complete_session()
+    complete.created_at = complete.updated_at = T0 + timedelta(days=1)
+    await store.save(complete)
+    return store, complete
+
+
+async def test_pagination_walks_all_sessions_in_order():
+    store, _ = await build_store()
+    seen, cursor = [], None
+    while True:
+        page = await store.list_sessions(limit=4, cursor=cursor)
+        assert page.total == 11
+        seen.extend(page.sessions)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == 11
+    assert [r.created_at for r in seen] == sorted(r.created_at for r in seen)
+
+
+async def test_filters():
+    store, complete = await build_store()
+    stuck = await store.list_sessions(SessionQuery(current_stage=PlanningStage.TASKS_AND_SUBTASKS))
+    assert stuck.total == 4
+
+    done = await store.list_sessions(SessionQuery(is_complete=True, project_name="test proj"))
+    assert [r.session_id for r in done.sessions] == [complete.session_id]
+
+    window = await store.list_sessions(SessionQuery(
+        created_after=T0 + timedelta(hours=2), created_before=T0 + timedelta(hours=5),
+    ))
+    assert window.total == 3
+
+    recent = await store.list_sessions(SessionQuery(updated_after=T0 + timedelta(hours=8)))
+    assert recent.total == 3
+
+
+async def test_index_follows_saves_and_deletes():
+    store, complete = await build_store()
+    session = (await store.list_sessions(SessionQuery(current_stage=PlanningStage.DEFINE_OUTCOME))).sessions[0]
+    loaded = await store.get(session.session_id)
+    loaded.advance_stage()
+    await store.save(loaded)
+    await store.delete(complete.session_id)
+
+    outcome = await store.list_sessions(SessionQuery(current_stage=PlanningStage.DEFINE_OUTCOME))
+    constraints = await store.list_sessions(SessionQuery(current_stage=PlanningStage.STRATEGIC_CONSTRAINTS))
+    assert (outcome.total, constraints.total) == (5, 1)
+    assert (await store.list_sessions()).total == 10
+
+
+async def test_restored_snapshot_is_indexed_on_first_listing(tmp_path):
+    store, _ = await build_store()
+    await store.snapshot(str(tmp_path / "s.snap"))
+
+    restored = InMemorySessionStore()
+    restored.restore(str(tmp_path / "s.snap"))
+    page = await restored.list_sessions(SessionQuery(current_stage=PlanningStage.TASKS_AND_SUBTASKS))
+    assert page.total == 4
+    assert restored._store == {}
+
+
+async def test_invalid_cursor_is_rejected():
+    store, _ = await build_store()
+    with pytest.raises(ValueError):
+        await store.list_sessions(cursor="not-a-cursor")
+
+
+async def test_unindexed_filters_stop_after_the_page():
+    store, _ = await build_store()
+    query = SessionQuery(is_complete=False)
+    first = await store.list_sessions(query, limit=4)
+    assert len(first.sessions) == 4 and first.total is None
+
+    seen, cursor = [], None
+    while True:
+        page = await store.list_sessions(query, limit=4, cursor=cursor)
+        seen.extend(r.session_id for r in page.sessions)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 10
+
+    checked = []
+    original = SessionQuery.matches
+    SessionQuery.matches = lambda self, record: checked.append(record) or original(self, record)
+    try:
+        await store.list_sessions(query, limit=2)
+    finally:
+        SessionQuery.matches = original
+    assert len(checked) == 3  # two for the page, one to know there is more
+
+
+async def test_stage_filter_pages_with_a_cursor():
+    store, _ = await build_store()
+    query = SessionQuery(current_stage=PlanningStage.DEFINE_OUTCOME)
+    first = await store.list_sessions(query, limit=4)
+    rest = await store.list_sessions(query, limit=4, cursor=first.next_cursor)
+    assert first.total == rest.total == 7
+    assert [r.created_at for r in first.sessions + rest.sessions] == sorted(
+        r.created_at for r in first.sessions + rest.sessions
+    )
+    assert len(rest.sessions) == 3 and rest.next_cursor is None
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.storage.memory_store import InMemorySessionStore
+from app.storage.snapshot import SnapshotError, SnapshotReader, write_snapshot
+from app.utils.periodic import run_periodically
+from tests.unit.test_plan_compiler import build_complete_session
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    store = InMemorySessionStore()
+    sessions = [build_complete_session() for _ in range(3)]
+    for s in sessions:
+        await store.save(s)
+
+    assert await store.snapshot(path) == 3
+    assert not (tmp_path / "sessions.snap.tmp").exists()
+
+    restored = InMemorySessionStore()
+    assert restored.restore(path) == 3
+    assert restored._store == {}  # nothing decoded until first read
+    for s in sessions:
+        loaded = await restored.get(s.session_id)
+        assert loaded.model_dump() == s.model_dump()
+
+
+async def test_restored_store_tracks_deletes_and_resnapshots(tmp_path):
+    first, second = str(tmp_path / "a.snap"), str(tmp_path / "b.snap")
+    store = InMemorySessionStore()
+    kept, deleted = build_complete_session(), build_complete_session()
+    await store.save(kept)
+    await store.save(deleted)
+    await store.snapshot(first)
+
+    restored = InMemorySessionStore()
+    restored.restore(first)
+    await restored.delete(deleted.session_id)
+    assert await restored.get(deleted.session_id) is None
+    assert len(await restored.views()) == 1
+
+    assert await restored.snapshot(second) == 1
+    assert list(SnapshotReader(second).session_ids()) == [kept.session_id]
+
+
+async def test_periodic_snapshot_over_the_restored_file_keeps_sessions_on_disk(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    store = InMemorySessionStore()
+    sessions = [build_complete_session() for _ in range(3)]
+    for s in sessions:
+        await store.save(s)
+    await store.snapshot(path)
+
+    restored = InMemorySessionStore()
+    restored.restore(path)
+    touched = sessions[0].model_copy(update={"pending_notice": "changed"})
+    await restored.save(touched)
+
+    assert await restored.snapshot(path) == 3
+    assert list(restored._store) == [touched.session_id]
+    assert len(await restored.views()) == 3
+    assert list(restored._store) == [touched.session_id]
+
+    again = InMemorySessionStore()
+    again.restore(path)
+    assert (await again.get(touched.session_id)).pending_notice == "changed"
+    assert (await again.get(sessions[2].session_id)).model_dump() == sessions[2].model_dump()
+
+
+def test_reader_rejects_truncated_file(tmp_path):
+    path = tmp_path / "sessions.snap"
+    write_snapshot(str(path), [("abc", b"payload")])
+    path.write_bytes(path.read_bytes()[:-3])
+    with pytest.raises(SnapshotError):
+        SnapshotReader(str(path))
+
+
+async def test_exists_checks_the_snapshot_without_promoting(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    store = InMemorySessionStore()
+    kept, deleted = build_complete_session(), build_complete_session()
+    await store.save(kept)
+    await store.save(deleted)
+    await store.snapshot(path)
+
+    restored = InMemorySessionStore()
+    restored.restore(path)
+    await restored.delete(deleted.session_id)
+
+    assert await restored.exists(kept.session_id)
+    assert not await restored.exists(deleted.session_id)
+    assert restored._store == {}
+    header = await restored.get_header(kept.session_id)
+    assert header.is_complete and header.created_at == kept.created_at
+    assert restored._store == {}
+    page = await restored.get_messages(kept.session_id, limit=2)
+    assert [m.content for m in page.messages] == [m.content for m in kept.messages[:2]]
+    assert restored._store == {}
+
+
+def test_concurrent_writers_never_share_a_temporary_file(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+
+    def slow_items(prefix):
+        for i in range(50):
+            time.sleep(0.001)
+            yield f"{prefix}-{i}", prefix.encode() * 100
+
+    writers = [threading.Thread(target=write_snapshot, args=(path, slow_items(p))) for p in ("a", "b")]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+
+    reader = SnapshotReader(path)
+    ids = list(reader.session_ids())
+    assert len(ids) == 50 and len({i.split("-")[0] for i in ids}) == 1
+    assert reader.get(ids[0]) == ids[0].split("-")[0].encode() * 100
+    assert [p.name for p in tmp_path.iterdir()] == ["sessions.snap"]
+
+
+async def test_cancelled_periodic_job_finishes_its_threaded_write():
+    started, finished = threading.Event(), threading.Event()
+
+    def write():
+        started.set()
+        time.sleep(0.1)
+        finished.set()
+
+    task = run_periodically(0, lambda: asyncio.to_thread(write), "probe")
+    while not started.is_set():
+        await asyncio.sleep(0.005)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert finished.is_set()
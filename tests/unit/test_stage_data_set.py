@@ -0,0 +1,49 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.session import Session, StageDataSet, PlanningStage
+from app.models.stage_data import ConstraintsData, OutcomeData
+
+
+def test_legacy_dict_stage_data_loads_as_models():
+    stored = Session().model_dump(mode="json")
+    stored["stage_data"] = {
+        "strategic_constraints": {"deadline": "Q4 2026", "team_size": 5},
+    }
+    session = Session(**stored)
+    constraints = session.stage_data.strategic_constraints
+    assert isinstance(constraints, ConstraintsData)
+    assert constraints.team_size == 5
+
+
+def test_dump_keeps_legacy_dict_shape():
+    sd = StageDataSet()
+    sd.commit(PlanningStage.STRATEGIC_CONSTRAINTS, ConstraintsData(deadline="Q4"))
+    dumped = sd.model_dump(mode="json")
+    assert list(dumped) == ["strategic_constraints"]
+    assert dumped["strategic_constraints"]["deadline"] == "Q4"
+
+
+def test_mapping_access():
+    sd = StageDataSet()
+    assert not sd
+    assert "define_outcome" not in sd
+    assert sd.get(PlanningStage.DEFINE_OUTCOME) is None
+
+    sd["define_outcome"] = {
+        "project_name": "X", "project_type": "general",
+        "success_definition": "Y", "measurable_result": "Z",
+    }
+    assert PlanningStage.DEFINE_OUTCOME in sd
+    assert isinstance(sd[PlanningStage.DEFINE_OUTCOME], OutcomeData)
+    assert sd.keys() == ["define_outcome"]
+    with pytest.raises(KeyError):
+        sd["tasks_and_subtasks"]
+    with pytest.raises(KeyError):
+        sd["not_a_stage"]
+
+
+def test_assigning_invalid_dict_is_rejected():
+    sd = StageDataSet()
+    with pytest.raises(ValidationError):
+        sd["define_outcome"] = {"project_name": "X"}
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.utils.startup import StartupProfile
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Importing the app is the cold-start critical path on Render; keep it well under this
+IMPORT_BUDGET_SECONDS = 1.5
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed": elapsed, "sdk_loaded": "anthropic" in sys.modules}))
+"""
+
+
+def test_app_import_is_within_startup_budget():
+    env = {**os.environ, "ANTHROPIC_API_KEY": os.environ.get("ANTHROPIC_API_KEY", "test")}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert not probe["sdk_loaded"], "the anthropic SDK should load lazily, not at import"
+    assert probe["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_profile_records_sequential_and_overlapping_phases():
+    profile = StartupProfile()
+    profile.mark("first")
+    with profile.phase("background"):
+        pass
+    assert [name for name, _ in profile.phases] == ["first", "background"]
+    assert all(ms >= 0 for _, ms in profile.phases)
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.analytics import PlanningAnalytics
+from app.agent.state_machine import PlanningStateMachine
+from app.agent.templates import DEFAULT_CLONE_STAGES, SessionTemplate, TemplateRegistry, seed_session
+from app.models.session import PlanningStage, STAGE_ORDER
+from app.models.stage_data import TaskDefinition, TasksData
+from tests.unit.test_background_extraction import FakeMessages
+from tests.unit.test_plan_compiler import build_complete_session
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_seeding_every_stage_yields_a_complete_session():
+    source = build_complete_session()
+    result = seed_session(source.stage_data)
+
+    session = result.session
+    assert result.prefilled == STAGE_ORDER[:-1]
+    assert session.is_complete and session.current_stage == PlanningStage.COMPLETE
+    assert session.stage_data.model_dump() == source.stage_data.model_dump()
+    # The copy is independent of the source
+    session.stage_data.define_outcome.project_name = "Changed"
+    assert source.stage_data.define_outcome.project_name == "Test Project"
+
+
+def test_seeded_history_alternates_roles_and_is_tagged_by_stage():
+    session = seed_session(build_complete_session().stage_data, DEFAULT_CLONE_STAGES).session
+
+    assert session.current_stage == PlanningStage.DEFINE_OUTCOME
+    assert [m.role for m in session.messages] == ["user", "assistant"] * 2
+    assert [m.stage for m in session.messages[::2]] == DEFAULT_CLONE_STAGES
+    assert '"team_size":5' in session.messages[0].content
+
+
+async def test_turns_skip_prefilled_stages():
+    session = seed_session(build_complete_session().stage_data, DEFAULT_CLONE_STAGES).session
+    analytics = PlanningAnalytics()
+    analytics.session_seeded(session)
+    sm = PlanningStateMachine(SimpleNamespace(messages=FakeMessages()), "model", 1024, analytics=analytics)
+
+    await sm.process_message(session, "We're building Atlas")
+
+    # Outcome extracted; strategic constraints were pre-filled, so phases is next
+    assert session.stage_data.define_outcome.project_name == "Atlas"
+    assert session.current_stage == PlanningStage.PHASES_AND_MILESTONES
+    assert analytics.summary()["sessions_started"] == 1
+
+
+async def test_default_clone_funnel_counts_skipped_prefilled_stages():
+    session = seed_session(build_complete_session().stage_data, DEFAULT_CLONE_STAGES).session
+    assert session.current_stage == PlanningStage.DEFINE_OUTCOME
+    analytics = PlanningAnalytics()
+    analytics.session_seeded(session)
+    sm = PlanningStateMachine(SimpleNamespace(messages=FakeMessages()), "model", 1024, analytics=analytics)
+
+    await sm.process_message(session, "We're building Atlas")
+
+    stages = {s["stage"]: s for s in analytics.summary()["stages"]}
+    outcome, constraints, phases = (
+        stages["define_outcome"], stages["strategic_constraints"], stages["phases_and_milestones"],
+    )
+    assert (outcome["reached"], outcome["advanced"], outcome["median_turns_to_advance"]) == (1, 1, 1)
+    assert (constraints["reached"], constraints["advanced"]) == (1, 1)
+    assert constraints["median_turns_to_advance"] is None
+    assert (phases["reached"], phases["advanced"]) == (1, 0)
+
+
+def test_contradiction_stops_the_prefill_and_leaves_a_notice():
+    stage_data = build_complete_session().stage_data
+    stage_data.commit(PlanningStage.TASKS_AND_SUBTASKS, TasksData(tasks=[
+        TaskDefinition(name=f"Task {i}", phase="Discovery", owner=f"Owner {i}") for i in range(8)
+    ]))
+
+    result = seed_session(stage_data)
+
+    session = result.session
+    assert result.contradiction is not None
+    assert result.prefilled == STAGE_ORDER[:3]
+    assert session.current_stage == PlanningStage.TASKS_AND_SUBTASKS
+    assert PlanningStage.RISK_AND_GOVERNANCE not in session.stage_data
+    assert "team of 5" in session.pending_notice
+    assert session.messages[-1].content == session.pending_notice
+
+
+async def test_pending_notice_is_delivered_with_the_first_turn():
+    session = seed_session(build_complete_session().stage_data, [PlanningStage.STRATEGIC_CONSTRAINTS]).session
+    session.pending_notice = "Heads up."
+    sm = PlanningStateMachine(SimpleNamespace(messages=FakeMessages()), "model", 1024)
+
+    reply, session = await sm.process_message(session, "We're building Atlas")
+
+    assert reply.startswith("Heads up.\n\n---\n")
+    assert session.pending_notice is None
+
+
+def test_seeding_rejects_stages_without_data():
+    source = build_complete_session()
+    source.stage_data.risk_and_governance = None
+    with pytest.raises(ValueError, match="risk_and_governance"):
+        seed_session(source.stage_data, DEFAULT_CLONE_STAGES)
+    with pytest.raises(ValueError):
+        seed_session(source.stage_data, [])
+
+
+async def test_registry_persists_templates(tmp_path):
+    path = str(tmp_path / "templates.json")
+    registry = TemplateRegistry(path)
+    template = SessionTemplate.from_session(build_complete_session(), "Agile rollout", DEFAULT_CLONE_STAGES)
+    await registry.add(template)
+
+    restored = TemplateRegistry(path)
+    assert restored.load()
+    loaded = restored.get(template.template_id)
+    assert loaded.stages == DEFAULT_CLONE_STAGES
+    assert loaded.stage_data.strategic_constraints.team_size == 5
+
+    assert await restored.delete(template.template_id)
+    assert not await restored.delete(template.template_id)
+    assert TemplateRegistry(path).load() and TemplateRegistry(path).list() == []
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.agent.token_budget import TokenBudget, ContextOverflowError, estimate_tokens
+from app.models.session import Session, PlanningStage, ConversationMessage
+from app.utils.metrics import MetricsRegistry
+
+
+def add(session: Session, role: str, content: str, stage: PlanningStage) -> None:
+    session.messages.append(ConversationMessage(role=role, content=content, stage=stage))
+
+
+def make_budget(**kwargs) -> TokenBudget:
+    kwargs.setdefault("metrics", MetricsRegistry())
+    return TokenBudget(**kwargs)
+
+
+def test_estimate_tokens_scales_with_length():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hello world") >= 2
+    assert estimate_tokens("a" * 400) == 100
+
+
+def test_count_only_visits_new_messages():
+    budget = make_budget()
+    session = Session()
+    add(session, "user", "We are building a new billing system", PlanningStage.DEFINE_OUTCOME)
+    first = budget.count(session)
+    assert session.token_count_cursor == 1
+
+    # A memoised count is trusted: changing it proves the message isn't re-estimated
+    session.messages[0].token_count = 1000
+    add(session, "assistant", "Great, who are the users?", PlanningStage.DEFINE_OUTCOME)
+    second = budget.count(session)
+    assert second == first + session.messages[1].token_count
+
+
+def test_refresh_recounts_edited_message():
+    budget = make_budget()
+    session = Session()
+    add(session, "assistant", "short", PlanningStage.DEFINE_OUTCOME)
+    before = budget.count(session)
+    session.messages[0].content += " and now a considerably longer transition message"
+    budget.refresh(session, 0)
+    assert session.history_tokens > before
+    assert session.history_tokens == session.messages[0].token_count
+
+
+def test_max_tokens_shrinks_to_fit_window():
+    budget = make_budget(context_window=1000, compaction_threshold=1.0, min_output_tokens=10)
+    session = Session()
+    add(session, "user", "word " * 400, PlanningStage.DEFINE_OUTCOME)
+    prepared = budget.prepare(session, system="sys", max_tokens=2048)
+    assert prepared.max_tokens == 1000 - prepared.estimated_input_tokens
+
+
+def test_compaction_replaces_committed_stage_messages():
+    budget = make_budget(context_window=2000, compaction_threshold=0.5, min_output_tokens=10)
+    session = Session(current_stage=PlanningStage.STRATEGIC_CONSTRAINTS)
+    session.stage_data[PlanningStage.DEFINE_OUTCOME.value] = {
+        "project_name": "Atlas",
+        "project_type": "general",
+        "success_definition": "Launch",
+        "measurable_result": "1000 users",
+    }
+    add(session, "user", "long outcome discussion " * 200, PlanningStage.DEFINE_OUTCOME)
+    add(session, "assistant", "Stage 1 complete", PlanningStage.DEFINE_OUTCOME)
+    add(session, "user", "Deadline is Q4", PlanningStage.STRATEGIC_CONSTRAINTS)
+
+    prepared = budget.prepare(session, system="sys", max_tokens=500)
+
+    assert prepared.compacted
+    assert "Atlas" in prepared.messages[0]["content"]
+    assert prepared.messages[-1]["content"] == "Deadline is Q4"
+    assert len(prepared.messages) == 3
+
+
+def test_overflow_raises_when_nothing_can_be_compacted():
+    budget = make_budget(context_window=100, min_output_tokens=10)
+    session = Session()
+    add(session, "user", "word " * 200, PlanningStage.DEFINE_OUTCOME)
+    with pytest.raises(ContextOverflowError):
+        budget.prepare(session, system="sys", max_tokens=50)
+
+
+def test_record_usage_tracks_estimate_vs_actual():
+    budget = make_budget()
+    session = Session()
+    add(session, "user", "hello", PlanningStage.DEFINE_OUTCOME)
+    prepared = budget.prepare(session, system="sys", max_tokens=100)
+    response = SimpleNamespace(usage=SimpleNamespace(input_tokens=20, output_tokens=5))
+
+    budget.record_usage(session, prepared, response)
+
+    assert session.tokens_used == 25
+    assert budget.metrics.histogram("tokens.estimate_error_pct").count == 1
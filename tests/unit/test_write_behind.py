@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from app.models.session import PlanningStage
+from app.storage.memory_store import InMemorySessionStore
+from app.api.routes.chat import _turn_error
+from app.storage.write_behind import StoreBusyError, WriteBehindSessionStore
+from app.utils.metrics import MetricsRegistry
+from tests.unit.test_archival import build_old_session
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowStore(InMemorySessionStore):
+    """Backend that records its writes and takes a while to make each one."""
+
+    def __init__(self, delay: float = 0.0, fail: int = 0):
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+        self.writes = []
+
+    async def save(self, session):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            self.fail -= 1
+            raise OSError("disk unavailable")
+        self.writes.append((session.session_id, session.current_stage))
+        await super().save(session)
+
+
+def build_store(backend, **kwargs):
+    return WriteBehindSessionStore(backend, metrics=MetricsRegistry(), **kwargs)
+
+
+async def test_saves_are_acknowledged_before_the_backend_write():
+    backend = SlowStore(delay=0.2)
+    store = build_store(backend, flush_interval=10)
+    session = build_old_session()
+
+    await asyncio.wait_for(store.save(session), timeout=0.05)
+
+    assert backend.writes == []
+    assert (await store.get(session.session_id)).session_id == session.session_id
+    assert (await store.get_header(session.session_id)).message_count == 4
+    assert await store.exists(session.session_id)
+    await store.close()
+    assert backend.writes == [(session.session_id, session.current_stage)]
+
+
+async def test_saves_between_flushes_coalesce_to_the_latest_state():
+    backend = SlowStore()
+    store = build_store(backend, flush_interval=10)
+    session = build_old_session()
+    for stage in (PlanningStage.STRATEGIC_CONSTRAINTS, PlanningStage.PHASES_AND_MILESTONES):
+        session.current_stage = stage
+        await store.save(session)
+    # Edits after save don't leak into the pending write
+    session.current_stage = PlanningStage.COMPLETE
+
+    assert await store.flush() == 1
+    assert backend.writes == [(session.session_id, PlanningStage.PHASES_AND_MILESTONES)]
+    assert await store.revision(session.session_id) == 2
+    await store.close()
+
+
+async def test_save_during_flush_is_written_by_the_next_flush():
+    backend = SlowStore(delay=0.05)
+    store = build_store(backend, flush_interval=10)
+    session = build_old_session()
+    first_stage = session.current_stage
+    await store.save(session)
+
+    flushing = asyncio.create_task(store.flush())
+    await asyncio.sleep(0.01)
+    session.current_stage = PlanningStage.COMPLETE
+    await store.save(session)
+    await flushing
+    await store.flush()
+
+    assert [stage for _, stage in backend.writes] == [first_stage, PlanningStage.COMPLETE]
+    await store.close()
+
+
+async def test_size_trigger_and_backpressure():
+    backend = SlowStore(delay=0.01)
+    store = build_store(backend, flush_interval=10, batch_size=2, max_pending=3)
+    sessions = [build_old_session() for _ in range(6)]
+
+    for s in sessions:
+        await asyncio.wait_for(store.save(s), timeout=1)
+        assert len(store._dirty) <= 3
+
+    await store.close()
+    assert {sid for sid, _ in backend.writes} == {s.session_id for s in sessions}
+    assert store.metrics.snapshot()["counters"]["write_behind.backpressure_waits"] >= 1
+
+
+async def test_backpressure_wait_is_bounded_and_maps_to_503():
+    backend = SlowStore(delay=0.3)
+    store = build_store(backend, flush_interval=10, batch_size=1, max_pending=1, backpressure_timeout=0.05)
+    first, second = build_old_session(), build_old_session()
+    await store.save(first)
+
+    with pytest.raises(StoreBusyError) as raised:
+        await asyncio.wait_for(store.save(second), timeout=1)
+    assert not await store.exists(second.session_id)
+    error = _turn_error(second, raised.value)
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    await store.close()
+
+
+async def test_pending_sessions_are_held_encoded():
+    store = build_store(SlowStore(), flush_interval=10)
+    session = build_old_session()
+    await store.save(session)
+
+    assert isinstance(store._dirty[session.session_id], bytes)
+    assert (await store.get(session.session_id)).model_dump() == session.model_dump()
+    page = await store.get_messages(session.session_id, limit=2)
+    assert [m.content for m in page.messages] == [m.content for m in session.messages[:2]]
+    await store.close()
+
+
+async def test_failed_writes_stay_dirty_and_deletes_are_ordered():
+    backend = SlowStore(fail=1)
+    store = build_store(backend, flush_interval=10)
+    session = build_old_session()
+    await store.save(session)
+
+    assert await store.flush() == 0
+    assert await store.get(session.session_id) is not None
+    assert await store.flush() == 1
+    assert await backend.exists(session.session_id)
+
+    await store.delete(session.session_id)
+    assert await store.get(session.session_id) is None
+    assert await backend.exists(session.session_id)
+    await store.close()
+    assert not await backend.exists(session.session_id)